@@ -0,0 +1,108 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import yaml
+from msight_vision.utils import ImageRetriever
+
+from detection import BatchYolo26Detector
+
+
+def load_steps(img_dir, num_steps):
+    """Read the first ``num_steps`` synchronized multi-camera buffers of the test data."""
+    img_retriever = ImageRetriever(img_dir=img_dir)
+    steps = []
+    while len(steps) < num_steps:
+        img_buff = img_retriever.get_image()
+        if img_buff is None:
+            break
+        steps.append(img_buff)
+    return steps
+
+
+def make_frames(img_buff, num_cameras):
+    """Build a ``detect_batch`` input with ``num_cameras`` sensors by cycling over the recorded ones."""
+    sensor_names = list(img_buff.keys())
+    frames = {}
+    for i in range(num_cameras):
+        sensor_name = sensor_names[i % len(sensor_names)]
+        frames[f"{sensor_name}#{i}"] = (img_buff[sensor_name]["image"], img_buff[sensor_name]["timestamp"])
+    return frames
+
+
+def run_loop(detector, steps, num_cameras):
+    detection_buffers = []
+    for img_buff in steps:
+        frames = make_frames(img_buff, num_cameras)
+        detection_buffers.append({sensor_name: detector.detect(img, ts, "fisheye") for sensor_name, (img, ts) in frames.items()})
+    return detection_buffers
+
+
+def run_batch(detector, steps, num_cameras):
+    return [detector.detect_batch(make_frames(img_buff, num_cameras), "fisheye") for img_buff in steps]
+
+
+def max_box_difference(loop_buffers, batch_buffers):
+    """Largest absolute box coordinate difference between both paths, None if the box counts differ."""
+    diff = 0.0
+    for loop_buffer, batch_buffer in zip(loop_buffers, batch_buffers):
+        for sensor_name, loop_result in loop_buffer.items():
+            loop_boxes = np.array([obj.box for obj in loop_result.object_list]).reshape(-1, 4)
+            batch_boxes = np.array([obj.box for obj in batch_buffer[sensor_name].object_list]).reshape(-1, 4)
+            if len(loop_boxes) != len(batch_boxes):
+                return None
+            if len(loop_boxes):
+                diff = max(diff, np.abs(np.sort(loop_boxes, axis=0) - np.sort(batch_boxes, axis=0)).max())
+    return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-camera detect() calls with a single detect_batch() per step.")
+    parser.add_argument("-c", "--config", default="./config.yaml", help="Path to the pipeline config file.")
+    parser.add_argument("--img-dir", default="./test-data", help="Recorded test data with one folder per sensor.")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[2, 4, 8], help="Camera counts to benchmark.")
+    parser.add_argument("--steps", type=int, default=20, help="Steps per run.")
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads, default is the torch default.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    model_config = config["model_config"]
+    detector = BatchYolo26Detector(
+        model_path=Path(model_config["ckpt_path"]),
+        device="cpu",
+        confthre=model_config["confthre"],
+        nmsthre=model_config["nmsthre"],
+        fp16=False,
+        class_agnostic_nms=model_config["class_agnostic_nms"],
+        end2end=model_config.get("end2end", False),
+    )
+    steps = load_steps(Path(args.img_dir), args.steps)
+    if not steps:
+        raise RuntimeError(f"No images found in: {args.img_dir}")
+    print(f"[OK] Loaded {len(steps)} steps of {list(steps[0].keys())}, torch threads: {torch.get_num_threads()}")
+
+    # warmup both paths
+    run_loop(detector, steps[:1], max(args.cameras))
+    run_batch(detector, steps[:1], max(args.cameras))
+
+    for num_cameras in args.cameras:
+        t0 = time.perf_counter()
+        loop_buffers = run_loop(detector, steps, num_cameras)
+        loop_ms = (time.perf_counter() - t0) / len(steps) * 1000
+        t0 = time.perf_counter()
+        batch_buffers = run_batch(detector, steps, num_cameras)
+        batch_ms = (time.perf_counter() - t0) / len(steps) * 1000
+        diff = max_box_difference(loop_buffers, batch_buffers)
+        diff_str = "box counts differ" if diff is None else f"max box diff {diff:.2f} px"
+        print(f"  {num_cameras} cameras | loop {loop_ms:8.2f} ms/step | batch {batch_ms:8.2f} ms/step | "
+              f"speedup {loop_ms / batch_ms:4.2f}x | {diff_str}")
+
+
+if __name__ == "__main__":
+    main()
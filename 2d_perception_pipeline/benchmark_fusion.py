@@ -0,0 +1,73 @@
+import argparse
+import time
+
+import numpy as np
+import yaml
+from msight_vision.base import DetectedObject2D, DetectionResult2D
+from msight_vision.fuser import HungarianFuser
+
+from fusion import GatedHungarianFuser
+
+
+def make_coverage_zones(coverage_zones, num_cameras):
+    """Build ``num_cameras`` overlapping sensors by cycling over the configured coverage zones."""
+    sensor_names = list(coverage_zones.keys())
+    return {f"{sensor_names[i % len(sensor_names)]}#{i}": coverage_zones[sensor_names[i % len(sensor_names)]] for i in range(num_cameras)}
+
+
+def make_detection_buffer(coverage_zones, num_objects, rng, noise=0.5):
+    """
+    Scatter ``num_objects`` objects over the bounding box of all coverage zones, every sensor sees all
+    of them with ``noise`` meters of position noise, in a random order.
+    """
+    vertices = np.array([vertex for polygon in coverage_zones.values() for vertex in polygon])
+    lat_min, lon_min = vertices.min(axis=0)
+    lat_max, lon_max = vertices.max(axis=0)
+    objects = np.stack([rng.uniform(lat_min, lat_max, num_objects), rng.uniform(lon_min, lon_max, num_objects)], axis=-1)
+    noise_deg = noise / np.array([111320.0, 111320.0 * np.cos(np.radians(lat_min))])
+    detection_buffer = {}
+    for sensor_id in coverage_zones:
+        positions = objects + rng.normal(0.0, 1.0, objects.shape) * noise_deg
+        object_list = []
+        for i in rng.permutation(num_objects):
+            obj = DetectedObject2D(box=[0, 0, 10, 10], class_id=2, score=0.9, pixel_bottom_center=[5, 10])
+            obj.lat, obj.lon = positions[i]
+            object_list.append(obj)
+        detection_buffer[sensor_id] = DetectionResult2D(object_list, 0.0, "fisheye")
+    return detection_buffer
+
+
+def time_fuse(fuser, buffers):
+    t0 = time.perf_counter()
+    results = [fuser.fuse(detection_buffer) for detection_buffer in buffers]
+    return (time.perf_counter() - t0) / len(buffers) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HungarianFuser with the spatially gated GatedHungarianFuser.")
+    parser.add_argument("-c", "--config", default="./config.yaml", help="Path to the pipeline config file.")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[2, 4], help="Camera counts to benchmark.")
+    parser.add_argument("--objects", type=int, nargs="+", default=[10, 50, 200], help="Objects per camera to benchmark.")
+    parser.add_argument("--steps", type=int, default=5, help="Steps per run.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    rng = np.random.default_rng(0)
+
+    for num_cameras in args.cameras:
+        coverage_zones = make_coverage_zones(config["fusion_config"]["coverage_zones"], num_cameras)
+        fuser = HungarianFuser(coverage_zones=coverage_zones)
+        gated_fuser = GatedHungarianFuser(coverage_zones=coverage_zones)
+        for num_objects in args.objects:
+            buffers = [make_detection_buffer(coverage_zones, num_objects, rng) for _ in range(args.steps)]
+            base_ms, base_results = time_fuse(fuser, buffers)
+            gated_ms, gated_results = time_fuse(gated_fuser, buffers)
+            base_count = sum(len(result) for result in base_results) / len(buffers)
+            gated_count = sum(len(result) for result in gated_results) / len(buffers)
+            print(f"  {num_cameras} cameras, {num_objects:4d} objects | hungarian {base_ms:9.2f} ms | gated {gated_ms:7.2f} ms | "
+                  f"speedup {base_ms / gated_ms:6.1f}x | fused objects {base_count:.1f} vs {gated_count:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from utils import plot_2d_detection_results
+
+
+class _Object:
+    def __init__(self, box, class_id, score):
+        self.box = box
+        self.class_id = class_id
+        self.score = score
+
+
+class _Result:
+    def __init__(self, object_list):
+        self.object_list = object_list
+
+
+def legacy_plot_2d_detection_results(img_buffer, detection_buffer, grid_size=(2, 2), size=(1280, 960)):
+    """The previous implementation: draws on the source images, concatenates at full resolution, then resizes."""
+    images = []
+    for sensor_name in img_buffer.keys():
+        img = img_buffer[sensor_name]["image"]
+        for detected_object in detection_buffer[sensor_name].object_list:
+            box = detected_object.box
+            cv2.rectangle(img, (int(box[0]), int(box[1])), (int(box[2]), int(box[3])), (0, 255, 0), 2)
+            cv2.putText(img, f"ID: {detected_object.class_id}, Score: {detected_object.score:.2f}", (int(box[0]), int(box[1] - 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        images.append(img)
+    rows, cols = grid_size
+    grid_img = cv2.vconcat([cv2.hconcat(images[i * cols:(i + 1) * cols]) for i in range(rows)])
+    return cv2.resize(grid_img, size)
+
+
+def make_inputs(num_cameras, num_objects, resolutions, rng):
+    img_buffer = {}
+    detection_buffer = {}
+    for i in range(num_cameras):
+        width, height = resolutions[i % len(resolutions)]
+        img_buffer[f"camera_{i}"] = {"image": rng.integers(0, 255, (height, width, 3), dtype=np.uint8), "timestamp": 0.0}
+        x1 = rng.uniform(0, width - 80, num_objects)
+        y1 = rng.uniform(20, height - 80, num_objects)
+        detection_buffer[f"camera_{i}"] = _Result([_Object([x, y, x + 60, y + 60], 0, 0.9) for x, y in zip(x1, y1)])
+    return img_buffer, detection_buffer
+
+
+def copy_images(img_buffer):
+    return {key: {"image": item["image"].copy(), "timestamp": item["timestamp"]} for key, item in img_buffer.items()}
+
+
+def timeit(function, repeats):
+    function()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - t0) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the grid compositor with the previous hconcat/vconcat/resize path.")
+    parser.add_argument("--objects", type=int, default=30, help="Detections per camera.")
+    parser.add_argument("--repeats", type=int, default=50, help="Repetitions per configuration.")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    configurations = [
+        ("2 x 1280x960", 2, (2, 1), (640, 960), [(1280, 960)]),
+        ("4 x 1280x960", 4, (2, 2), (1280, 960), [(1280, 960)]),
+        ("8 x 1920x1080", 8, (2, 4), (1920, 720), [(1920, 1080)]),
+        ("4 x mixed", 4, (2, 2), (1280, 960), [(1280, 960), (1920, 1080)]),
+    ]
+    for name, num_cameras, grid_size, size, resolutions in configurations:
+        img_buffer, detection_buffer = make_inputs(num_cameras, args.objects, resolutions, rng)
+        new_ms = timeit(lambda: plot_2d_detection_results(img_buffer, detection_buffer, grid_size, size), args.repeats)
+        if len(resolutions) == 1:
+            # the legacy path draws on its inputs, so it runs on fresh copies and the copy time is subtracted
+            copy_ms = timeit(lambda: copy_images(img_buffer), args.repeats)
+            legacy_ms = timeit(lambda: legacy_plot_2d_detection_results(copy_images(img_buffer), detection_buffer, grid_size, size), args.repeats) - copy_ms
+            legacy_str = f"legacy {legacy_ms:7.2f} ms | speedup {legacy_ms / new_ms:4.2f}x"
+        else:
+            legacy_str = "legacy fails on mixed resolutions"
+        print(f"  {name:<14s} | compositor {new_ms:7.2f} ms | {legacy_str}")
+
+if __name__ == "__main__":
+    main()
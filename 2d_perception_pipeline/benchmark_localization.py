@@ -0,0 +1,90 @@
+import argparse
+import time
+
+import numpy as np
+import yaml
+
+from localization import BatchHashLocalizer, INTERPOLATION_MODES
+from utils import load_locmaps
+
+EARTH_RADIUS = 6378137.0
+
+
+def to_local_meters(lat, lon, lat0, lon0):
+    """Equirectangular projection of lat/lon (degrees) around (lat0, lon0), good enough at intersection scale."""
+    x = np.radians(lon - lon0) * EARTH_RADIUS * np.cos(np.radians(lat0))
+    y = np.radians(lat - lat0) * EARTH_RADIUS
+    return x, y
+
+
+def sample_tracks(lat_map, lon_map, num_tracks, num_steps, pixel_speed, rng):
+    """
+    Sample straight, constant-velocity pixel tracks whose every step lands on a valid map cell.
+    :return: (num_tracks, num_steps, 2) array of pixel (x, y) coordinates
+    """
+    height, width = lat_map.shape[:2]
+    tracks = []
+    while len(tracks) < num_tracks:
+        start = rng.uniform([0, 0], [width - 1, height - 1])
+        angle = rng.uniform(0, 2 * np.pi)
+        steps = np.arange(num_steps)[:, None] * pixel_speed * np.array([np.cos(angle), np.sin(angle)])
+        track = start + steps
+        cols = np.floor(track[:, 0]).astype(np.intp)
+        rows = np.floor(track[:, 1]).astype(np.intp)
+        if cols.min() < 0 or rows.min() < 0 or cols.max() >= width - 1 or rows.max() >= height - 1:
+            continue
+        if np.isfinite(lat_map[rows, cols]).all() and np.isfinite(lon_map[rows, cols]).all() \
+                and np.isfinite(lat_map[rows + 1, cols + 1]).all() and np.isfinite(lon_map[rows + 1, cols + 1]).all():
+            tracks.append(track)
+    return np.stack(tracks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare nearest and bilinear HashLocalizer lookups.")
+    parser.add_argument("-c", "--config", default="./config.yaml", help="Path to the pipeline config file.")
+    parser.add_argument("--points", type=int, default=64, help="Detections per frame for the throughput test.")
+    parser.add_argument("--repeats", type=int, default=2000, help="Frames for the throughput test.")
+    parser.add_argument("--tracks", type=int, default=200, help="Tracks for the jitter test.")
+    parser.add_argument("--steps", type=int, default=50, help="Steps per track for the jitter test.")
+    parser.add_argument("--pixel-speed", type=float, default=0.3, help="Pixels moved per step in the jitter test.")
+    parser.add_argument("--fps", type=float, default=10.0, help="Frame rate used to turn displacement into speed.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    loc_maps = load_locmaps(config["loc_maps"])
+    rng = np.random.default_rng(0)
+
+    for key, item in loc_maps.items():
+        print(f"\n[{key}]")
+        lat_map = np.asarray(item["lat_map"])
+        lon_map = np.asarray(item["lon_map"])
+        tracks = sample_tracks(lat_map, lon_map, args.tracks, args.steps, args.pixel_speed, rng)
+        points = tracks[:, 0][rng.integers(0, len(tracks), args.points)]
+
+        for mode in INTERPOLATION_MODES:
+            t0 = time.perf_counter()
+            localizer = BatchHashLocalizer(lat_map=lat_map, lon_map=lon_map, interpolation=mode)
+            init_ms = (time.perf_counter() - t0) * 1000
+
+            localizer.localize_batch(points)
+            t0 = time.perf_counter()
+            for _ in range(args.repeats):
+                localizer.localize_batch(points)
+            frame_us = (time.perf_counter() - t0) / args.repeats * 1e6
+
+            # speed jitter: the tracks move at constant pixel velocity, so any frame-to-frame
+            # speed variation along a track comes from the lookup itself
+            lat, lon, valid = localizer.localize_batch(tracks.reshape(-1, 2))
+            lat = lat.reshape(tracks.shape[:2])
+            lon = lon.reshape(tracks.shape[:2])
+            x, y = to_local_meters(lat, lon, np.nanmean(lat), np.nanmean(lon))
+            speed = np.hypot(np.diff(x, axis=1), np.diff(y, axis=1)) * args.fps
+            jitter = np.std(speed, axis=1)
+            print(f"  {mode:<8s} init {init_ms:8.1f} ms | {frame_us:7.1f} us/frame of {args.points} "
+                  f"({args.points / frame_us:5.2f} Mpts/s) | speed jitter median {np.median(jitter):.3f} m/s, "
+                  f"p95 {np.percentile(jitter, 95):.3f} m/s | valid {valid.mean() * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
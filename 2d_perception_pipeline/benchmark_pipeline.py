@@ -0,0 +1,216 @@
+import argparse
+import contextlib
+import gc
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import torch
+import yaml
+from msight_base import Frame
+
+from metrics import PipelineMetrics
+from pipeline_builder import create_retriever, create_detector, create_localizers, create_fuser, create_tracker, create_state_estimator, create_stages, create_pipeline, iterate_images
+from retrieval import PrefetchImageRetriever
+from synthetic import SyntheticDetector, SyntheticScenario
+from output import CombinedViewComposer
+from utils import plot_2d_detection_results, load_locmaps
+from visualization import CachedVisualizer
+
+
+class SyntheticImageRetriever:
+    """
+    Stand-in for ``ImageRetriever`` when no recorded data is present.
+    Returns the same multi-camera buffers, filled with a few pre-generated noise images per sensor that are cycled over,
+    so the detector and the rest of the pipeline run on images of the real size.
+    """
+
+    def __init__(self, image_sizes, length, frame_rate=10.0, num_images=4, seed=0):
+        """
+        :param image_sizes: {sensor_name: (height, width)}
+        :param length: number of steps before ``get_image`` returns None
+        :param frame_rate: frame rate of the generated timestamps
+        :param num_images: distinct images generated per sensor
+        """
+        rng = np.random.default_rng(seed)
+        self.sensor_list = list(image_sizes.keys())
+        self.main_sensor = self.sensor_list[0]
+        self.images = {sensor_name: [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(num_images)]
+                       for sensor_name, (height, width) in image_sizes.items()}
+        self.length = length
+        self.frame_rate = frame_rate
+        self.start_time = time.time()
+        self.step = 0
+
+    def get_image(self):
+        if self.step >= self.length:
+            return None
+        timestamp = self.start_time + self.step / self.frame_rate
+        result = {}
+        for sensor_name, images in self.images.items():
+            result[sensor_name] = {"image": images[self.step % len(images)], "timestamp": timestamp, "path": None, "frame_id": str(self.step)}
+        self.step += 1
+        return result
+
+
+def create_source(config, img_dir, num_steps, synthetic=False):
+    """Recorded data in ``img_dir`` when present, synthetic images for the sensors of ``loc_maps`` otherwise."""
+    if not synthetic and img_dir.is_dir() and any(img_dir.iterdir()):
+        return create_retriever(config, img_dir), "replay"
+    image_sizes = {sensor_name: item["lat_map"].shape[:2] for sensor_name, item in load_locmaps(config["loc_maps"]).items()}
+    return SyntheticImageRetriever(image_sizes, num_steps), "synthetic"
+
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """Send everything written to stdout to stderr, at the file descriptor level since loggers keep their own handle."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(config, img_retriever, num_steps, warmup, render=False, detector=None):
+    """
+    Run the pipeline headless over the first ``num_steps`` steps of the source, the first ``warmup`` steps are not measured.
+    :param detector: detector to use instead of the one of the config, e.g. a ``SyntheticDetector``
+    :return: dict with the frames/sec, the per-stage percentiles in ms and the memory counters
+    """
+    if detector is None:
+        detector = create_detector(config, "cuda" if torch.cuda.is_available() else "cpu")
+    metrics = PipelineMetrics()
+    # only the stage level timings, the per sensor timers of the worker threads cannot be split from the warmup steps
+    stages = create_stages(detector, create_localizers(config), create_fuser(config), create_tracker(config), create_state_estimator(config))
+    pipeline = create_pipeline(config, stages)
+    if render:
+        visualizer = CachedVisualizer("./viz/mcity.png")
+        composer = CombinedViewComposer()
+
+    gc.collect()
+    blocks_start = sys.getallocatedblocks()
+    gc_start = [generation["collections"] for generation in gc.get_stats()]
+    blocks_peak = blocks_start
+    t_start = time.perf_counter()
+    measured = 0
+    for context in pipeline.run(itertools.islice(iterate_images(img_retriever), num_steps)):
+        step = context["step"]
+        if step < warmup:
+            # the clock starts when the last warmup step comes out of the pipeline
+            t_start = time.perf_counter()
+            continue
+        for name, elapsed in context["timings"].items():
+            metrics.observe(name, elapsed)
+        if render:
+            with metrics.timer("Visualization"):
+                result_frame = Frame(step)
+                for obj in context["result"]:
+                    result_frame.add_object(obj)
+                vis_img = visualizer.render(result_frame, with_traj=True)
+                detection2d_results_img = plot_2d_detection_results(context["data"], context["detection_buffer"], grid_size=(2, 1), size=(640, 960))
+                composer.compose(vis_img, detection2d_results_img)
+        measured += 1
+        blocks_peak = max(blocks_peak, sys.getallocatedblocks())
+    elapsed = time.perf_counter() - t_start
+    metrics.set_dropped(pipeline.dropped)
+
+    summary = metrics.summary()
+    stages = {name: {key: value * 1000 if key != "count" else value for key, value in stats.items()} for name, stats in summary["stages"].items()}
+    return {
+        "frames": measured,
+        "seconds": elapsed,
+        "fps": measured / elapsed if elapsed > 0 else 0.0,
+        "stages_ms": stages,
+        "dropped": summary["dropped"],
+        "memory": {
+            # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024),
+            "allocated_blocks_delta": sys.getallocatedblocks() - blocks_start,
+            "allocated_blocks_peak_delta": blocks_peak - blocks_start,
+            "gc_collections": [generation["collections"] - start for generation, start in zip(gc.get_stats(), gc_start)],
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded (or synthetic) data through the perception pipeline headless and report throughput as JSON.")
+    parser.add_argument("-c", "--config", default="./config.yaml", help="Path to the pipeline config file.")
+    parser.add_argument("--img-dir", default="./test-data", help="Recorded test data with one folder per sensor, synthetic images are used when it is missing.")
+    parser.add_argument("--synthetic", action="store_true", help="Use synthetic images even when recorded data is present.")
+    parser.add_argument("--synthetic-objects", type=int, default=None,
+                        help="Replace the detector with a synthetic scenario of this many vehicles (see synthetic.py), implies --synthetic.")
+    parser.add_argument("--steps", type=int, default=100, help="Steps to replay, warmup included.")
+    parser.add_argument("--warmup", type=int, default=5, help="Steps left out of the measurements.")
+    parser.add_argument("--render", action="store_true", help="Also render the visualization (without showing or writing it).")
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads, default is the torch default.")
+    parser.add_argument("--tracemalloc", action="store_true", help="Trace Python allocations to report their peak, slows the run down.")
+    parser.add_argument("-o", "--output", default=None, help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    img_retriever, source = create_source(config, Path(args.img_dir), args.steps, args.synthetic or args.synthetic_objects is not None)
+    detector = None
+    if args.synthetic_objects is not None:
+        scenario = SyntheticScenario(load_locmaps(config["loc_maps"]), config["fusion_config"]["coverage_zones"], num_objects=args.synthetic_objects)
+        detector = SyntheticDetector(scenario)
+        source = "synthetic-detections"
+    if args.tracemalloc:
+        tracemalloc.start()
+    # the retrievers and the detector print to stdout, keep it for the report
+    with stdout_to_stderr():
+        report = run(config, img_retriever, args.steps, args.warmup, args.render, detector)
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["memory"]["traced_current_mb"] = current / 1024 ** 2
+        report["memory"]["traced_peak_mb"] = peak / 1024 ** 2
+    if isinstance(img_retriever, PrefetchImageRetriever):
+        report["prefetch"] = img_retriever.stats
+        img_retriever.close()
+
+    report["meta"] = {
+        "config": str(args.config),
+        "source": source,
+        "synthetic_objects": args.synthetic_objects,
+        "steps": args.steps,
+        "warmup": args.warmup,
+        "render": args.render,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "device": "cuda" if torch.cuda.is_available() else "cpu",
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
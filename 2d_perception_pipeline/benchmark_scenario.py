@@ -0,0 +1,78 @@
+import argparse
+import time
+
+import numpy as np
+import yaml
+
+from pipeline_builder import create_localizers, create_fuser, create_tracker, create_state_estimator
+from synthetic import SyntheticScenario
+from utils import load_locmaps
+
+STAGES = ("Generation", "Localization", "Fusion", "Tracking", "State Estimation")
+
+
+def run(config, loc_maps, num_objects, num_steps, warmup, scenario_kwargs):
+    """
+    Run localization, fusion, tracking and state estimation on a synthetic scenario, one step at a time.
+    :return: ms per step of every stage, and the mean counts of vehicles in the coverage zones, fused objects and tracks
+    """
+    scenario = SyntheticScenario(loc_maps, config["fusion_config"]["coverage_zones"], num_objects=num_objects, **scenario_kwargs)
+    localizers = create_localizers(config)
+    fuser = create_fuser(config)
+    tracker = create_tracker(config)
+    state_estimator = create_state_estimator(config)
+
+    timings = {name: [] for name in STAGES}
+    counts = {"in_zones": [], "fused": [], "tracks": []}
+    for step in range(num_steps):
+        _, _, _, zones = scenario.ground_truth()
+        t0 = time.perf_counter()
+        detection_buffer = scenario.step()
+        t1 = time.perf_counter()
+        for sensor_name, detection_result in detection_buffer.items():
+            localizers[sensor_name].localize_and_filter(detection_result)
+        t2 = time.perf_counter()
+        fusion_result = fuser.fuse(detection_buffer)
+        t3 = time.perf_counter()
+        tracking_result = tracker.track(fusion_result)
+        t4 = time.perf_counter()
+        state_estimator.estimate(tracking_result)
+        t5 = time.perf_counter()
+        if step < warmup:
+            continue
+        for name, elapsed in zip(STAGES, np.diff([t0, t1, t2, t3, t4, t5])):
+            timings[name].append(elapsed * 1000)
+        counts["in_zones"].append((zones > 0).sum())
+        counts["fused"].append(len(fusion_result))
+        counts["tracks"].append(len(tracking_result))
+    return {name: np.mean(values) for name, values in timings.items()}, {name: np.mean(values) for name, values in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile fusion, tracking and state estimation on synthetic traffic, without images or a GPU.")
+    parser.add_argument("-c", "--config", default="./config.yaml", help="Path to the pipeline config file.")
+    parser.add_argument("--objects", type=int, nargs="+", default=[10, 100, 500, 2000], help="Vehicle counts to benchmark.")
+    parser.add_argument("--steps", type=int, default=50, help="Steps per run, warmup included.")
+    parser.add_argument("--warmup", type=int, default=10, help="Steps left out of the measurements, while the tracks are born.")
+    parser.add_argument("--overlap", type=float, default=0.3, help="Share of the lanes running through the region seen by several cameras.")
+    parser.add_argument("--miss-rate", type=float, default=0.05, help="Probability that a camera misses a visible vehicle.")
+    parser.add_argument("--pixel-noise", type=float, default=1.0, help="Bottom center noise in pixels.")
+    parser.add_argument("--false-positives", type=float, default=0.0, help="Mean false detections per camera and frame.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the scenario.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+    loc_maps = load_locmaps(config["loc_maps"])
+    scenario_kwargs = {"overlap": args.overlap, "miss_rate": args.miss_rate, "pixel_noise": args.pixel_noise,
+                       "false_positives": args.false_positives, "seed": args.seed}
+
+    print(f"  fusion gated: {config['fusion_config'].get('gated', False)}, track store: {config['tracker_config'].get('track_store', 'objects')}")
+    for num_objects in args.objects:
+        timings, counts = run(config, loc_maps, num_objects, args.steps, args.warmup, scenario_kwargs)
+        stages = " | ".join(f"{name} {timings[name]:7.2f} ms" for name in STAGES)
+        print(f"  {num_objects:5d} vehicles | {stages} | in zones {counts['in_zones']:6.1f}, fused {counts['fused']:6.1f}, tracks {counts['tracks']:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
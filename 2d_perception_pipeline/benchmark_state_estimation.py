@@ -0,0 +1,88 @@
+import argparse
+import time
+
+import numpy as np
+from msight_base import RoadUserPoint
+from msight_vision.state_estimator import FiniteDifferenceStateEstimator
+
+from state_estimation import RingBufferStateEstimator
+
+LAT0, LON0 = 42.3009, -83.6986
+METERS_PER_DEG_LAT = 111132.0
+
+
+def make_frames(num_tracks, num_steps, rng, frame_rate=5, speed=8.0, noise=0.2, miss_rate=0.05):
+    """
+    Synthetic tracked objects: ``num_tracks`` long-lived tracks driving straight at ``speed`` m/s in random
+    directions, with ``noise`` meters of position noise, each missed with probability ``miss_rate`` per step.
+    :return: frames as lists of (traj_id, lat, lon), and the true heading of every track in degrees
+    """
+    heading = rng.uniform(-180, 180, num_tracks)
+    velocity = np.stack([np.cos(np.radians(heading)), np.sin(np.radians(heading))], axis=1) * speed / frame_rate
+    start = rng.uniform(-100, 100, (num_tracks, 2))
+    meters_per_deg_lon = METERS_PER_DEG_LAT * np.cos(np.radians(LAT0))
+    frames = []
+    for step in range(num_steps):
+        positions = start + velocity * step + rng.normal(0.0, noise, start.shape)
+        seen = np.flatnonzero(rng.random(num_tracks) >= miss_rate)
+        frames.append([(str(i), LAT0 + positions[i, 0] / METERS_PER_DEG_LAT, LON0 + positions[i, 1] / meters_per_deg_lon) for i in seen])
+    return frames, heading
+
+
+def run(estimator, frames, report_every):
+    """Run the estimator over all frames, returning the ms per step of every ``report_every`` block and the outputs."""
+    block_ms = []
+    outputs = []
+    t0 = time.perf_counter()
+    for step, frame in enumerate(frames):
+        object_list = [RoadUserPoint(x=lat, y=lon, traj_id=traj_id) for traj_id, lat, lon in frame]
+        outputs.append(estimator.estimate(object_list))
+        if (step + 1) % report_every == 0:
+            block_ms.append((time.perf_counter() - t0) / report_every * 1000)
+            t0 = time.perf_counter()
+    return block_ms, outputs
+
+
+def max_difference(outputs_a, outputs_b):
+    """Largest speed (m/s) and heading (deg) differences between two runs over the same frames."""
+    speed_diff, heading_diff = 0.0, 0.0
+    for list_a, list_b in zip(outputs_a, outputs_b):
+        for a, b in zip(list_a, list_b):
+            speed_diff = max(speed_diff, abs(a.speed - b.speed))
+            if a.heading is not None and b.heading is not None:
+                heading_diff = max(heading_diff, abs((a.heading - b.heading + 180) % 360 - 180))
+            elif (a.heading is None) != (b.heading is None):
+                heading_diff = np.inf
+    return speed_diff, heading_diff
+
+
+def speed_jitter(outputs, speed, warmup=10):
+    """Standard deviation of the estimated speed around the true speed, after ``warmup`` steps."""
+    errors = [obj.speed - speed for object_list in outputs[warmup:] for obj in object_list]
+    return float(np.std(errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FiniteDifferenceStateEstimator with the ring buffer RingBufferStateEstimator.")
+    parser.add_argument("--tracks", type=int, default=50, help="Number of long-lived tracks.")
+    parser.add_argument("--steps", type=int, default=1000, help="Steps per run.")
+    parser.add_argument("--report-every", type=int, default=200, help="Steps per timing block.")
+    parser.add_argument("--window", type=int, default=7, help="Savitzky–Golay window.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames, _ = make_frames(args.tracks, args.steps, rng)
+    base_ms, base_outputs = run(FiniteDifferenceStateEstimator(), frames, args.report_every)
+    ring_ms, ring_outputs = run(RingBufferStateEstimator(), frames, args.report_every)
+    savgol_ms, savgol_outputs = run(RingBufferStateEstimator(mode="savgol", window=args.window, polyorder=1), frames, args.report_every)
+
+    print(f"{args.tracks} tracks, ms per step for every block of {args.report_every} steps:")
+    for block, (base, ring, savgol) in enumerate(zip(base_ms, ring_ms, savgol_ms)):
+        print(f"  steps {block * args.report_every:5d}+ | trajectory manager {base:7.2f} ms | ring buffer {ring:5.2f} ms | savgol {savgol:5.2f} ms")
+    speed_diff, heading_diff = max_difference(base_outputs, ring_outputs)
+    print(f"difference mode vs FiniteDifferenceStateEstimator: max speed diff {speed_diff:.1e} m/s, max heading diff {heading_diff:.1e} deg")
+    print(f"speed jitter: finite difference {speed_jitter(ring_outputs, 8.0):.2f} m/s, savgol {speed_jitter(savgol_outputs, 8.0):.2f} m/s")
+
+
+if __name__ == "__main__":
+    main()
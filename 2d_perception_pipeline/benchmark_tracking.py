@@ -0,0 +1,69 @@
+import argparse
+import copy
+import time
+
+import numpy as np
+from msight_base import RoadUserPoint
+from msight_vision import SortTracker
+from msight_vision.tracker import coord_unnormalization
+
+from tracking import ArraySortTracker
+
+
+def make_frames(num_tracks, num_steps, rng, spacing=15.0, speed=1.0, miss_rate=0.05):
+    """
+    Synthetic fused detections of a corridor: ``num_tracks`` objects on a grid ``spacing`` meters apart, moving
+    along the lanes at about ``speed`` meters per step, each missed with probability ``miss_rate`` per step.
+    """
+    side = int(np.ceil(np.sqrt(num_tracks)))
+    grid = np.stack(np.meshgrid(np.arange(side), np.arange(side)), axis=-1).reshape(-1, 2)[:num_tracks] * spacing
+    velocity = np.stack([rng.uniform(0.8, 1.2, num_tracks) * speed, np.zeros(num_tracks)], axis=1)
+    frames = []
+    for step in range(num_steps):
+        positions = grid + velocity * step + rng.normal(0.0, 0.1, grid.shape)
+        lats, lons = coord_unnormalization(positions[:, 0], positions[:, 1])
+        seen = rng.random(num_tracks) >= miss_rate
+        frames.append([RoadUserPoint(x=lat, y=lon, category=2, confidence=0.9) for lat, lon in zip(lats[seen], lons[seen])])
+    return frames
+
+
+def run(tracker, frames):
+    outputs = []
+    t0 = time.perf_counter()
+    for object_list in frames:
+        outputs.append(tracker.track(object_list))
+    return (time.perf_counter() - t0) / len(frames) * 1000, outputs
+
+
+def compare(object_outputs, array_outputs):
+    """Largest position difference in meters between both trackers, None if the outputs do not line up."""
+    diff = 0.0
+    for object_list, array_list in zip(object_outputs, array_outputs):
+        if len(object_list) != len(array_list):
+            return None
+        a = np.array(sorted((obj.x, obj.y, getattr(obj, "is_predicted", False)) for obj in object_list)).reshape(-1, 3)
+        b = np.array(sorted((obj.x, obj.y, getattr(obj, "is_predicted", False)) for obj in array_list)).reshape(-1, 3)
+        if len(a):
+            diff = max(diff, np.abs(a - b).max() * 111000.0)
+    return diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SortTracker with the array backed ArraySortTracker.")
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10, 100, 1000], help="Live track counts to benchmark.")
+    parser.add_argument("--steps", type=int, default=30, help="Steps per run.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for num_tracks in args.tracks:
+        frames = make_frames(num_tracks, args.steps, rng)
+        object_ms, object_outputs = run(SortTracker(use_filtered_position=True, output_predicted=True), copy.deepcopy(frames))
+        array_ms, array_outputs = run(ArraySortTracker(use_filtered_position=True, output_predicted=True), copy.deepcopy(frames))
+        diff = compare(object_outputs, array_outputs)
+        diff_str = "outputs differ" if diff is None else f"max position diff {diff:.1e} m"
+        print(f"  {num_tracks:5d} tracks | objects {object_ms:8.2f} ms/step | arrays {array_ms:7.2f} ms/step | "
+              f"speedup {object_ms / array_ms:5.1f}x | {diff_str}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import json
+import time
+
+import numpy as np
+from msight_base import Frame, RoadUserPoint
+from msight_base.visualizer import Visualizer
+
+from visualization import CachedVisualizer
+
+
+def make_frames(map_image_path, num_tracks, num_steps, rng, speed=0.00001):
+    """Synthetic tracks moving straight across the map, ``speed`` degrees per step in a random direction."""
+    with open(map_image_path.rsplit(".", 1)[0] + ".json") as f:
+        corners = json.load(f)
+    lat_min, lat_max = corners["bl"][0], corners["tl"][0]
+    lon_min, lon_max = corners["tl"][1], corners["tr"][1]
+    start = np.stack([rng.uniform(lat_min, lat_max, num_tracks), rng.uniform(lon_min, lon_max, num_tracks)], axis=1)
+    heading = rng.uniform(0, 2 * np.pi, num_tracks)
+    velocity = np.stack([np.cos(heading), np.sin(heading)], axis=1) * speed
+    return [start + velocity * step for step in range(num_steps)]
+
+
+def run(visualizer, frames):
+    """Render all frames, returning the ms per render and the last image."""
+    t0 = time.perf_counter()
+    for step, positions in enumerate(frames):
+        frame = Frame(step)
+        for i, (lat, lon) in enumerate(positions):
+            frame.add_object(RoadUserPoint(x=lat, y=lon, traj_id=str(i), heading=0.0))
+        img = visualizer.render(frame, with_traj=True)
+    return (time.perf_counter() - t0) / len(frames) * 1000, img
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Visualizer.render with the cached CachedVisualizer.render.")
+    parser.add_argument("--map", default="./viz/mcity.png", help="Basemap image, with the corner coordinates in the json next to it.")
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10, 50, 200], help="Track counts to benchmark.")
+    parser.add_argument("--steps", type=int, default=150, help="Steps per run, more than the 100 frames history.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for num_tracks in args.tracks:
+        frames = make_frames(args.map, num_tracks, args.steps, rng)
+        base_ms, base_img = run(Visualizer(args.map), frames)
+        cached_ms, cached_img = run(CachedVisualizer(args.map), frames)
+        diff = np.abs(base_img.astype(np.int16) - cached_img.astype(np.int16))
+        print(f"  {num_tracks:4d} tracks | Visualizer {base_ms:7.2f} ms | CachedVisualizer {cached_ms:6.2f} ms | "
+              f"speedup {base_ms / cached_ms:4.1f}x | pixels off by more than 1 level: {(diff > 1).any(axis=-1).mean() * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from locmap import FIXED_POINT_SCALE, LOCMAP_ENCODINGS, LOCMAP_SUFFIX, read_locmap, write_locmap
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert the .npz localization maps of a config file to memory-mappable .locmap files.")
+    parser.add_argument("-c", "--config", default="./config.yaml", help="Path to the pipeline config file.")
+    parser.add_argument("-e", "--encoding", default="float32", choices=list(LOCMAP_ENCODINGS),
+                        help="float64: absolute values, float32/fixed: offsets from a reference origin.")
+    parser.add_argument("--origin", type=float, nargs=2, metavar=("LAT", "LON"), default=None,
+                        help="Reference origin for offset encodings. Default is the centroid of each map.")
+    parser.add_argument("--scale", type=float, default=FIXED_POINT_SCALE,
+                        help=f"Degrees per unit for the fixed encoding. Default is {FIXED_POINT_SCALE}.")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = yaml.safe_load(f)
+
+    for key, item in config["loc_maps"].items():
+        src = Path(item)
+        if src.suffix == LOCMAP_SUFFIX:
+            print(f"[SKIP] {key}: {src} is already a locmap file")
+            continue
+        maps = np.load(src)
+        dst = write_locmap(src.with_suffix(LOCMAP_SUFFIX), maps["lat_map"], maps["lon_map"],
+                           encoding=args.encoding, origin=args.origin, scale=args.scale)
+        lat_map = maps["lat_map"]
+        decoded = np.asarray(read_locmap(dst)["lat_map"])
+        finite = np.isfinite(lat_map)
+        lat_err = np.abs(decoded[finite] - lat_map[finite]).max(initial=0.0)
+        print(f"[OK] {key}: {src} ({src.stat().st_size / 1e6:.1f} MB) -> {dst} "
+              f"({dst.stat().st_size / 1e6:.1f} MB), max lat error {lat_err:.2e} deg")
+    print(f"Point loc_maps in {args.config} at the {LOCMAP_SUFFIX} files to use them.")
+
+
+if __name__ == "__main__":
+    main()
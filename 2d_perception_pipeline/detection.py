@@ -0,0 +1,109 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+from msight_vision import Yolo26Detector
+from msight_vision.base import DetectedObject2D, DetectionResult2D
+
+LETTERBOX_STRIDE = 32
+LETTERBOX_FILL = 114
+
+
+class BatchYolo26Detector(Yolo26Detector):
+    """Yolo26 detector that runs the frames of all cameras of a step through a single forward pass.
+    Frames are letterboxed into one preallocated batch buffer that is reused across steps, and the
+    NMS outputs are mapped back to the original image coordinates of each sensor.
+    """
+
+    def __init__(self, model_path: Path, device: str = "cpu", confthre: float = 0.25, nmsthre: float = 0.45, fp16: bool = False, class_agnostic_nms: bool = False, end2end: bool = False, imgsz: int = 640):
+        """
+        :param imgsz: inference size of the longest image side, same as the Ultralytics ``imgsz``
+        """
+        super().__init__(model_path, device, confthre, nmsthre, fp16, class_agnostic_nms, end2end)
+        self.imgsz = imgsz
+        self._batch_buffer = None
+
+    def _letterbox_geometry(self, shape):
+        height, width = shape[:2]
+        ratio = min(self.imgsz / height, self.imgsz / width)
+        new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+        return ratio, new_width, new_height
+
+    def _get_batch_buffer(self, batch_size, height, width):
+        if self._batch_buffer is None or self._batch_buffer.shape != (batch_size, height, width, 3):
+            self._batch_buffer = np.full((batch_size, height, width, 3), LETTERBOX_FILL, dtype=np.uint8)
+        return self._batch_buffer
+
+    def letterbox_batch(self, images):
+        """
+        Letterbox a list of BGR images into the shared batch buffer.
+        :param images: list of (H, W, 3) uint8 images, sizes may differ
+        :return: (batch buffer (B, H, W, 3), list of (ratio, pad_x, pad_y) per image)
+        """
+        geometries = [self._letterbox_geometry(img.shape) for img in images]
+        # smallest stride-aligned canvas that fits every letterboxed frame, like Ultralytics' rect inference
+        height = max(-(-new_height // LETTERBOX_STRIDE) * LETTERBOX_STRIDE for _, _, new_height in geometries)
+        width = max(-(-new_width // LETTERBOX_STRIDE) * LETTERBOX_STRIDE for _, new_width, _ in geometries)
+        buffer = self._get_batch_buffer(len(images), height, width)
+
+        transforms = []
+        for slot, (img, (ratio, new_width, new_height)) in zip(buffer, zip(images, geometries)):
+            pad_x = (width - new_width) // 2
+            pad_y = (height - new_height) // 2
+            slot[:pad_y] = LETTERBOX_FILL
+            slot[pad_y + new_height:] = LETTERBOX_FILL
+            slot[:, :pad_x] = LETTERBOX_FILL
+            slot[:, pad_x + new_width:] = LETTERBOX_FILL
+            if (new_width, new_height) == (img.shape[1], img.shape[0]):
+                slot[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = img
+            else:
+                slot[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+            transforms.append((ratio, pad_x, pad_y))
+        return buffer, transforms
+
+    def _to_tensor(self, buffer):
+        # transfer as uint8 and convert on the device, same as the Ultralytics preprocessing
+        tensor = torch.from_numpy(buffer).to(self.device)
+        tensor = tensor.permute(0, 3, 1, 2).flip(1).contiguous()  # BHWC-BGR to BCHW-RGB
+        tensor = tensor.half() if self.fp16 else tensor.float()
+        return tensor.div_(255)
+
+    def _to_detection_result(self, yolo_output_result, transform, image_shape, timestamp, sensor_type):
+        ratio, pad_x, pad_y = transform
+        bboxes = yolo_output_result.boxes.xyxy.cpu().numpy().astype(np.float64)
+        confs = yolo_output_result.boxes.conf.cpu().numpy()
+        class_ids = yolo_output_result.boxes.cls.cpu().numpy()
+        # undo the letterbox and clip to the original image
+        bboxes[:, [0, 2]] = ((bboxes[:, [0, 2]] - pad_x) / ratio).clip(0, image_shape[1])
+        bboxes[:, [1, 3]] = ((bboxes[:, [1, 3]] - pad_y) / ratio).clip(0, image_shape[0])
+
+        detected_objects = []
+        for box, class_id, score in zip(bboxes.tolist(), class_ids.tolist(), confs.tolist()):
+            detected_objects.append(DetectedObject2D(
+                box=box,
+                class_id=int(class_id),
+                score=float(score),
+                pixel_bottom_center=[(box[0] + box[2]) / 2, (box[1] + box[3]) / 2],
+            ))
+        return DetectionResult2D(detected_objects, timestamp, sensor_type)
+
+    def detect_batch(self, frames, sensor_type="fisheye"):
+        """
+        Detect objects in the frames of several sensors with a single forward pass.
+        :param frames: dict of sensor name -> (image, timestamp)
+        :param sensor_type: type of the sensors
+        :return: dict of sensor name -> DetectionResult2D
+        """
+        if not frames:
+            return {}
+        sensor_names = list(frames.keys())
+        images = [frames[sensor_name][0] for sensor_name in sensor_names]
+        buffer, transforms = self.letterbox_batch(images)
+        yolo_output_results = self.model(self._to_tensor(buffer), device=self.device, conf=self.confthre, iou=self.nmsthre, half=self.fp16, verbose=False, agnostic_nms=self.class_agnostic_nms, end2end=self.end2end)
+
+        detection_buffer = {}
+        for sensor_name, image, transform, yolo_output_result in zip(sensor_names, images, transforms, yolo_output_results):
+            timestamp = frames[sensor_name][1]
+            detection_buffer[sensor_name] = self._to_detection_result(yolo_output_result, transform, image.shape, timestamp, sensor_type)
+        return detection_buffer
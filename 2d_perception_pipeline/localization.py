@@ -0,0 +1,122 @@
+from itertools import compress
+
+import numpy as np
+from msight_vision import HashLocalizer
+
+
+INTERPOLATION_MODES = ("nearest", "bilinear")
+
+
+def build_gradient_tables(value_map, out=None, block_rows=256):
+    """
+    Precompute per-cell bilinear coefficients of a localization map, so that inside cell (r, c)
+    value(r + fy, c + fx) = v[r, c] + fx * dx[r, c] + fy * dy[r, c] + fx * fy * dxy[r, c].
+    Cells whose neighbours have no finite location get zero coefficients and fall back to the nearest value.
+    The map is decoded ``block_rows`` rows at a time, so a memory-mapped ``OffsetMap`` is never materialized in float64.
+    :param value_map: localization map (H, W)
+    :param out: (H, W, 3) float32 array receiving dx, dy and dxy, allocated when None
+    :return: (dx, dy, dxy) float32 tables of shape (H, W), views of ``out``
+    """
+    height, width = value_map.shape[:2]
+    if out is None:
+        out = np.empty((height, width, 3), dtype=np.float32)
+    # the last row/column has no right/bottom neighbour and keeps zero coefficients
+    out[-1] = 0.0
+    out[:, -1] = 0.0
+    for start in range(0, height - 1, block_rows):
+        stop = min(start + block_rows, height - 1)
+        # with the row below the block, the bottom neighbours of its last row
+        v = np.asarray(value_map[start:stop + 1], dtype=np.float64)
+        v00 = v[:-1, :-1]
+        v01 = v[:-1, 1:]
+        v10 = v[1:, :-1]
+        v11 = v[1:, 1:]
+        finite = np.isfinite(v00) & np.isfinite(v01) & np.isfinite(v10) & np.isfinite(v11)
+        with np.errstate(invalid="ignore"):
+            for k, diff in enumerate((v01 - v00, v10 - v00, v11 - v10 - v01 + v00)):
+                out[start:stop, :-1, k] = np.where(finite, diff, 0.0)
+    return out[..., 0], out[..., 1], out[..., 2]
+
+
+class BatchHashLocalizer(HashLocalizer):
+    """Hash localizer that looks up all detections of a frame with a single fancy-indexed lookup.
+    Drop-in replacement for ``HashLocalizer``: ``localize`` keeps its signature and pixel convention.
+    With ``interpolation="bilinear"`` the lookup is interpolated between cells using gradient tables
+    precomputed at construction time, which removes the whole-cell jumps of the nearest lookup.
+    """
+
+    def __init__(self, lat_map, lon_map, interpolation="nearest"):
+        """
+        :param lat_map: latitude map (H, W)
+        :param lon_map: longitude map (H, W)
+        :param interpolation: "nearest" (same as HashLocalizer) or "bilinear"
+        """
+        super().__init__(lat_map, lon_map)
+        if interpolation not in INTERPOLATION_MODES:
+            raise ValueError(f"Unknown interpolation: {interpolation}, expected one of {INTERPOLATION_MODES}")
+        self.interpolation = interpolation
+        if interpolation == "bilinear":
+            # (H * W, 6) table of lat (dx, dy, dxy) and lon (dx, dy, dxy), gathered with a single lookup per frame
+            height, width = lat_map.shape[:2]
+            table = np.empty((height, width, 6), dtype=np.float32)
+            build_gradient_tables(lat_map, out=table[..., :3])
+            build_gradient_tables(lon_map, out=table[..., 3:])
+            self.gradient_table = table.reshape(-1, 6)
+
+    def localize_batch(self, points):
+        """
+        Localize a batch of pixels.
+        :param points: (N, 2) array of pixel (x, y) coordinates, e.g. the bottom centers of all boxes in a frame
+        :return: (lat, lon, valid) arrays of shape (N,), ``valid`` is False for pixels outside the map
+                 and for cells without a finite location
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self.interpolation == "bilinear":
+            cols = np.floor(points[:, 0]).astype(np.intp)
+            rows = np.floor(points[:, 1]).astype(np.intp)
+        else:
+            # truncate towards zero, same as int() in HashLocalizer.localize
+            cols = points[:, 0].astype(np.intp)
+            rows = points[:, 1].astype(np.intp)
+        height, width = self.lat_map.shape[:2]
+        inside = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+        rows = rows[inside]
+        cols = cols[inside]
+
+        lat = np.full(len(points), np.nan)
+        lon = np.full(len(points), np.nan)
+        lat[inside] = self.lat_map[rows, cols]
+        lon[inside] = self.lon_map[rows, cols]
+        if self.interpolation == "bilinear":
+            fx = points[inside, 0] - cols
+            fy = points[inside, 1] - rows
+            weights = np.stack([fx, fy, fx * fy], axis=-1)
+            coefficients = self.gradient_table[rows * width + cols]
+            lat[inside] += np.einsum("ij,ij->i", weights, coefficients[:, :3])
+            lon[inside] += np.einsum("ij,ij->i", weights, coefficients[:, 3:])
+        valid = inside & np.isfinite(lat) & np.isfinite(lon)
+        return lat, lon, valid
+
+    def _localize_objects(self, object_list):
+        if not object_list:
+            return np.zeros(0, dtype=bool)
+        points = np.array([obj.pixel_bottom_center for obj in object_list], dtype=np.float64)
+        lat, lon, valid = self.localize_batch(points)
+        for obj, obj_lat, obj_lon in zip(object_list, lat.tolist(), lon.tolist()):
+            obj.lat = obj_lat
+            obj.lon = obj_lon
+        return valid
+
+    def localize(self, detection2d_result):
+        self._localize_objects(detection2d_result.object_list)
+        return detection2d_result
+
+    def localize_and_filter(self, detection2d_result):
+        """
+        Localize all objects and drop the ones that could not be localized, using a single boolean mask.
+        :param detection2d_result: DetectionResult2D instance
+        :return: the same DetectionResult2D instance, with only localized objects left
+        """
+        valid = self._localize_objects(detection2d_result.object_list)
+        detection2d_result.object_list = list(compress(detection2d_result.object_list, valid))
+        return detection2d_result
@@ -0,0 +1,187 @@
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+# On-disk layout of a ``.locmap`` file:
+#
+#   magic (8 bytes) | version (uint32) | header length (uint32) | JSON header | padding | lat blob | lon blob
+#
+# The blobs are raw C-ordered arrays aligned to ``LOCMAP_ALIGNMENT`` bytes so they can be
+# memory-mapped read-only and shared through the page cache by every process on the box.
+LOCMAP_MAGIC = b"MSLOCMAP"
+LOCMAP_VERSION = 1
+LOCMAP_ALIGNMENT = 64
+LOCMAP_SUFFIX = ".locmap"
+
+# encoding name -> on-disk dtype
+LOCMAP_ENCODINGS = {
+    "float64": "<f8",  # absolute lat/lon, bit-identical to the .npz maps
+    "float32": "<f4",  # lat/lon offsets from the reference origin
+    "fixed": "<i4",    # lat/lon offsets from the reference origin, in units of ``scale`` degrees
+}
+FIXED_POINT_SCALE = 1e-8  # ~1 mm per unit, +-21 degrees of range around the origin
+FIXED_POINT_NODATA = np.iinfo(np.int32).min
+
+_PREAMBLE = struct.Struct("<8sII")
+
+
+class OffsetMap:
+    """
+    Read-only view that decodes a memory-mapped offset map back to absolute degrees on lookup.
+    Only the looked-up cells are decoded, so the full map is never materialized in float64.
+    """
+
+    def __init__(self, raw, origin, scale=1.0, nodata=None):
+        """
+        :param raw: memory-mapped offsets
+        :param origin: reference origin added to every decoded value
+        :param scale: degrees per raw unit
+        :param nodata: raw value marking cells without a valid location (fixed-point only)
+        """
+        self.raw = raw
+        self.origin = float(origin)
+        self.scale = float(scale)
+        self.nodata = nodata
+
+    @property
+    def shape(self):
+        return self.raw.shape
+
+    @property
+    def ndim(self):
+        return self.raw.ndim
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64)
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __getitem__(self, index):
+        raw = np.asarray(self.raw[index])
+        values = self.origin + raw.astype(np.float64) * self.scale
+        if self.nodata is not None:
+            values = np.where(raw == self.nodata, -np.inf, values)
+        if values.ndim == 0:
+            return float(values)
+        return values
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[...]
+        return values if dtype is None else values.astype(dtype)
+
+
+def _default_origin(lat_map, lon_map):
+    finite = np.isfinite(lat_map) & np.isfinite(lon_map)
+    if not finite.any():
+        return 0.0, 0.0
+    return round(float(lat_map[finite].mean()), 6), round(float(lon_map[finite].mean()), 6)
+
+
+def _encode(values, encoding, origin, scale):
+    if encoding == "float64":
+        return np.ascontiguousarray(values, dtype="<f8")
+    offsets = np.asarray(values, dtype=np.float64) - origin
+    if encoding == "float32":
+        return np.ascontiguousarray(offsets, dtype="<f4")
+    finite = np.isfinite(offsets)
+    fixed = np.full(offsets.shape, FIXED_POINT_NODATA, dtype="<i4")
+    fixed[finite] = np.rint(offsets[finite] / scale).astype(np.int64)
+    return fixed
+
+
+def write_locmap(path, lat_map, lon_map, encoding="float32", origin=None, scale=FIXED_POINT_SCALE):
+    """
+    Write a pair of localization maps to a versioned, memory-mappable ``.locmap`` file.
+    :param path: output file path
+    :param lat_map: latitude map (H, W)
+    :param lon_map: longitude map (H, W)
+    :param encoding: one of ``LOCMAP_ENCODINGS``
+    :param origin: (lat, lon) reference origin for offset encodings, defaults to the map centroid
+    :param scale: degrees per unit for the fixed-point encoding
+    :return: path of the written file
+    """
+    if encoding not in LOCMAP_ENCODINGS:
+        raise ValueError(f"Unknown locmap encoding: {encoding}, expected one of {list(LOCMAP_ENCODINGS)}")
+    lat_map = np.asarray(lat_map)
+    lon_map = np.asarray(lon_map)
+    if lat_map.shape != lon_map.shape or lat_map.ndim != 2:
+        raise ValueError(f"lat_map and lon_map must be 2D with the same shape, got {lat_map.shape} and {lon_map.shape}")
+
+    if encoding == "float64":
+        origin = (0.0, 0.0)
+    elif origin is None:
+        origin = _default_origin(lat_map, lon_map)
+    if encoding != "fixed":
+        scale = 1.0
+
+    dtype = np.dtype(LOCMAP_ENCODINGS[encoding])
+    if encoding == "fixed":
+        finite = np.isfinite(lat_map) & np.isfinite(lon_map)
+        max_offset = max(np.abs(lat_map[finite] - origin[0]).max(initial=0.0),
+                         np.abs(lon_map[finite] - origin[1]).max(initial=0.0))
+        if max_offset / scale >= np.iinfo(np.int32).max:
+            raise ValueError(f"Offsets of {max_offset} degrees do not fit the fixed-point range with scale {scale}")
+
+    header = {
+        "shape": list(lat_map.shape),
+        "dtype": dtype.str,
+        "encoding": encoding,
+        "origin": [float(origin[0]), float(origin[1])],
+        "scale": float(scale),
+        "nodata": int(FIXED_POINT_NODATA) if encoding == "fixed" else None,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_offset = _PREAMBLE.size + len(header_bytes)
+    padding = -data_offset % LOCMAP_ALIGNMENT
+
+    path = Path(path)
+    with open(path, "wb") as f:
+        f.write(_PREAMBLE.pack(LOCMAP_MAGIC, LOCMAP_VERSION, len(header_bytes) + padding))
+        f.write(header_bytes)
+        f.write(b" " * padding)
+        f.write(_encode(lat_map, encoding, origin[0], scale).tobytes())
+        f.write(_encode(lon_map, encoding, origin[1], scale).tobytes())
+    return path
+
+
+def read_locmap_header(path):
+    """
+    Read the header of a ``.locmap`` file.
+    :param path: path to the ``.locmap`` file
+    :return: (header dict, byte offset of the lat blob)
+    """
+    with open(path, "rb") as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != LOCMAP_MAGIC:
+            raise ValueError(f"{path} is not a locmap file")
+        if version > LOCMAP_VERSION:
+            raise ValueError(f"{path} has locmap version {version}, this reader supports up to {LOCMAP_VERSION}")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    return header, _PREAMBLE.size + header_len
+
+
+def read_locmap(path):
+    """
+    Memory-map a ``.locmap`` file read-only.
+    Absolute float64 maps come back as plain ``np.memmap`` arrays; offset encodings come back as
+    ``OffsetMap`` views that decode to absolute degrees on lookup.
+    :param path: path to the ``.locmap`` file
+    :return: dict with ``lat_map`` and ``lon_map`` entries
+    """
+    header, offset = read_locmap_header(path)
+    shape = tuple(header["shape"])
+    dtype = np.dtype(header["dtype"])
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    lat_raw = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+    lon_raw = np.memmap(path, dtype=dtype, mode="r", offset=offset + nbytes, shape=shape)
+    if header["encoding"] == "float64":
+        return {"lat_map": lat_raw, "lon_map": lon_raw}
+    lat0, lon0 = header["origin"]
+    return {
+        "lat_map": OffsetMap(lat_raw, lat0, header["scale"], header["nodata"]),
+        "lon_map": OffsetMap(lon_raw, lon0, header["scale"], header["nodata"]),
+    }
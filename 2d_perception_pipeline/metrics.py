@@ -0,0 +1,229 @@
+import json
+import math
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_DISABLED_TIMER = nullcontext()
+
+
+class LatencyHistogram:
+    """
+    Log-linear (HDR style) histogram of durations in seconds.
+    Every power of two above ``lowest`` is split into ``2 ** significant_bits`` buckets, so recording is O(1)
+    with a fixed memory footprint, and quantiles are reported within ``2 ** -significant_bits`` relative error.
+    """
+
+    def __init__(self, lowest=1e-6, highest=60.0, significant_bits=5):
+        """
+        :param lowest: smallest distinguishable duration in seconds, shorter ones fall in the first bucket
+        :param highest: largest tracked duration in seconds, longer ones fall in the last bucket
+        :param significant_bits: log2 of the number of buckets per power of two
+        """
+        self.lowest = lowest
+        self.sub_buckets = 2 ** significant_bits
+        self.counts = [0] * (self._index(highest) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _index(self, value):
+        v = value / self.lowest
+        if v < 1.0:
+            return 0
+        mantissa, exponent = math.frexp(v)
+        return (exponent - 1) * self.sub_buckets + int((2.0 * mantissa - 1.0) * self.sub_buckets) + 1
+
+    def _upper_bound(self, index):
+        if index == 0:
+            return self.lowest
+        exponent, sub_bucket = divmod(index - 1, self.sub_buckets)
+        return self.lowest * 2.0 ** exponent * (1.0 + (sub_bucket + 1) / self.sub_buckets)
+
+    def record(self, value):
+        self.counts[min(self._index(value), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile, capped by the largest recorded value."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        result = {"count": self.count, "mean": self.total / self.count if self.count else 0.0, "max": self.max}
+        for q in QUANTILES:
+            result[f"p{round(q * 100)}"] = self.quantile(q)
+        return result
+
+
+class PipelineMetrics:
+    """
+    Latency histograms per stage (and per sensor) and drop counters of the perception pipeline.
+    ``timer`` is a context manager and ``timed`` a decorator; when disabled both hand back a shared no-op,
+    so instrumented code costs one attribute check.
+    """
+
+    def __init__(self, enabled=True, **histogram_kwargs):
+        """
+        :param enabled: record anything at all
+        :param histogram_kwargs: passed to every ``LatencyHistogram``
+        """
+        self.enabled = enabled
+        self.histogram_kwargs = histogram_kwargs
+        self.histograms = {}
+        self.dropped = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def observe(self, stage, seconds, sensor=None):
+        if not self.enabled:
+            return
+        key = (stage, sensor)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram(**self.histogram_kwargs)
+            histogram.record(seconds)
+
+    def _ordered_keys(self):
+        """Stages in the order their stage level histograms were created, each followed by its per sensor histograms."""
+        first_seen = {}
+        for stage, _ in sorted(self.histograms, key=lambda key: key[1] is not None):
+            first_seen.setdefault(stage, len(first_seen))
+        return sorted(self.histograms, key=lambda key: (first_seen[key[0]], key[1] is not None, key[1] or ""))
+
+    def timer(self, stage, sensor=None):
+        """Context manager recording the time spent in its block."""
+        if not self.enabled:
+            return _DISABLED_TIMER
+        return _Timer(self, stage, sensor)
+
+    def timed(self, stage):
+        """Decorator recording the time spent in every call of the function."""
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - t0)
+            return wrapper
+        return decorator
+
+    def set_dropped(self, counts):
+        """Update the drop counters, e.g. with ``StagePipeline.dropped``."""
+        if self.enabled:
+            with self._lock:
+                self.dropped.update(counts)
+
+    def summary(self):
+        """
+        :return: {"stages": {name: {"count", "mean", "max", "p50", "p95", "p99"}}, "dropped": {...}}, in seconds,
+            per sensor entries are named "stage/sensor"
+        """
+        with self._lock:
+            stages = {stage if sensor is None else f"{stage}/{sensor}": self.histograms[(stage, sensor)].summary()
+                      for stage, sensor in self._ordered_keys()}
+            return {"uptime": time.time() - self.started, "stages": stages, "dropped": dict(self.dropped)}
+
+    def format_summary(self):
+        lines = []
+        for name, stats in self.summary()["stages"].items():
+            lines.append(f"  {name + ':':<28s}p50 {stats['p50'] * 1000:7.2f} ms  p95 {stats['p95'] * 1000:7.2f} ms  "
+                         f"p99 {stats['p99'] * 1000:7.2f} ms  max {stats['max'] * 1000:7.2f} ms  n={stats['count']}")
+        dropped = {name: count for name, count in self.dropped.items() if count}
+        if dropped:
+            lines.append(f"  dropped: {dropped}")
+        return "\n".join(lines)
+
+    def prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = ["# HELP perception_stage_latency_seconds Time spent in each pipeline stage.",
+                 "# TYPE perception_stage_latency_seconds summary"]
+        with self._lock:
+            for stage, sensor in self._ordered_keys():
+                histogram = self.histograms[(stage, sensor)]
+                labels = f'stage="{stage}"' + ("" if sensor is None else f',sensor="{sensor}"')
+                for q in QUANTILES:
+                    lines.append(f'perception_stage_latency_seconds{{{labels},quantile="{q}"}} {histogram.quantile(q):.6f}')
+                lines.append(f"perception_stage_latency_seconds_sum{{{labels}}} {histogram.total:.6f}")
+                lines.append(f"perception_stage_latency_seconds_count{{{labels}}} {histogram.count}")
+            lines += ["# HELP perception_dropped_total Steps dropped by the latest-frame-wins policy.",
+                      "# TYPE perception_dropped_total counter"]
+            for name, count in sorted(self.dropped.items()):
+                lines.append(f'perception_dropped_total{{queue="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Expose ``/metrics`` (Prometheus text) and ``/metrics.json`` on a background HTTP server thread.
+        :return: the (host, port) served, or None when the port cannot be bound, the pipeline then runs without it
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = metrics.prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(metrics.summary()).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep the console for the pipeline
+
+        try:
+            self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"[WARN] No metrics endpoint, cannot listen on {host}:{port}: {e}")
+            return None
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        return self._server.server_address
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "sensor", "t0")
+
+    def __init__(self, metrics, stage, sensor):
+        self.metrics = metrics
+        self.stage = stage
+        self.sensor = sensor
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.t0, self.sensor)
+        return False
@@ -0,0 +1,115 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+OUTPUT_MODES = ("window", "video", "topic", "none")
+
+
+class CombinedViewComposer:
+    """Puts the map view and the 2D detection grid side by side in a canvas that is reused across steps.
+    The resize geometry is computed once per input size instead of every step, and the detection grid
+    is resized straight into its slice of the canvas.
+    """
+
+    def __init__(self):
+        self.canvas = None
+        self._key = None
+        self._det_size = None
+
+    def compose(self, vis_img, detection2d_results_img):
+        key = (vis_img.shape, detection2d_results_img.shape)
+        if key != self._key:
+            # resize detection2d_results_img to have the same height as vis_img, preserving aspect ratio
+            height = vis_img.shape[0]
+            scale = height / detection2d_results_img.shape[0]
+            width = int(detection2d_results_img.shape[1] * scale)
+            self.canvas = np.empty((height, vis_img.shape[1] + width, 3), dtype=np.uint8)
+            self._det_size = (width, height)
+            self._key = key
+        vis_width = vis_img.shape[1]
+        self.canvas[:, :vis_width] = vis_img
+        det_slot = self.canvas[:, vis_width:]
+        if self._det_size == (detection2d_results_img.shape[1], detection2d_results_img.shape[0]):
+            det_slot[:] = detection2d_results_img
+        else:
+            cv2.resize(detection2d_results_img, self._det_size, dst=det_slot)
+        return self.canvas
+
+
+class WindowOutput:
+    """Shows the combined view in an OpenCV window."""
+
+    def __init__(self, window_name="Combined Results"):
+        self.window_name = window_name
+
+    def write(self, img, step, timestamp=None):
+        cv2.imshow(self.window_name, img)
+        cv2.waitKey(1)  # refresh display
+
+    def close(self):
+        cv2.destroyAllWindows()
+
+
+class VideoOutput:
+    """Writes the combined view to a video file, the encoder is opened on the first frame."""
+
+    def __init__(self, video_path, fps=10.0, fourcc="mp4v"):
+        self.video_path = Path(video_path)
+        self.fps = fps
+        self.fourcc = fourcc
+        self.writer = None
+
+    def write(self, img, step, timestamp=None):
+        if self.writer is None:
+            self.writer = cv2.VideoWriter(str(self.video_path), cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (img.shape[1], img.shape[0]))
+            if not self.writer.isOpened():
+                raise RuntimeError(f"Cannot open video writer for {self.video_path}")
+        self.writer.write(img)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class TopicOutput:
+    """Publishes the combined view as ImageData to an MSight topic."""
+
+    def __init__(self, topic_name, sensor_name="perception_pipeline", jpeg_quality=50):
+        from msight_core.data import ImageData
+        from msight_core.pubsub import RedisPubSub
+        from msight_core.topics import get_topic
+        from msight_core.utils import get_redis_client
+
+        self._image_data_type = ImageData
+        redis_client = get_redis_client()
+        self.topic = get_topic(redis_client, topic_name, register_if_not_exist=True, data_type=ImageData)
+        self.pubsub = RedisPubSub(redis_client)
+        self.sensor_name = sensor_name
+        self.jpeg_quality = jpeg_quality
+
+    def write(self, img, step, timestamp=None):
+        data = self._image_data_type.from_ndarray(img, self.sensor_name, capture_timestamp=timestamp, jpeg_quality=self.jpeg_quality)
+        self.pubsub.publish(self.topic, data.serialize())
+
+    def close(self):
+        pass
+
+
+def create_output(output_config):
+    """
+    Create the output sink of the combined view from the ``output_config`` section of config.yaml.
+    :param output_config: dict with ``mode`` and the mode specific options
+    :return: output with ``write(img, step, timestamp)`` and ``close()``, or None when the mode is "none"
+    """
+    mode = output_config.get("mode", "window")
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode: {mode}, expected one of {OUTPUT_MODES}")
+    if mode == "window":
+        return WindowOutput()
+    if mode == "video":
+        return VideoOutput(output_config.get("video_path", "output_pipeline.mp4"), fps=output_config.get("fps", 10.0))
+    if mode == "topic":
+        return TopicOutput(output_config["topic_name"], sensor_name=output_config.get("sensor_name", "perception_pipeline"))
+    return None
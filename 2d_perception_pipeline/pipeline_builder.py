@@ -0,0 +1,119 @@
+from pathlib import Path
+
+from msight_vision import SortTracker
+from msight_vision.fuser import HungarianFuser
+from msight_vision.utils import ImageRetriever
+
+from detection import BatchYolo26Detector
+from fusion import GatedHungarianFuser
+from localization import BatchHashLocalizer
+from metrics import PipelineMetrics
+from pipeline_runner import StagePipeline
+from retrieval import PrefetchImageRetriever
+from state_estimation import RingBufferStateEstimator
+from tracking import ArraySortTracker
+from utils import load_locmaps
+
+# Builders of the perception pipeline from config.yaml, shared by run_perception_pipeline.py and benchmark_pipeline.py
+
+
+def create_retriever(config, img_dir):
+    retriever_config = config.get("retriever_config", {})
+    if retriever_config.get("prefetch", 0) > 0:
+        return PrefetchImageRetriever(img_dir=img_dir, prefetch=retriever_config["prefetch"], num_workers=retriever_config.get("decode_workers", 4))
+    return ImageRetriever(img_dir=img_dir)
+
+
+def create_detector(config, device):
+    model_config = config["model_config"]
+    return BatchYolo26Detector(model_path=Path(model_config["ckpt_path"]), device=device, confthre=model_config["confthre"], nmsthre=model_config["nmsthre"],
+                               fp16=False, class_agnostic_nms=model_config["class_agnostic_nms"], end2end=model_config.get("end2end", False))
+
+
+def create_localizers(config, loc_maps=None):
+    """
+    :param loc_maps: already loaded maps, {sensor_name: {"lat_map", "lon_map"}}, loaded from ``config["loc_maps"]`` when None
+    """
+    if loc_maps is None:
+        loc_maps = load_locmaps(config["loc_maps"])
+    interpolation = config.get("localizer_config", {}).get("interpolation", "nearest")
+    return {key: BatchHashLocalizer(lat_map=item['lat_map'], lon_map=item['lon_map'], interpolation=interpolation) for key, item in loc_maps.items()}
+
+
+def create_fuser(config):
+    fusion_config = config["fusion_config"]
+    if fusion_config.get("gated", False):
+        return GatedHungarianFuser(coverage_zones=fusion_config["coverage_zones"], coverage_resolution=fusion_config.get("coverage_resolution", 0.1))
+    return HungarianFuser(coverage_zones=fusion_config["coverage_zones"])
+
+
+def create_tracker(config):
+    tracker_config = config["tracker_config"]
+    tracker_class = ArraySortTracker if tracker_config.get("track_store", "objects") == "arrays" else SortTracker
+    return tracker_class(use_filtered_position=tracker_config.get("use_filtered_position", False), output_predicted=tracker_config.get("output_predicted", False))
+
+
+def create_state_estimator(config):
+    state_estimator_config = config.get("state_estimator_config", {})
+    return RingBufferStateEstimator(mode=state_estimator_config.get("mode", "difference"), window=state_estimator_config.get("window", 5),
+                                    polyorder=state_estimator_config.get("polyorder", 2))
+
+
+def create_stages(detector, localizers, fuser, tracker, state_estimator, metrics=None):
+    """
+    Build the (name, function) stages of the perception pipeline, each function takes and returns the step context.
+    The step context holds the multi-camera buffer of ``ImageRetriever.get_image`` in ``context["data"]``.
+    :param metrics: ``PipelineMetrics`` for the per sensor timings, None to skip them
+    :return: list of (name, function) pairs for ``StagePipeline``
+    """
+    if metrics is None:
+        metrics = PipelineMetrics(enabled=False)
+
+    def detection_stage(context):
+        img_buff = context["data"]
+        ## all cameras go through a single forward pass
+        frames = {sensor_name: (item["image"], item["timestamp"]) for sensor_name, item in img_buff.items()}
+        context["detection_buffer"] = detector.detect_batch(frames, "fisheye")
+        return context
+
+    def localization_stage(context):
+        ## one lookup per sensor, objects that are not localized (outside the map, inf, -inf) are dropped with a single mask
+        for sensor_name, detection_result in context["detection_buffer"].items():
+            localizer = localizers[sensor_name]
+            with metrics.timer("Localization", sensor=sensor_name):
+                localizer.localize_and_filter(detection_result)
+        return context
+
+    def fusion_stage(context):
+        context["fusion_result"] = fuser.fuse(context["detection_buffer"])
+        return context
+
+    def tracking_stage(context):
+        context["tracking_result"] = tracker.track(context["fusion_result"])
+        return context
+
+    def state_estimation_stage(context):
+        context["result"] = state_estimator.estimate(context["tracking_result"])
+        return context
+
+    return [
+        ("Detection", detection_stage),
+        ("Localization", localization_stage),
+        ("Fusion", fusion_stage),
+        ("Tracking", tracking_stage),
+        ("State Estimation", state_estimation_stage),
+    ]
+
+
+def create_pipeline(config, stages):
+    pipeline_config = config.get("pipeline_config", {})
+    return StagePipeline(stages, queue_size=pipeline_config.get("queue_size", 2), drop_policy=pipeline_config.get("drop_policy", "lossless"))
+
+
+def iterate_images(img_retriever):
+    """Generator over the multi-camera buffers of an image retriever, the source of ``StagePipeline.run``."""
+    while True:
+        img_buff = img_retriever.get_image()
+        if img_buff is None:
+            return
+        yield img_buff
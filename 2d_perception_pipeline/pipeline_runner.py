@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+
+DROP_POLICIES = ("lossless", "latest")
+
+_END = object()
+
+
+class StageQueue:
+    """Bounded FIFO between two stages.
+    ``lossless`` blocks the producer when full, ``latest`` drops the oldest queued item instead so that
+    the consumer always gets the most recent frame.
+    """
+
+    def __init__(self, maxsize, drop_policy="lossless"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}, expected one of {DROP_POLICIES}")
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        if self.drop_policy == "lossless" or item is _END:
+            self.queue.put(item)
+            return
+        with self._lock:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        return self.queue.get(timeout=timeout)
+
+    def qsize(self):
+        return self.queue.qsize()
+
+
+class StagePipeline:
+    """Runs a chain of stages, each on its own worker thread, linked by bounded queues.
+    Every stage handles one step at a time in arrival order, so per-step ordering is kept and the
+    throughput is bounded by the slowest stage instead of the sum of all stages.
+
+    Each stage is a ``(name, function)`` pair. The function takes the step context (a dict) and returns
+    it, possibly with new entries; returning None drops the step. The time spent in every stage is
+    recorded in ``context["timings"][name]`` in seconds.
+    """
+
+    def __init__(self, stages, queue_size=2, drop_policy="lossless"):
+        """
+        :param stages: list of (name, function) pairs, run in order
+        :param queue_size: capacity of every inter-stage queue
+        :param drop_policy: "lossless" for replay, "latest" (latest-frame-wins) for live feeds
+        """
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.queues = []
+        self._error = None
+
+    @property
+    def dropped(self):
+        """Number of steps dropped by the latest-frame-wins policy, per stage input queue and at the output."""
+        names = [name for name, _ in self.stages] + ["output"]
+        return {name: q.dropped for name, q in zip(names, self.queues)}
+
+    def _feed(self, source, out_queue, stop_event):
+        try:
+            for step, data in enumerate(source):
+                if stop_event.is_set():
+                    break
+                out_queue.put({"step": step, "data": data, "timings": {}})
+        except Exception as e:
+            self._error = e
+        finally:
+            out_queue.put(_END)
+
+    def _work(self, name, function, in_queue, out_queue, stop_event):
+        while True:
+            try:
+                context = in_queue.get(timeout=0.1)
+            except queue.Empty:
+                if stop_event.is_set():
+                    return
+                continue
+            if context is _END:
+                out_queue.put(_END)
+                return
+            if stop_event.is_set():
+                continue
+            try:
+                t0 = time.perf_counter()
+                context = function(context)
+                if context is not None:
+                    context["timings"][name] = time.perf_counter() - t0
+                    out_queue.put(context)
+            except Exception as e:
+                self._error = e
+                stop_event.set()
+
+    def run(self, source):
+        """
+        Push every item of ``source`` through the stages.
+        :param source: iterable of step inputs, read on a separate thread; each becomes ``context["data"]``
+        :return: generator of the step contexts coming out of the last stage, in order
+        """
+        stop_event = threading.Event()
+        # the feeder drops frames into the first queue with the configured policy, later queues
+        # use the same policy so a slow stage always picks up the most recent step
+        self.queues = [StageQueue(self.queue_size, self.drop_policy) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._feed, args=(source, self.queues[0], stop_event), daemon=True)]
+        for i, (name, function) in enumerate(self.stages):
+            threads.append(threading.Thread(target=self._work, name=name, args=(name, function, self.queues[i], self.queues[i + 1], stop_event), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                try:
+                    context = self.queues[-1].get(timeout=0.1)
+                except queue.Empty:
+                    if stop_event.is_set():
+                        break
+                    continue
+                if context is _END:
+                    break
+                yield context
+        finally:
+            stop_event.set()
+            # keep draining the queues so that producers blocked on a full queue can see the stop event and exit
+            deadline = time.monotonic() + 5.0
+            while any(thread.is_alive() for thread in threads) and time.monotonic() < deadline:
+                for q in self.queues:
+                    while q.qsize():
+                        q.get()
+                for thread in threads:
+                    thread.join(timeout=0.05)
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,90 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+from msight_vision.utils import ImageRetriever
+from msight_vision.utils.data import get_time_from_name
+
+
+class PrefetchImageRetriever(ImageRetriever):
+    """Image retriever that decodes the next ``prefetch`` synchronized multi-camera buffers in a thread pool.
+    cv2 releases the GIL while decoding, so decoding overlaps with the inference of the current step.
+    ``get_image`` returns exactly what ``ImageRetriever.get_image`` returns, in the same order.
+    """
+
+    def __init__(self, img_dir: Path, sensor_list: list = None, time_tolerance: float = 0.2, prefetch: int = 4, num_workers: int = 4):
+        """
+        :param prefetch: number of multi-camera buffers decoded ahead of the current step
+        :param num_workers: number of decode threads
+        """
+        super().__init__(img_dir, sensor_list, time_tolerance)
+        self.prefetch = max(1, prefetch)
+        self.executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="image-decode")
+        self.pending = deque()
+        self.next_step = self.step
+        self.hits = 0
+        self.misses = 0
+
+    def _step_paths(self, step):
+        """Find the image path of every sensor for a step, without decoding anything."""
+        current_time = self.timestamps[self.main_sensor][step]
+        paths = {}
+        for sensor_name in self.sensor_list:
+            idx, closest_timestamp, best_diff = self._find_closest_timestamp(self.timestamps[sensor_name], current_time)
+            if best_diff > self.time_tolerance:
+                print(f"Warning: No close timestamp found for sensor {sensor_name} at time {current_time}. Closest time is {closest_timestamp} with difference {best_diff}.")
+            paths[sensor_name] = self.img_buff[sensor_name][idx]
+        return paths
+
+    def _fill(self):
+        while len(self.pending) < self.prefetch and self.next_step < self.length:
+            paths = self._step_paths(self.next_step)
+            futures = {sensor_name: self.executor.submit(cv2.imread, str(img_path)) for sensor_name, img_path in paths.items()}
+            self.pending.append((paths, futures))
+            self.next_step += 1
+
+    @property
+    def queue_depth(self):
+        """Number of buffers currently decoded or being decoded ahead."""
+        return len(self.pending)
+
+    @property
+    def stats(self):
+        """Read-ahead counters: a hit means the buffer was fully decoded when it was requested."""
+        return {"hits": self.hits, "misses": self.misses, "queue_depth": self.queue_depth, "prefetch": self.prefetch}
+
+    def get_image(self):
+        print(f"Retrieving images at step {self.step}/{self.length}")
+        self._fill()
+        if not self.pending:
+            return None
+        paths, futures = self.pending.popleft()
+        if all(future.done() for future in futures.values()):
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        result = {}
+        for sensor_name, img_path in paths.items():
+            img = futures[sensor_name].result()
+            if img is None:
+                print(f"Error: {img_path} is not a valid image file.")
+                return None
+            result[sensor_name] = {}
+            result[sensor_name]["image"] = img
+            result[sensor_name]["timestamp"] = get_time_from_name(img_path.name).timestamp()
+            result[sensor_name]["path"] = img_path
+            result[sensor_name]["frame_id"] = img_path.stem.split("#")[-1] if "#" in img_path.stem else None
+        self.step += 1
+        # keep the read-ahead queue full while the caller works on this step
+        self._fill()
+        return result
+
+    def close(self):
+        """Cancel the pending decodes and stop the decode threads."""
+        for _, futures in self.pending:
+            for future in futures.values():
+                future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=False)
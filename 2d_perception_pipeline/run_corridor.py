@@ -0,0 +1,52 @@
+import argparse
+import json
+from pathlib import Path
+
+import yaml
+
+from sharding import default_num_shards, model_key, run_sharded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the perception pipeline of several intersections, sharded across processes.")
+    parser.add_argument("-c", "--configs", nargs="+", required=True, help="One pipeline config file per intersection.")
+    parser.add_argument("--img-dirs", nargs="+", default=["./test-data"],
+                        help="Recorded data of each intersection, in the order of --configs, or a single directory for all of them.")
+    parser.add_argument("--workers", type=int, default=None, help="Intersection processes, default is one per core left by the inference workers.")
+    parser.add_argument("--max-batch", type=int, default=8, help="Most intersection steps batched into one forward pass.")
+    parser.add_argument("-o", "--output", default=None, help="Also write the per intersection report to this JSON file.")
+    args = parser.parse_args()
+
+    if len(args.img_dirs) not in (1, len(args.configs)):
+        parser.error("--img-dirs takes one directory, or one per config")
+    img_dirs = args.img_dirs * len(args.configs) if len(args.img_dirs) == 1 else args.img_dirs
+
+    intersections = []
+    names = set()
+    for i, (config_path, img_dir) in enumerate(zip(args.configs, img_dirs)):
+        with open(config_path, "r") as f:
+            config = yaml.safe_load(f)
+        # name after the config file, and its position when the same file is used twice
+        name = Path(config_path).stem
+        if name in names:
+            name = f"{name}#{i}"
+        names.add(name)
+        intersections.append((name, config, img_dir))
+
+    num_models = len({model_key(config) for _, config, _ in intersections})
+    num_shards = args.workers or default_num_shards(len(intersections), num_models)
+    print(f"[OK] {len(intersections)} intersections on {num_shards} processes, {num_models} inference workers")
+    reports, wall_time = run_sharded(intersections, num_shards, args.max_batch)
+
+    for name, report in reports.items():
+        stages = report["stages"]
+        print(f"  {name + ':':<24s}{report['frames']:5d} frames  {report['fps']:6.2f} fps  objects {report['mean_objects']:6.1f}  "
+              + "  ".join(f"{stage} p50 {stats['p50'] * 1000:.2f} ms" for stage, stats in stages.items()))
+    total_frames = sum(report["frames"] for report in reports.values())
+    print(f"  {'total:':<24s}{total_frames:5d} frames  {total_frames / wall_time:6.2f} fps in {wall_time:.1f} s")
+    if args.output:
+        Path(args.output).write_text(json.dumps({"wall_time": wall_time, "intersections": reports}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
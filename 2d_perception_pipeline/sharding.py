@@ -0,0 +1,332 @@
+import os
+import queue
+import time
+import traceback
+from multiprocessing import get_context, shared_memory
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from locmap import LOCMAP_SUFFIX, read_locmap
+from metrics import PipelineMetrics
+from pipeline_builder import create_retriever, create_detector, create_localizers, create_fuser, create_tracker, create_state_estimator
+
+# blocks attached by this process, kept open for as long as the arrays built on them are in use
+_attached_blocks = {}
+# block of every image slot read by this process, {(shard_id, intersection name): block name}
+_slot_blocks = {}
+
+
+def _attach_block(name):
+    block = _attached_blocks.get(name)
+    if block is None:
+        block = _attached_blocks[name] = shared_memory.SharedMemory(name=name)
+    return block
+
+
+def _detach_block(name):
+    block = _attached_blocks.pop(name, None)
+    if block is not None:
+        block.close()
+
+
+def model_key(config):
+    """Intersections whose configs share these model settings share one inference worker."""
+    model_config = config["model_config"]
+    return (str(Path(model_config["ckpt_path"]).resolve()), model_config["confthre"], model_config["nmsthre"],
+            model_config["class_agnostic_nms"], model_config.get("end2end", False))
+
+
+class SharedLocmaps:
+    """
+    Read-only localization maps shared by every process of the box.
+    ``.npz`` maps are decompressed once by the parent into shared memory blocks, ``.locmap`` files are memory-mapped by
+    every process, which already shares them through the page cache. ``spec`` is small and picklable, the children
+    rebuild the maps from it with ``attach``.
+    """
+
+    def __init__(self):
+        self.spec = {}
+        self._blocks = []
+
+    def add(self, path):
+        path = str(path)
+        if path in self.spec:
+            return
+        if Path(path).suffix == LOCMAP_SUFFIX:
+            self.spec[path] = None
+            return
+        maps = np.load(path)
+        lat_map, lon_map = maps["lat_map"], maps["lon_map"]
+        block = shared_memory.SharedMemory(create=True, size=lat_map.nbytes + lon_map.nbytes)
+        entries = {}
+        offset = 0
+        for name, values in (("lat_map", lat_map), ("lon_map", lon_map)):
+            np.ndarray(values.shape, values.dtype, buffer=block.buf, offset=offset)[...] = values
+            entries[name] = (offset, values.shape, values.dtype.str)
+            offset += values.nbytes
+        self.spec[path] = (block.name, entries)
+        self._blocks.append(block)
+
+    @staticmethod
+    def attach(spec, loc_maps_path):
+        """
+        Same as ``load_locmaps`` for the ``loc_maps`` entry of a config, with the ``.npz`` maps backed by the shared blocks.
+        :param spec: ``SharedLocmaps.spec`` of the parent
+        :param loc_maps_path: {sensor_name: path}
+        """
+        result = {}
+        for sensor_name, path in loc_maps_path.items():
+            entry = spec[str(path)]
+            if entry is None:
+                result[sensor_name] = read_locmap(path)
+                continue
+            block = _attach_block(entry[0])
+            maps = {}
+            for name, (offset, shape, dtype) in entry[1].items():
+                maps[name] = np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+                maps[name].flags.writeable = False
+            result[sensor_name] = maps
+        return result
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+class ImageSlot:
+    """Shared memory block holding the images of one intersection step, written by its shard and read by the inference worker."""
+
+    def __init__(self):
+        self.block = None
+
+    def write(self, img_buff):
+        """
+        Copy the images of a multi-camera buffer into the block, growing it when needed.
+        :return: (block name, [(sensor_name, offset, shape, dtype, timestamp)]), the request payload of ``read_frames``
+        """
+        size = sum(item["image"].nbytes for item in img_buff.values())
+        if self.block is None or self.block.size < size:
+            self.close()
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+        layout = []
+        offset = 0
+        for sensor_name, item in img_buff.items():
+            image = item["image"]
+            np.ndarray(image.shape, image.dtype, buffer=self.block.buf, offset=offset)[...] = image
+            layout.append((sensor_name, offset, image.shape, image.dtype.str, item["timestamp"]))
+            offset += image.nbytes
+        return self.block.name, layout
+
+    def close(self):
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+
+def read_frames(block_name, layout, slot=None):
+    """
+    ``detect_batch`` frames viewing the images written by ``ImageSlot.write``, without copying them.
+    :param slot: key of the ``ImageSlot``. When the slot has grown into a new block, the previous one, which its shard
+        already unlinked, is detached so that its memory is freed.
+    """
+    if slot is not None:
+        previous = _slot_blocks.get(slot)
+        if previous is not None and previous != block_name:
+            _detach_block(previous)
+        _slot_blocks[slot] = block_name
+    block = _attach_block(block_name)
+    return {sensor_name: (np.ndarray(shape, dtype, buffer=block.buf, offset=offset), timestamp)
+            for sensor_name, offset, shape, dtype, timestamp in layout}
+
+
+def inference_worker(config, requests, responses, max_batch):
+    """
+    Runs the detector of one model for every intersection using it. Requests waiting in the queue are batched together,
+    so the cameras of several intersections go through a single forward pass.
+    :param requests: queue of (shard_id, intersection name, block name, layout), None to stop
+    :param responses: one queue per shard, receiving (intersection name, detection buffer or error string, seconds)
+    """
+    detector = create_detector(config, "cuda" if torch.cuda.is_available() else "cpu")
+    running = True
+    while running:
+        batch = [requests.get()]
+        while batch[-1] is not None and len(batch) < max_batch:
+            try:
+                batch.append(requests.get_nowait())
+            except queue.Empty:
+                break
+        if batch[-1] is None:
+            running = False
+            batch.pop()
+        if not batch:
+            continue
+        try:
+            t0 = time.perf_counter()
+            # drops the views of the previous batch, a block of a grown slot can only be detached without them
+            frames = {}
+            for i, (shard_id, name, block_name, layout) in enumerate(batch):
+                views = read_frames(block_name, layout, slot=(shard_id, name))
+                frames.update((f"{i}/{sensor_name}", frame) for sensor_name, frame in views.items())
+                del views
+            detections = detector.detect_batch(frames, "fisheye")
+            elapsed = time.perf_counter() - t0
+            for i, (shard_id, name, _, layout) in enumerate(batch):
+                detection_buffer = {sensor_name: detections[f"{i}/{sensor_name}"] for sensor_name, *_ in layout}
+                responses[shard_id].put((name, detection_buffer, elapsed))
+        except Exception:
+            error = traceback.format_exc()
+            for shard_id, name, _, _ in batch:
+                responses[shard_id].put((name, error, 0.0))
+
+
+class Intersection:
+    """Per intersection state of a shard: its own retriever, localizers, fuser, tracker and state estimator."""
+
+    def __init__(self, name, config, img_dir, locmap_spec):
+        self.name = name
+        self.model = model_key(config)
+        self.retriever = create_retriever(config, Path(img_dir))
+        self.localizers = create_localizers(config, SharedLocmaps.attach(locmap_spec, config["loc_maps"]))
+        self.fuser = create_fuser(config)
+        self.tracker = create_tracker(config)
+        self.state_estimator = create_state_estimator(config)
+        self.slot = ImageSlot()
+        self.metrics = PipelineMetrics()
+        self.frames = 0
+        self.objects = 0
+        self.t_start = time.perf_counter()
+        self.seconds = 0.0
+
+    def process(self, detection_buffer):
+        """Localization, fusion, tracking and state estimation of one step."""
+        with self.metrics.timer("Localization"):
+            for sensor_name, detection_result in detection_buffer.items():
+                self.localizers[sensor_name].localize_and_filter(detection_result)
+        with self.metrics.timer("Fusion"):
+            fusion_result = self.fuser.fuse(detection_buffer)
+        with self.metrics.timer("Tracking"):
+            tracking_result = self.tracker.track(fusion_result)
+        with self.metrics.timer("State Estimation"):
+            result = self.state_estimator.estimate(tracking_result)
+        self.frames += 1
+        self.objects += len(result)
+        return result
+
+    def report(self):
+        return {"frames": self.frames, "seconds": self.seconds, "fps": self.frames / self.seconds if self.seconds > 0 else 0.0,
+                "mean_objects": self.objects / self.frames if self.frames else 0.0, "stages": self.metrics.summary()["stages"]}
+
+    def close(self):
+        self.slot.close()
+        if hasattr(self.retriever, "close"):
+            self.retriever.close()
+
+
+def shard_worker(shard_id, intersections, locmap_spec, requests, responses, results):
+    """
+    Runs a share of the intersections in one process. Every step sends the images of all its intersections to their
+    inference workers first, then runs the rest of the pipeline of each one as its detections come back.
+    :param intersections: list of (name, config, img_dir)
+    :param requests: {model key: request queue of its inference worker}
+    :param responses: response queue of this shard
+    :param results: receives (shard_id, {name: report}) at the end, or (shard_id, error string)
+    """
+    states = []
+    try:
+        states = [Intersection(name, config, img_dir, locmap_spec) for name, config, img_dir in intersections]
+        active = list(states)
+        while active:
+            waiting = {}
+            for state in list(active):
+                img_buff = state.retriever.get_image()
+                if img_buff is None:
+                    state.seconds = time.perf_counter() - state.t_start
+                    active.remove(state)
+                    continue
+                block_name, layout = state.slot.write(img_buff)
+                requests[state.model].put((shard_id, state.name, block_name, layout))
+                waiting[state.name] = state
+            while waiting:
+                name, detection_buffer, elapsed = responses.get()
+                if isinstance(detection_buffer, str):
+                    raise RuntimeError(f"Inference failed for {name}:\n{detection_buffer}")
+                state = waiting.pop(name)
+                state.metrics.observe("Detection", elapsed)
+                state.process(detection_buffer)
+        results.put((shard_id, {state.name: state.report() for state in states}))
+    except Exception:
+        results.put((shard_id, traceback.format_exc()))
+    finally:
+        for state in states:
+            state.close()
+
+
+def default_num_shards(num_intersections, num_models):
+    """One process per core left by the inference workers, no more than the intersections."""
+    return max(1, min(num_intersections, (os.cpu_count() or 1) - num_models))
+
+
+def run_sharded(intersections, num_shards=None, max_batch=8):
+    """
+    Run several intersections, sharded across processes.
+    :param intersections: list of (name, config, img_dir), names must be unique
+    :param num_shards: number of intersection processes, ``default_num_shards`` when None
+    :param max_batch: most intersection steps batched into one forward pass
+    :return: ({name: report}, wall time in seconds)
+    """
+    models = {}
+    locmaps = SharedLocmaps()
+    for _, config, _ in intersections:
+        models.setdefault(model_key(config), config)
+        for path in config["loc_maps"].values():
+            locmaps.add(path)
+    if num_shards is None:
+        num_shards = default_num_shards(len(intersections), len(models))
+
+    # spawn, the detector must not inherit a forked torch/CUDA state
+    context = get_context("spawn")
+    requests = {key: context.Queue() for key in models}
+    responses = [context.Queue() for _ in range(num_shards)]
+    results = context.Queue()
+    inference_processes = [context.Process(target=inference_worker, args=(config, requests[key], responses, max_batch), name="inference", daemon=True)
+                           for key, config in models.items()]
+    shard_processes = [context.Process(target=shard_worker, args=(i, intersections[i::num_shards], locmaps.spec, requests, responses[i], results), name=f"shard-{i}", daemon=True)
+                       for i in range(num_shards)]
+
+    t0 = time.perf_counter()
+    reports = {}
+    errors = []
+    try:
+        for process in inference_processes + shard_processes:
+            process.start()
+        pending = num_shards
+        while pending and not errors:
+            try:
+                shard_id, report = results.get(timeout=1.0)
+            except queue.Empty:
+                # a worker killed without a report (e.g. out of memory) would leave the others waiting forever
+                crashed = [process.name for process in inference_processes + shard_processes if process.exitcode not in (None, 0)]
+                if crashed:
+                    errors.append(f"{', '.join(crashed)} exited unexpectedly")
+                continue
+            if isinstance(report, str):
+                errors.append(f"shard {shard_id}:\n{report}")
+            reports.update(report if isinstance(report, dict) else {})
+            pending -= 1
+        wall_time = time.perf_counter() - t0
+    finally:
+        for request_queue in requests.values():
+            request_queue.put(None)
+        for process in inference_processes + shard_processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        locmaps.close()
+    if errors:
+        raise RuntimeError("\n".join(errors))
+    return reports, wall_time
@@ -0,0 +1,191 @@
+from typing import List
+
+import numpy as np
+from msight_base import RoadUserPoint
+from msight_vision.state_estimator import StateEstimatorBase
+from scipy.signal import savgol_coeffs
+
+ESTIMATION_MODES = ("difference", "savgol")
+
+# WGS84 ellipsoid, the local radii of curvature match geodesic distances at the few meters between two samples
+WGS84_A = 6378137.0
+WGS84_E2 = 6.69437999014e-3
+
+
+def meridian_radius(lat):
+    """Meridional radius of curvature in meters at latitude ``lat`` (degrees)."""
+    s = np.sin(np.radians(lat))
+    return WGS84_A * (1 - WGS84_E2) / (1 - WGS84_E2 * s * s) ** 1.5
+
+
+def prime_vertical_radius(lat):
+    """Prime vertical radius of curvature in meters at latitude ``lat`` (degrees)."""
+    s = np.sin(np.radians(lat))
+    return WGS84_A / np.sqrt(1 - WGS84_E2 * s * s)
+
+
+def latlon_difference(lat1, lon1, lat2, lon2):
+    """
+    Signed north (dx) and east (dy) distances in meters from (lat2, lon2) to (lat1, lon1), same convention as
+    ``FiniteDifferenceStateEstimator.calc_xy_difference`` with the "latlon" scale.
+    """
+    dx = meridian_radius((lat1 + lat2) / 2) * np.radians(lat1 - lat2)
+    dy = prime_vertical_radius(lat1) * np.cos(np.radians(lat1)) * np.radians(lon1 - lon2)
+    return dx, dy
+
+
+class RingBufferStateEstimator(StateEstimatorBase):
+    """
+    Drop-in replacement for ``FiniteDifferenceStateEstimator`` that keeps a fixed-size ring buffer of the last
+    positions of every track ID in NumPy arrays instead of a ``TrajectoryManager`` with full trajectories,
+    so the cost per step and the memory do not grow with the trajectory length.
+    All tracks of a step are estimated in one vectorized pass, and tracks not seen for ``max_frames`` steps are evicted.
+
+    With ``mode="difference"`` speed and heading are the same as ``FiniteDifferenceStateEstimator``. With
+    ``mode="savgol"`` the velocity is the derivative of a Savitzky–Golay fit over the last ``window`` positions,
+    a fixed dot product with precomputed coefficients; ``polyorder=1`` is the windowed least-squares line fit.
+    Tracks without ``window`` consecutive positions fall back to the finite difference.
+    """
+
+    def __init__(self, frame_rate=5, frame_interval=1, dist_threshold=2, max_frames=100, mode="difference", window=5, polyorder=2):
+        """
+        :param frame_rate: Frame rate of the video stream.
+        :param frame_interval: Interval the two object to calculate the difference, the two neighbor objects has interval 0.
+        :param dist_threshold: Displacement in meters above which the heading of the anchor point is kept.
+        :param max_frames: Number of steps a track is kept without being seen, same as the trajectory manager history.
+        :param mode: "difference" (same as FiniteDifferenceStateEstimator) or "savgol"
+        :param window: number of positions of the Savitzky–Golay fit
+        :param polyorder: polynomial order of the Savitzky–Golay fit, 1 is a least-squares line
+        """
+        if mode not in ESTIMATION_MODES:
+            raise ValueError(f"Unknown mode: {mode}, expected one of {ESTIMATION_MODES}")
+        self.frame_rate = frame_rate
+        self.frame_interval = frame_interval
+        self.dist_threshold = dist_threshold
+        self.max_frames = max_frames
+        self.mode = mode
+        self.window = window
+        history = frame_interval + 1
+        if mode == "savgol":
+            # derivative at the last sample of the window, in units per step
+            self.savgol_weights = savgol_coeffs(window, polyorder, deriv=1, pos=window - 1, use='dot')
+            history = max(history, window)
+        self.history = history
+
+        self.step = -1
+        self.track_rows = {}
+        self.free_rows = []
+        self._allocate(64)
+
+    def _allocate(self, capacity):
+        """Create or grow the ring buffers to ``capacity`` tracks."""
+        old = getattr(self, "coords", None)
+        size = 0 if old is None else len(old)
+        coords = np.zeros((capacity, self.history, 2))
+        steps = np.full((capacity, self.history), -1, dtype=np.int64)
+        headings = np.full((capacity, self.history), np.nan)
+        count = np.zeros(capacity, dtype=np.int64)
+        head = np.zeros(capacity, dtype=np.int64)
+        last_step = np.full(capacity, -1, dtype=np.int64)
+        row_ids = np.full(capacity, None, dtype=object)
+        if old is not None:
+            coords[:size], steps[:size], headings[:size] = self.coords, self.steps, self.headings
+            count[:size], head[:size], last_step[:size], row_ids[:size] = self.count, self.head, self.last_step, self.row_ids
+        self.coords, self.steps, self.headings = coords, steps, headings
+        self.count, self.head, self.last_step, self.row_ids = count, head, last_step, row_ids
+        self.free_rows.extend(range(capacity - 1, size - 1, -1))
+
+    def _rows(self, traj_ids):
+        rows = []
+        for traj_id in traj_ids:
+            row = self.track_rows.get(traj_id)
+            if row is None:
+                if not self.free_rows:
+                    self._allocate(2 * len(self.count))
+                row = self.free_rows.pop()
+                self.track_rows[traj_id] = row
+                self.row_ids[row] = traj_id
+                self.count[row] = 0
+                self.head[row] = 0
+            rows.append(row)
+        return np.array(rows, dtype=np.int64)
+
+    def _evict(self):
+        """Drop the tracks whose last position fell out of the last ``max_frames`` steps."""
+        stale = np.flatnonzero((self.last_step >= 0) & (self.last_step <= self.step - self.max_frames))
+        for row in stale.tolist():
+            del self.track_rows[self.row_ids[row]]
+            self.row_ids[row] = None
+            self.free_rows.append(row)
+        self.last_step[stale] = -1
+
+    def _difference(self, coords, anchor_coords, scale):
+        if scale == "latlon":
+            return latlon_difference(coords[..., 0], coords[..., 1], anchor_coords[..., 0], anchor_coords[..., 1])
+        elif scale in ["utm", "meters"]:
+            return coords[..., 0] - anchor_coords[..., 0], coords[..., 1] - anchor_coords[..., 1]
+        raise ValueError("Invalid scale. Use 'latlon', 'utm' or 'meters'.")
+
+    def estimate(self, road_user_point_list: List[RoadUserPoint], scale="latlon") -> List[RoadUserPoint]:
+        """
+        Estimate the state of road users based on the provided list of RoadUserPoint instances.
+        :param road_user_point_list: List of RoadUserPoint instances to estimate the state from.
+        :param scale: Scale of the coordinates, either "latlon", "utm" or "meters". ("meters" and "utm" are equivalent)
+        :return: Estimated state of road users.
+        """
+        if not road_user_point_list:
+            # like the trajectory manager, an empty list does not start a new step
+            return road_user_point_list
+        traj_ids = [obj.traj_id for obj in road_user_point_list]
+        if any(traj_id is None for traj_id in traj_ids):
+            raise ValueError("Object must have a traj_id to be added to a trajectory manager")
+        if len(set(traj_ids)) != len(traj_ids):
+            raise ValueError("Objects with the same traj_id in one frame")
+
+        self.step += 1
+        rows = self._rows(traj_ids)
+        slot = self.head[rows]
+        self.coords[rows, slot] = [(obj.x, obj.y) for obj in road_user_point_list]
+        self.steps[rows, slot] = self.step
+        self.headings[rows, slot] = np.nan
+        self.head[rows] = (slot + 1) % self.history
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.history)
+        self.last_step[rows] = self.step
+        self._evict()
+
+        # samples of every track from the newest (k = 0) to the oldest, limited to the last max_frames steps
+        ks = np.arange(self.history)
+        idx = (slot[:, None] - ks[None, :]) % self.history
+        sample_steps = self.steps[rows[:, None], idx]
+        valid = (ks[None, :] < self.count[rows][:, None]) & (sample_steps > self.step - self.max_frames)
+        n_valid = valid.sum(axis=1)
+        # anchor is frame_interval samples back, or the oldest sample of a short trajectory
+        anchor_k = np.minimum(n_valid - 1, self.frame_interval)
+        anchor_idx = idx[np.arange(len(rows)), anchor_k]
+
+        coords = self.coords[rows, slot]
+        dx, dy = self._difference(coords, self.coords[rows, anchor_idx], scale)
+        temporal_distance = np.hypot(dx, dy)
+        time_difference = (self.step - self.steps[rows, anchor_idx]) / self.frame_rate
+        fallback = temporal_distance > self.dist_threshold
+        heading = np.where(fallback, self.headings[rows, anchor_idx], np.degrees(np.arctan2(dy, dx)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speed = np.where(time_difference > 0, temporal_distance / time_difference, 0.0)
+
+        if self.mode == "savgol":
+            # tracks with a full window of consecutive steps, the weights assume evenly spaced samples
+            smooth = (n_valid >= self.window) & (sample_steps[:, self.window - 1] == self.step - self.window + 1)
+            if smooth.any():
+                window_idx = idx[smooth, :self.window][:, ::-1]
+                window_coords = self.coords[rows[smooth][:, None], window_idx]
+                north, east = self._difference(window_coords, coords[smooth][:, None, :], scale)
+                v_north = north @ self.savgol_weights * self.frame_rate
+                v_east = east @ self.savgol_weights * self.frame_rate
+                speed[smooth] = np.hypot(v_north, v_east)
+                heading[smooth] = np.where(fallback[smooth], heading[smooth], np.degrees(np.arctan2(v_east, v_north)))
+
+        self.headings[rows, slot] = heading
+        for obj, obj_heading, obj_speed in zip(road_user_point_list, heading.tolist(), speed.tolist()):
+            obj.heading = None if np.isnan(obj_heading) else obj_heading
+            obj.speed = obj_speed
+        return road_user_point_list
@@ -0,0 +1,231 @@
+import cv2
+import numpy as np
+from msight_vision.base import DetectedObject2D, DetectionResult2D
+from scipy.spatial import cKDTree
+
+from fusion import EARTH_RADIUS
+
+
+class LocalFrame:
+    """Equirectangular projection of lat/lon (degrees) to meters (east, north) around an origin, same as ``GatedHungarianFuser``."""
+
+    def __init__(self, lat0, lon0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.cos_lat0 = np.cos(np.radians(lat0))
+
+    def to_local(self, lat, lon):
+        x = np.radians(np.asarray(lon, dtype=np.float64) - self.lon0) * EARTH_RADIUS * self.cos_lat0
+        y = np.radians(np.asarray(lat, dtype=np.float64) - self.lat0) * EARTH_RADIUS
+        return x, y
+
+    def to_latlon(self, x, y):
+        lat = self.lat0 + np.degrees(np.asarray(y, dtype=np.float64) / EARTH_RADIUS)
+        lon = self.lon0 + np.degrees(np.asarray(x, dtype=np.float64) / (EARTH_RADIUS * self.cos_lat0))
+        return lat, lon
+
+
+class InverseLocmap:
+    """
+    World to pixel lookup of a localization map: a KD-tree over the local positions of all cells with a finite location.
+    ``project`` returns the pixel whose location is closest to each position, so ``HashLocalizer`` maps it back to
+    within one cell of the position.
+    """
+
+    def __init__(self, lat_map, lon_map, frame, max_error=1.0):
+        """
+        :param frame: ``LocalFrame`` of the positions
+        :param max_error: positions farther than this from every cell location, in meters, are not visible
+        """
+        lat_map = np.asarray(lat_map)
+        lon_map = np.asarray(lon_map)
+        rows, cols = np.nonzero(np.isfinite(lat_map) & np.isfinite(lon_map))
+        x, y = frame.to_local(lat_map[rows, cols], lon_map[rows, cols])
+        self.pixels = np.stack([cols, rows], axis=-1).astype(np.float64)
+        self.tree = cKDTree(np.stack([x, y], axis=-1))
+        self.max_error = max_error
+        self.shape = lat_map.shape[:2]
+
+    def project(self, xy):
+        """
+        :param xy: (N, 2) local positions in meters
+        :return: (N, 2) pixel (x, y) coordinates at the cell centers and the (N,) visibility mask
+        """
+        distance, index = self.tree.query(xy, distance_upper_bound=self.max_error)
+        visible = np.isfinite(distance)
+        pixels = np.zeros((len(xy), 2))
+        pixels[visible] = self.pixels[index[visible]] + 0.5
+        return pixels, visible
+
+    def random_pixels(self, count, rng):
+        """Pixels of ``count`` random cells with a finite location, for false positives."""
+        return self.pixels[rng.integers(0, len(self.pixels), count)] + rng.random((count, 2))
+
+
+class SyntheticScenario:
+    """
+    Synthetic traffic through the coverage zones and the detections every camera would report for it, in the
+    ``detect``/``detect_batch`` format: ``{sensor_name: DetectionResult2D}`` with boxes and bottom centers in pixels.
+    - Vehicles drive at a constant speed along straight lanes drawn through the coverage zones, each lane keeps its
+      vehicles evenly spaced, and a vehicle leaving the area re-enters at the other end of its lane.
+    - A share ``overlap`` of the lanes runs along the region covered by several cameras, so their vehicles are seen
+      by more than one camera and go through cross-camera fusion.
+    - Every camera sees the vehicles inside its localization map. Each detection is missed with probability
+      ``miss_rate``, gets ``pixel_noise`` pixels of noise on its bottom center, and every camera adds
+      ``false_positives`` false detections per frame on average.
+    The detections go through ``BatchHashLocalizer`` like the detector outputs, so the whole post-detection
+    pipeline can be profiled without images or a GPU.
+    """
+
+    def __init__(self, loc_maps, coverage_zones, num_objects=100, overlap=0.3, miss_rate=0.05, pixel_noise=1.0, false_positives=0.0,
+                 speed=(5.0, 15.0), lane_spacing=10.0, frame_rate=10.0, box_size=(60.0, 40.0), class_id=2, max_error=1.0, seed=0):
+        """
+        :param loc_maps: ``load_locmaps`` result, {sensor_name: {"lat_map", "lon_map"}}
+        :param coverage_zones: {sensor_name: [[lat, lon], ...]} from ``fusion_config``
+        :param num_objects: number of vehicles
+        :param overlap: share of the lanes running through the region shared by several coverage zones
+        :param miss_rate: probability that a camera misses a visible vehicle in a frame
+        :param pixel_noise: standard deviation of the bottom center noise, in pixels
+        :param false_positives: mean number of false detections per camera and frame
+        :param speed: (min, max) lane speed in meters per second
+        :param lane_spacing: mean distance between two vehicles of a lane, in meters
+        :param frame_rate: frames per second, sets the step duration and the timestamps
+        :param box_size: mean (width, height) of the boxes, in pixels
+        :param class_id: class ID of the detections
+        :param max_error: distance in meters from the closest cell location above which a camera does not see a position
+        """
+        self.rng = np.random.default_rng(seed)
+        self.miss_rate = miss_rate
+        self.pixel_noise = pixel_noise
+        self.false_positives = false_positives
+        self.frame_rate = frame_rate
+        self.class_id = class_id
+        self.sensor_list = list(loc_maps.keys())
+
+        vertices = np.array([vertex for polygon in coverage_zones.values() for vertex in polygon], dtype=np.float64)
+        self.frame = LocalFrame(*vertices.mean(axis=0))
+        self.cameras = {sensor_name: InverseLocmap(item["lat_map"], item["lon_map"], self.frame, max_error) for sensor_name, item in loc_maps.items()}
+        self.coverage, self.shared = self._rasterize_zones(coverage_zones)
+
+        num_lanes = max(1, int(np.ceil(num_objects * lane_spacing / (2 * self.half_length))))
+        self.lane_origin, self.lane_direction = self._make_lanes(num_lanes, overlap)
+        lane_speed = self.rng.uniform(speed[0], speed[1], num_lanes)
+
+        # spread the vehicles over the lanes, evenly spaced with some jitter so that lanes do not line up
+        self.lane = np.arange(num_objects) % num_lanes
+        slot = np.arange(num_objects) // num_lanes
+        per_lane = np.bincount(self.lane, minlength=num_lanes)
+        spacing = 2 * self.half_length / np.maximum(per_lane[self.lane], 1)
+        self.s = -self.half_length + (slot + self.rng.uniform(0.0, 0.5, num_objects)) * spacing
+        self.speed = lane_speed[self.lane]
+        self.box_scale = self.rng.uniform(0.7, 1.3, num_objects)
+        self.box_size = np.asarray(box_size, dtype=np.float64)
+        self.ids = np.array([f"vehicle_{i}" for i in range(num_objects)], dtype=object)
+        self.step_count = 0
+
+    def _rasterize_zones(self, coverage_zones, resolution=0.5):
+        """Coverage count of every 0.5 m cell around the zones, and the local positions of the cells covered more than once."""
+        polygons = {sensor_name: np.stack(self.frame.to_local(*np.asarray(polygon, dtype=np.float64).T), axis=-1)
+                    for sensor_name, polygon in coverage_zones.items() if polygon}
+        points = np.concatenate(list(polygons.values()))
+        self.xy_min = points.min(axis=0)
+        xy_max = points.max(axis=0)
+        self.half_length = np.linalg.norm(xy_max - self.xy_min) / 2
+        shape = tuple(np.ceil((xy_max - self.xy_min)[::-1] / resolution).astype(int) + 1)
+        coverage = np.zeros(shape, dtype=np.uint8)
+        for polygon in polygons.values():
+            mask = np.zeros(shape, dtype=np.uint8)
+            cv2.fillPoly(mask, [np.round((polygon - self.xy_min) / resolution).astype(np.int32)], 1)
+            coverage += mask
+        self.coverage_count = coverage
+        self.coverage_resolution = resolution
+        rows, cols = np.nonzero(coverage > 0)
+        covered = np.stack([cols, rows], axis=-1) * resolution + self.xy_min
+        rows, cols = np.nonzero(coverage > 1)
+        shared = np.stack([cols, rows], axis=-1) * resolution + self.xy_min
+        return covered, shared
+
+    def zone_count(self, xy):
+        """Number of coverage zones containing each of the (N, 2) local positions."""
+        cells = np.round((xy - self.xy_min) / self.coverage_resolution).astype(np.intp)
+        inside = (cells >= 0).all(axis=1) & (cells[:, 0] < self.coverage_count.shape[1]) & (cells[:, 1] < self.coverage_count.shape[0])
+        result = np.zeros(len(xy), dtype=np.int64)
+        result[inside] = self.coverage_count[cells[inside, 1], cells[inside, 0]]
+        return result
+
+    def _make_lanes(self, num_lanes, overlap):
+        """
+        Lanes through random covered points with random headings, and a share ``overlap`` of them through shared points
+        along the main axis of the shared region.
+        """
+        origin = self.coverage[self.rng.integers(0, len(self.coverage), num_lanes)]
+        heading = self.rng.uniform(0, 2 * np.pi, num_lanes)
+        num_shared = int(round(num_lanes * overlap)) if len(self.shared) > 1 else 0
+        if num_shared:
+            # principal axis of the shared cells, traveled in both directions
+            centered = self.shared - self.shared.mean(axis=0)
+            axis = np.linalg.svd(centered, full_matrices=False)[2][0]
+            origin[:num_shared] = self.shared[self.rng.integers(0, len(self.shared), num_shared)]
+            heading[:num_shared] = np.arctan2(axis[1], axis[0]) + np.pi * self.rng.integers(0, 2, num_shared)
+        return origin, np.stack([np.cos(heading), np.sin(heading)], axis=-1)
+
+    @property
+    def positions(self):
+        """(N, 2) local positions of all vehicles in meters."""
+        return self.lane_origin[self.lane] + self.s[:, None] * self.lane_direction[self.lane]
+
+    def ground_truth(self):
+        """
+        :return: (ids, lat, lon, zones) of all vehicles at the current step, ``zones`` is the number of coverage zones
+            containing each vehicle, vehicles in none of them are dropped by the fuser
+        """
+        positions = self.positions
+        lat, lon = self.frame.to_latlon(*positions.T)
+        return self.ids, lat, lon, self.zone_count(positions)
+
+    def advance(self):
+        """Move every vehicle by one step, wrapping around at the end of its lane."""
+        self.s += self.speed / self.frame_rate
+        self.s = (self.s + self.half_length) % (2 * self.half_length) - self.half_length
+        self.step_count += 1
+
+    def detect(self, sensor_name, timestamp, sensor_type="fisheye"):
+        """Detections of one camera at the current step, in random order, like ``detector.detect``."""
+        pixels, visible = self.cameras[sensor_name].project(self.positions)
+        seen = np.nonzero(visible & (self.rng.random(len(visible)) >= self.miss_rate))[0]
+        bottom = pixels[seen] + self.rng.normal(0.0, self.pixel_noise, (len(seen), 2))
+        size = self.box_size * self.box_scale[seen, None]
+        num_false = self.rng.poisson(self.false_positives) if self.false_positives > 0 else 0
+        if num_false:
+            bottom = np.concatenate([bottom, self.cameras[sensor_name].random_pixels(num_false, self.rng)])
+            size = np.concatenate([size, self.box_size * self.rng.uniform(0.7, 1.3, (num_false, 1))])
+        height, width = self.cameras[sensor_name].shape
+        bottom = np.clip(bottom, 0, [width - 1e-3, height - 1e-3])
+        boxes = np.concatenate([bottom - size * [0.5, 1.0], bottom + size * [0.5, 0.0]], axis=1)
+        scores = self.rng.uniform(0.5, 0.95, len(bottom))
+        object_list = [DetectedObject2D(box=boxes[i].tolist(), class_id=self.class_id, score=float(scores[i]), pixel_bottom_center=bottom[i].tolist())
+                       for i in self.rng.permutation(len(bottom))]
+        return DetectionResult2D(object_list, timestamp, sensor_type)
+
+    def step(self, timestamp=None, sensor_type="fisheye"):
+        """
+        Detections of every camera at the current step, then advance the vehicles.
+        :param timestamp: timestamp of the detections, defaults to the step count over the frame rate
+        :return: {sensor_name: DetectionResult2D}
+        """
+        if timestamp is None:
+            timestamp = self.step_count / self.frame_rate
+        detection_buffer = {sensor_name: self.detect(sensor_name, timestamp, sensor_type) for sensor_name in self.sensor_list}
+        self.advance()
+        return detection_buffer
+
+
+class SyntheticDetector:
+    """Stand-in for ``BatchYolo26Detector`` that ignores the images and returns the detections of a ``SyntheticScenario``."""
+
+    def __init__(self, scenario):
+        self.scenario = scenario
+
+    def detect_batch(self, frames, sensor_type):
+        timestamp = next(iter(frames.values()))[1] if frames else None
+        return self.scenario.step(timestamp, sensor_type)
@@ -0,0 +1,303 @@
+import uuid
+
+import numpy as np
+from msight_base import RoadUserPoint
+from msight_vision import SortTracker
+from msight_vision.tracker import KalmanBoxTracker, coord_normalization, coord_unnormalization
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+DETECTION_BOX_RADIUS = 4.0  # half size of the square detection boxes, in meters, same as vlist2bbox
+TRACK_BOX_RADIUS = 2.0  # half size of the square track boxes, in meters, same as convert_x_to_bbox
+
+
+def pair_iou(boxes_a, boxes_b):
+    """IoU of the boxes ``boxes_a[i]`` and ``boxes_b[i]``, both (N, 4) in the form [x1, y1, x2, y2]."""
+    w = np.maximum(0., np.minimum(boxes_a[:, 2], boxes_b[:, 2]) - np.maximum(boxes_a[:, 0], boxes_b[:, 0]))
+    h = np.maximum(0., np.minimum(boxes_a[:, 3], boxes_b[:, 3]) - np.maximum(boxes_a[:, 1], boxes_b[:, 1]))
+    wh = w * h
+    return wh / ((boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+                 + (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1]) - wh)
+
+
+class ArrayTrackStore:
+    """
+    SORT track store that keeps all tracks in contiguous arrays instead of one ``KalmanBoxTracker`` per track:
+    states ``x`` (N, 4), covariances ``P`` (N, 4, 4), ids, ages and hit counts. Predict and update run as batched
+    matrix operations over all tracks, and the association is one vectorized IoU computation over the
+    overlapping detection/track pairs.
+    The motion model, noise, initial covariance and track bookkeeping are the same as ``msight_vision.tracker.Sort``.
+    """
+
+    F = np.array([[1, 0, 1, 0], [0, 1, 0, 1], [0, 0, 1, 0], [0, 0, 0, 1]], dtype=np.float64)
+    H = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=np.float64)
+    Q = np.eye(4)
+    R = np.eye(2)
+    P0 = np.diag([10.0, 10.0, 10000.0, 10000.0])  # high uncertainty on the unobservable initial velocities
+
+    _fields = ("x", "P", "ids", "uuids", "categories", "confidences", "hits", "hit_streak", "age", "time_since_update")
+
+    def __init__(self, max_age=3, min_hits=1, iou_threshold=0.01):
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.iou_threshold = iou_threshold
+        self.frame_count = 0
+        self.x = np.zeros((0, 4))
+        self.P = np.zeros((0, 4, 4))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.uuids = np.empty(0, dtype=object)
+        self.categories = np.empty(0, dtype=object)
+        self.confidences = np.zeros(0)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.hit_streak = np.zeros(0, dtype=np.int64)
+        self.age = np.zeros(0, dtype=np.int64)
+        self.time_since_update = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _keep(self, mask):
+        for name in self._fields:
+            setattr(self, name, getattr(self, name)[mask])
+
+    def predict(self):
+        """Advance every track by one step of the constant velocity model."""
+        self.x = self.x @ self.F.T
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        self.age += 1
+        self.hit_streak[self.time_since_update > 0] = 0
+        self.time_since_update += 1
+
+    def update(self, idx, z, categories, confidences):
+        """
+        Kalman update of the tracks ``idx`` with the measured centers ``z`` (M, 2), Joseph form as in filterpy.
+        :param categories: object array of categories, None keeps the stored category
+        """
+        P = self.P[idx]
+        S = P[:, :2, :2] + self.R
+        K = P[:, :, :2] @ np.linalg.inv(S)
+        self.x[idx] = self.x[idx] + (K @ (z - self.x[idx, :2])[..., None])[..., 0]
+        I_KH = np.eye(4) - K @ self.H
+        self.P[idx] = I_KH @ P @ I_KH.transpose(0, 2, 1) + K @ self.R @ K.transpose(0, 2, 1)
+        self.time_since_update[idx] = 0
+        self.hits[idx] += 1
+        self.hit_streak[idx] += 1
+        has_category = np.array([category is not None for category in categories], dtype=bool)
+        self.categories[idx[has_category]] = categories[has_category]
+        self.confidences[idx] = confidences
+
+    def add(self, z, categories, confidences):
+        """Start one track per measured center in ``z`` (M, 2)."""
+        n = len(z)
+        x = np.zeros((n, 4))
+        x[:, :2] = z
+        # ids come from the same counter as KalmanBoxTracker so that both stores never hand out the same id
+        ids = KalmanBoxTracker.count + np.arange(n)
+        KalmanBoxTracker.count += n
+        uuids = np.empty(n, dtype=object)
+        uuids[:] = [str(uuid.uuid4()) for _ in range(n)]
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, np.broadcast_to(self.P0, (n, 4, 4))])
+        self.ids = np.concatenate([self.ids, ids])
+        self.uuids = np.concatenate([self.uuids, uuids])
+        self.categories = np.concatenate([self.categories, categories])
+        self.confidences = np.concatenate([self.confidences, confidences])
+        for name in ("hits", "hit_streak", "age", "time_since_update"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(n, dtype=np.int64)]))
+
+    def state_boxes(self, idx=slice(None)):
+        centers = self.x[idx, :2]
+        return np.concatenate([centers - TRACK_BOX_RADIUS, centers + TRACK_BOX_RADIUS], axis=1)
+
+    def _associate(self, dets):
+        """
+        Match detections to the predicted tracks with the rules of ``associate_detections_to_trackers``.
+        Boxes only overlap when their centers are closer than the sum of the half sizes, so the IoU is only
+        computed for the candidate pairs found with a KD-tree, and the assignment is solved separately on every
+        connected component of the overlap graph. Pairs without overlap have zero IoU and never change the assignment.
+        :return: (matches as (det, track) rows, unmatched detection indices). The unmatched detections come in the
+            order of upstream, which numbers the tracks born in this step: the never assigned ones, then the ones
+            rejected by the IoU threshold.
+        """
+        n_dets = len(dets)
+        no_match = np.empty((0, 2), dtype=np.int64)
+        if len(self) == 0 or n_dets == 0:
+            return no_match, np.arange(n_dets)
+        det_centers = (dets[:, :2] + dets[:, 2:4]) / 2.0
+        pairs = cKDTree(det_centers).sparse_distance_matrix(cKDTree(self.x[:, :2]), DETECTION_BOX_RADIUS + TRACK_BOX_RADIUS, p=np.inf, output_type='ndarray')
+        det_idx = pairs['i'].astype(np.int64)
+        trk_idx = pairs['j'].astype(np.int64)
+        iou = pair_iou(dets[det_idx, :4], self.state_boxes(trk_idx))
+        overlap = iou > 0
+        det_idx, trk_idx, iou = det_idx[overlap], trk_idx[overlap], iou[overlap]
+
+        above = iou > self.iou_threshold
+        if above.any() and np.bincount(det_idx[above]).max() == 1 and np.bincount(trk_idx[above]).max() == 1:
+            order = np.lexsort((trk_idx[above], det_idx[above]))
+            matched = np.stack([det_idx[above][order], trk_idx[above][order]], axis=1)
+            return matched, np.flatnonzero(~np.isin(np.arange(n_dets), matched[:, 0]))
+        if len(iou):
+            matched, matched_iou = self._assign_components(det_idx, trk_idx, iou, n_dets)
+        else:
+            matched, matched_iou = no_match, np.zeros(0)
+        # filter out matches with low IOU, upstream lists their detections after the never assigned ones, in row order
+        low = matched_iou < self.iou_threshold
+        rejected = np.sort(matched[low, 0])
+        matched = matched[~low]
+        if n_dets <= len(self):
+            # the dense assignment of upstream pairs every detection with some track, so every unmatched detection
+            # is a rejected one
+            return matched, np.flatnonzero(~np.isin(np.arange(n_dets), matched[:, 0]))
+        never_assigned = np.flatnonzero(~np.isin(np.arange(n_dets), np.concatenate([matched[:, 0], rejected])))
+        return matched, np.concatenate([never_assigned, rejected])
+
+    @staticmethod
+    def _assign_components(det_idx, trk_idx, iou, n_dets):
+        """
+        Maximum IoU assignment, solved on every connected component of the sparse overlap graph.
+        :return: (matches as (det, track) rows, IoU of every match)
+        """
+        n_nodes = n_dets + int(trk_idx.max()) + 1
+        graph = coo_matrix((np.ones(len(iou)), (det_idx, trk_idx + n_dets)), shape=(n_nodes, n_nodes))
+        _, labels = connected_components(graph, directed=False)
+        edge_component = labels[det_idx]
+        order = np.argsort(edge_component, kind='stable')
+        boundaries = np.flatnonzero(np.diff(edge_component[order])) + 1
+        matched, matched_iou = [], []
+        components = np.split(order, boundaries)
+        # a lone pair is its own optimal assignment
+        lone = np.concatenate([edges for edges in components if len(edges) == 1] or [np.zeros(0, dtype=np.int64)])
+        matched.append(np.stack([det_idx[lone], trk_idx[lone]], axis=1))
+        matched_iou.append(iou[lone])
+        for edges in components:
+            if len(edges) == 1:
+                continue
+            rows, row_ind = np.unique(det_idx[edges], return_inverse=True)
+            cols, col_ind = np.unique(trk_idx[edges], return_inverse=True)
+            cost = np.zeros((len(rows), len(cols)))
+            cost[row_ind, col_ind] = -iou[edges]
+            sub_rows, sub_cols = linear_sum_assignment(cost)
+            matched.append(np.stack([rows[sub_rows], cols[sub_cols]], axis=1))
+            matched_iou.append(-cost[sub_rows, sub_cols])
+        return np.concatenate(matched).astype(np.int64), np.concatenate(matched_iou)
+
+    def step(self, dets, categories):
+        """
+        One SORT step, the array counterpart of ``Sort.update``.
+        :param dets: (N, 5) detections [x1, y1, x2, y2, score] in local meters
+        :param categories: object array of N category ids
+        :return: (boxes with the track id as last column, ids, uuids) of the tracks reported this step
+        """
+        self.frame_count += 1
+        self.predict()
+        valid = ~np.isnan(self.x[:, :2]).any(axis=1)
+        if not valid.all():
+            self._keep(valid)
+
+        matched, unmatched_dets = self._associate(dets)
+        centers = (dets[:, :2] + dets[:, 2:4]) / 2.0
+        if len(matched):
+            self.update(matched[:, 1], centers[matched[:, 0]], categories[matched[:, 0]], dets[matched[:, 0], 4].astype(np.float64))
+        if len(unmatched_dets):
+            self.add(centers[unmatched_dets], categories[unmatched_dets], dets[unmatched_dets, 4].astype(np.float64))
+
+        reported = (self.time_since_update < 1) & ((self.hit_streak >= self.min_hits) | (self.frame_count <= self.min_hits))
+        # reported in reverse track order, like Sort.update
+        idx = np.flatnonzero(reported)[::-1]
+        boxes = np.concatenate([self.state_boxes(idx), (self.ids[idx] + 1)[:, None]], axis=1)
+        ids, uuids = (self.ids[idx] + 1).tolist(), self.uuids[idx].tolist()
+        # remove dead tracklets
+        alive = self.time_since_update <= self.max_age
+        if not alive.all():
+            self._keep(alive)
+        return boxes, ids, uuids
+
+
+class ArraySortTracker(SortTracker):
+    """
+    ``SortTracker`` backed by an ``ArrayTrackStore``, for corridors with hundreds of live tracks.
+    Takes the same parameters and gives the same tracks, including the ``use_filtered_position`` and
+    ``output_predicted`` semantics, but the per-track Python loops are replaced by array operations.
+
+    Track ids may be numbered differently in dense scenes. When a step has more detections than tracks, or several
+    assignments with the same IoU, ``SortTracker`` solves one dense assignment whose solver picks among the equal
+    choices, for instance which detections without any overlapping track it pairs with a track. That decides the
+    order in which the new tracks get their ids, and the sparse assignment here cannot reproduce it.
+    """
+
+    def __init__(self, max_age=3, min_hits=1, iou_threshold=0.01, iou_type='iou', use_filtered_position=False, output_predicted=False):
+        super().__init__(max_age=max_age, min_hits=min_hits, iou_threshold=iou_threshold, iou_type=iou_type,
+                         use_filtered_position=use_filtered_position, output_predicted=output_predicted)
+        if iou_type != 'iou':
+            raise NotImplementedError(f"Unsupported iou_type: {iou_type}")
+        self.tracker = ArrayTrackStore(max_age=max_age, min_hits=min_hits, iou_threshold=iou_threshold)
+
+    def track(self, object_list):
+        n = len(object_list)
+        categories = np.empty(n, dtype=object)
+        categories[:] = [obj.category if hasattr(obj, 'category') else 0 for obj in object_list]
+        dets = np.empty((n, 5))
+        if n:
+            for obj in object_list:
+                obj.traj_id = "-1"
+            x_norm, y_norm = coord_normalization(np.array([obj.x for obj in object_list], dtype=np.float64),
+                                                 np.array([obj.y for obj in object_list], dtype=np.float64))
+            centers = np.stack([x_norm, y_norm], axis=1)
+            dets[:, :2] = centers - DETECTION_BOX_RADIUS
+            dets[:, 2:4] = centers + DETECTION_BOX_RADIUS
+            dets[:, 4] = [obj.confidence for obj in object_list]
+
+        boxes, ids, uuids = self.tracker.step(dets, categories)
+        if n and len(boxes):
+            # every reported track goes to the closest detection, later tracks overwrite earlier ones like update_vlist
+            det_centers = (dets[:, :2] + dets[:, 2:4]) / 2.0
+            track_centers = (boxes[:, :2] + boxes[:, 2:4]) / 2.0
+            _, nearest = cKDTree(det_centers).query(track_centers)
+            lats, lons = coord_unnormalization(track_centers[:, 0], track_centers[:, 1])
+            for i, idx_min in enumerate(nearest.tolist()):
+                obj = object_list[idx_min]
+                obj.traj_id = str(int(ids[i]))
+                obj._uuid = uuids[i]
+                obj.x = float(lats[i])
+                obj.y = float(lons[i])
+        object_list = [obj for obj in object_list if obj.traj_id != '-1' and obj.traj_id is not None]
+
+        if self.use_filtered_position:
+            object_list = self._apply_filtered_positions(object_list)
+        if self.output_predicted:
+            object_list.extend(self._get_predicted_objects(object_list))
+        return object_list
+
+    def _apply_filtered_positions(self, object_list):
+        rows = {track_uuid: row for row, track_uuid in enumerate(self.tracker.uuids.tolist())}
+        matched = [(obj, rows[obj._uuid]) for obj in object_list if obj._uuid in rows]
+        if not matched:
+            return object_list
+        idx = np.array([row for _, row in matched])
+        lats, lons = coord_unnormalization(self.tracker.x[idx, 0], self.tracker.x[idx, 1])
+        for (obj, _), lat, lon in zip(matched, lats.tolist(), lons.tolist()):
+            obj.x = lat
+            obj.y = lon
+        return object_list
+
+    def _get_predicted_objects(self, object_list):
+        store = self.tracker
+        matched_uuids = {obj._uuid for obj in object_list if hasattr(obj, '_uuid') and obj._uuid}
+        missing = np.array([track_uuid not in matched_uuids for track_uuid in store.uuids.tolist()], dtype=bool) & (store.hits >= store.min_hits)
+        idx = np.flatnonzero(missing)
+        lats, lons = coord_unnormalization(store.x[idx, 0], store.x[idx, 1])
+        predicted_objects = []
+        for row, lat, lon in zip(idx.tolist(), lats.tolist(), lons.tolist()):
+            predicted_obj = RoadUserPoint(
+                x=lat,
+                y=lon,
+                category=store.categories[row],
+                confidence=store.confidences[row] * 0.5,  # Reduce confidence for predicted
+            )
+            predicted_obj.traj_id = str(store.ids[row] + 1)
+            predicted_obj._uuid = store.uuids[row]
+            predicted_obj.is_predicted = True  # Mark as predicted
+            predicted_objects.append(predicted_obj)
+        return predicted_objects
@@ -1,53 +1,113 @@
 import cv2
 import numpy as np
+from pathlib import Path
+
+from locmap import LOCMAP_SUFFIX, read_locmap
+
+class GridCompositor:
+    """
+    Composes images into a grid on one persistent canvas.
+    Each image is resized straight into its cell of the canvas, so the full-resolution mosaic is never
+    built, and images of different resolutions can share a grid. The canvas is reused by the next call,
+    copy the result if you need to keep it.
+    """
+
+    def __init__(self, grid_size, size=(640, 960)):
+        """
+        :param grid_size: size of the grid (rows, cols)
+        :param size: size of the output canvas (width, height)
+        """
+        self.grid_size = grid_size
+        self.size = size
+        rows, cols = grid_size
+        width, height = size
+        self.canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        # cell boundaries, the remainder pixels are spread over the cells
+        self.cells = [(c * width // cols, r * height // rows, (c + 1) * width // cols, (r + 1) * height // rows)
+                      for r in range(rows) for c in range(cols)]
+
+    def compose(self, images):
+        """
+        Resize every image into its cell of the canvas.
+        :param images: list of images, at most rows * cols
+        :return: list of (cell view, x scale, y scale) per image, to draw overlays at cell scale
+        """
+        if len(images) > len(self.cells):
+            raise ValueError(f"Cannot fit {len(images)} images in a {self.grid_size} grid")
+        tiles = []
+        for i, (x0, y0, x1, y1) in enumerate(self.cells):
+            cell = self.canvas[y0:y1, x0:x1]
+            if i >= len(images):
+                cell[:] = 0
+                continue
+            img = images[i]
+            if img.shape[:2] == cell.shape[:2]:
+                cell[:] = img
+            else:
+                cv2.resize(img, (x1 - x0, y1 - y0), dst=cell)
+            tiles.append((cell, (x1 - x0) / img.shape[1], (y1 - y0) / img.shape[0]))
+        return tiles
+
+
+_grid_compositors = {}
+
+
+def _get_grid_compositor(grid_size, size):
+    key = (tuple(grid_size), tuple(size))
+    if key not in _grid_compositors:
+        _grid_compositors[key] = GridCompositor(grid_size, size)
+    return _grid_compositors[key]
+
 
 def build_image_grid(images, grid_size, size=(640, 960)):
     """
     Build a grid of images.
-    :param images: list of images
+    :param images: list of images, resolutions may differ
     :param grid_size: size of the grid (rows, cols)
-    :return: grid image
+    :return: grid image, a canvas that is reused by the next call with the same grid_size and size
     """
-    rows, cols = grid_size
-    # print(f"Building image grid with size: {grid_size}")
-    img_height, img_width = images[0].shape[:2]
-    grid_img = cv2.vconcat([cv2.hconcat(images[i * cols:(i + 1) * cols]) for i in range(rows)])
-    # Resize the grid image to the specified size
-    grid_img = cv2.resize(grid_img, size)
-    return grid_img
+    compositor = _get_grid_compositor(grid_size, size)
+    compositor.compose(images)
+    return compositor.canvas
 
 def plot_2d_detection_results(img_buffer, detection_buffer, grid_size=(2,2), size=(1280, 960)):
     """
     Plot 2D detection results on images.
+    The boxes are drawn at cell scale on the grid canvas, the images in img_buffer are not modified.
     :param img_buffer: image buffer
     :param detection_buffer: detection buffer
     :param grid_size: size of the grid (rows, cols)
-    :return: None
+    :return: grid image, a canvas that is reused by the next call with the same grid_size and size
     """
-    images = []
-    for sensor_name in img_buffer.keys():
-        img = img_buffer[sensor_name]["image"]
-        timestamp = img_buffer[sensor_name]["timestamp"]
-        # Draw bounding boxes on the image
+    compositor = _get_grid_compositor(grid_size, size)
+    sensor_names = list(img_buffer.keys())
+    tiles = compositor.compose([img_buffer[sensor_name]["image"] for sensor_name in sensor_names])
+    for sensor_name, (cell, scale_x, scale_y) in zip(sensor_names, tiles):
+        # Draw bounding boxes on the grid cell
         for detected_object in detection_buffer[sensor_name].object_list:
             box = detected_object.box
             class_id = detected_object.class_id
             score = detected_object.score
-            cv2.rectangle(img, (int(box[0]), int(box[1])), (int(box[2]), int(box[3])), (0, 255, 0), 2)
-            cv2.putText(img, f"ID: {class_id}, Score: {score:.2f}", (int(box[0]), int(box[1] - 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        images.append(img)
-
-    # Build a grid of images and display it
-    grid_img = build_image_grid(images, grid_size, size=size)
-    return grid_img
+            x1, y1 = int(box[0] * scale_x), int(box[1] * scale_y)
+            x2, y2 = int(box[2] * scale_x), int(box[3] * scale_y)
+            cv2.rectangle(cell, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(cell, f"ID: {class_id}, Score: {score:.2f}", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    return compositor.canvas
 
 def load_locmaps(loc_maps_path):
     """
     Load localization maps from the specified path.
+    ``.npz`` maps are decompressed into memory, ``.locmap`` maps (see ``convert_locmaps.py``)
+    are memory-mapped read-only so that all processes share one page-cache copy.
     :param loc_maps_path: path to the localization maps in the config file
     :return: localization maps
     """
-    result = {key: np.load(item) for key, item in loc_maps_path.items()}
+    result = {}
+    for key, item in loc_maps_path.items():
+        if Path(item).suffix == LOCMAP_SUFFIX:
+            result[key] = read_locmap(item)
+        else:
+            result[key] = np.load(item)
     return result
 
 def is_number(val):
@@ -0,0 +1,108 @@
+import cv2
+import numpy as np
+from msight_base.visualizer import Visualizer
+
+METERS_PER_DEGREE = 111000.  # same constant as msight_base.visualizer.utils.coord_normalization
+
+
+class CachedVisualizer(Visualizer):
+    """
+    ``Visualizer`` with a render path whose cost does not grow with the number of tracks or the length of their histories.
+    - lat/lon are projected to pixels for all objects at once with a single 3x3 matrix, the local metric normalization
+      around the top-left corner of the map composed with the corner homography, computed once at construction.
+    - every render starts from the pre-scaled basemap copied into a reused buffer, and the returned image is that buffer.
+    - trajectories are drawn incrementally: only the last pixel of every track is kept (instead of a trajectory manager),
+      each render adds the new segments with one polyline call per color, and tracks not seen for ``max_traj_gap``
+      renders are forgotten.
+    - the fading trajectory layer is blended in uint8 with a single channel alpha instead of float images.
+    """
+
+    def __init__(self, map_image_path, map_width=1024, map_height=1024, RGB=False, max_traj_gap=100):
+        """
+        :param max_traj_gap: number of renders after which a track that was not seen starts a new trajectory,
+            same as the 100 frames history of ``Visualizer``
+        """
+        super().__init__(map_image_path, map_width=map_width, map_height=map_height, RGB=RGB)
+        self.world2pixel = self._create_world2pixel_matrix()
+        self.max_traj_gap = max_traj_gap
+        self.canvas = np.empty_like(self.basemap)
+        self.traj_alpha = np.zeros((self.h, self.w), dtype=np.float32)
+        self.base_weight = np.ones((self.h, self.w), dtype=np.float32)
+        self.last_pixels = {}  # traj_id -> (pixel of the last point, render count)
+        self.render_count = 0
+
+    def _create_world2pixel_matrix(self):
+        lat0, lon0 = self.f.tl[0], self.f.tl[1]
+        lon_scale = METERS_PER_DEGREE * np.cos(lat0 / 180. * np.pi)
+        normalization = np.array([[METERS_PER_DEGREE, 0., -METERS_PER_DEGREE * lat0],
+                                  [0., lon_scale, -lon_scale * lon0],
+                                  [0., 0., 1.]])
+        return self.transform_wd2px @ normalization
+
+    def project(self, lat, lon):
+        """
+        Project lat/lon arrays to pixels with the precomputed matrix.
+        :return: (N, 2) int32 pixel coordinates, truncated like ``Visualizer._world2pxl``
+        """
+        points = self.world2pixel @ np.stack([lat, lon, np.ones(len(lat))])
+        return (points[:2] / points[2]).T.astype(np.int32)
+
+    def draw_points(self, frame, show_heading=False, pixels=None, colors=None):
+        """Draw the objects on the reused canvas, ``pixels`` and ``colors`` are projected here when not given."""
+        np.copyto(self.canvas, self.basemap)
+        objects = [v for v in frame if v.x is not None and v.y is not None]
+        if pixels is None:
+            pixels, colors = self._project_objects(objects)
+        for v, ptc, color in zip(objects, pixels, colors):
+            # box unavailiable, draw a circle instead
+            self._draw_vehicle_as_point(self.canvas, ptc, color)
+            if show_heading:
+                self._draw_vehicle_heading_as_arrow(self.canvas, ptc, v.heading, color)
+            # print vehicle info beside box
+            self._print_vehicle_info(self.canvas, ptc, v, (255, 255, 0))
+        return self.canvas
+
+    def _project_objects(self, objects):
+        if not objects:
+            return np.empty((0, 2), dtype=np.int32), []
+        pixels = self.project(np.array([v.x for v in objects], dtype=np.float64), np.array([v.y for v in objects], dtype=np.float64))
+        colors = [self.color_table[hash(v.traj_id) % 10].tolist() for v in objects]
+        return pixels, colors
+
+    def draw_trajectory(self, frame, linewidth=2, pixels=None, colors=None):
+        """Fade the trajectory layer and add the segments from the last point of every track to its new position."""
+        objects = [v for v in frame if v.x is not None and v.y is not None]
+        if pixels is None:
+            pixels, colors = self._project_objects(objects)
+        self.render_count += 1
+        self.traj_alpha *= 0.95
+
+        segments_by_color = {}
+        for v, ptc, color in zip(objects, pixels.tolist(), colors):
+            last = self.last_pixels.get(v.traj_id)
+            if last is not None and self.render_count - last[1] <= self.max_traj_gap:
+                segments_by_color.setdefault(tuple(color), []).append(np.array([ptc, last[0]], dtype=np.int32))
+            self.last_pixels[v.traj_id] = (ptc, self.render_count)
+        for color, segments in segments_by_color.items():
+            cv2.polylines(self.traj_layer, segments, isClosed=False, color=color, thickness=linewidth)
+            cv2.polylines(self.traj_alpha, segments, isClosed=False, color=0.8, thickness=linewidth)
+
+        # forget the tracks that left the history window
+        if len(self.last_pixels) > 2 * len(objects) + 64:
+            oldest = self.render_count - self.max_traj_gap
+            self.last_pixels = {traj_id: last for traj_id, last in self.last_pixels.items() if last[1] > oldest}
+        return self.traj_layer, self.traj_alpha
+
+    def render(self, frame, with_traj=True, linewidth=2, show_heading=False):
+        """
+        Render a frame, same layers as ``Visualizer.render``.
+        :return: the reused canvas, overwritten by the next call
+        """
+        objects = [v for v in frame if v.x is not None and v.y is not None]
+        pixels, colors = self._project_objects(objects)
+        self.draw_points(objects, show_heading=show_heading, pixels=pixels, colors=colors)
+        if with_traj:
+            self.draw_trajectory(objects, linewidth, pixels=pixels, colors=colors)
+            np.subtract(1.0, self.traj_alpha, out=self.base_weight)
+            cv2.blendLinear(self.traj_layer, self.canvas, self.traj_alpha, self.base_weight, dst=self.canvas)
+        return self.canvas
@@ -0,0 +1,70 @@
+import argparse
+import time
+
+import av
+import cv2
+
+from fast_decode import FastDecoder
+
+
+class FullDecoder:
+    """What RTSPSourceNode does: decode and convert every frame, resize it with OpenCV, then apply the gap."""
+
+    def __init__(self, url, gap=0, resize_ratio=None, options=None):
+        self.container = av.open(url, options=options or {})
+        self.frames = self.container.decode(self.container.streams.video[0])
+        self.gap = gap
+        self.resize_ratio = resize_ratio
+        self.index = 0
+
+    def read(self):
+        while True:
+            img = next(self.frames).to_ndarray(format="bgr24")
+            if self.resize_ratio is not None:
+                img = cv2.resize(img, (0, 0), fx=self.resize_ratio, fy=self.resize_ratio)
+            self.index += 1
+            if (self.index - 1) % (self.gap + 1) == 0:
+                return img, time.time()
+
+    def close(self):
+        self.container.close()
+
+
+def bench(decoder, frames):
+    """:return: CPU ms and wall ms per published frame, shape of the frames"""
+    image, _ = decoder.read()
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(frames):
+        image, _ = decoder.read()
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    decoder.close()
+    return cpu * 1000 / frames, wall * 1000 / frames, image.shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the RTSPSourceNode decode path with FastDecoder.")
+    parser.add_argument("-u", "--url", default="sample.mp4",
+                        help="The stream to decode, the docker-compose stream is rtsp://localhost:8554/live.stream. Default is the sample.mp4 file.")
+    parser.add_argument("-g", "--gap", type=int, default=9, help="Frames skipped between two published frames.")
+    parser.add_argument("-r", "--resize-ratio", type=float, default=0.5, help="The ratio to resize the image, 0 to keep the size.")
+    parser.add_argument("--frames", type=int, default=50, help="Published frames per measurement.")
+    parser.add_argument("--rtsp-transport", default="tcp", choices=["tcp", "udp"], help="The RTSP transport protocol.")
+    parser.add_argument("--threads", type=int, default=0, help="Decoder threads of FastDecoder, 0 lets libav choose.")
+    args = parser.parse_args()
+
+    options = {"rtsp_transport": args.rtsp_transport, "max_delay": "0"} if args.url.startswith("rtsp://") else {}
+    resize_ratio = args.resize_ratio or None
+    decoders = {
+        "full decode": lambda: FullDecoder(args.url, args.gap, resize_ratio, options),
+        "fast, no skip": lambda: FastDecoder(args.url, args.gap, resize_ratio, options, threads=args.threads, skip_nonref=False),
+        "fast": lambda: FastDecoder(args.url, args.gap, resize_ratio, options, threads=args.threads),
+        "fast, frame threads": lambda: FastDecoder(args.url, args.gap, resize_ratio, options, threads=args.threads, thread_type="FRAME"),
+    }
+    print(f"  {args.url}, gap {args.gap}, resize ratio {resize_ratio}, {args.frames} published frames")
+    for name, create in decoders.items():
+        cpu_ms, wall_ms, shape = bench(create(), args.frames)
+        print(f"  {name:<22s}CPU {cpu_ms:7.1f} ms  wall {wall_ms:7.1f} ms per published frame  {shape}")
+
+
+if __name__ == "__main__":
+    main()
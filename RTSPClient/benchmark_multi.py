@@ -0,0 +1,79 @@
+import argparse
+import logging
+import subprocess
+import sys
+import threading
+import time
+
+from msight_core.data import ImageData
+
+from multi_stream import CameraStream, ReconnectScheduler
+
+
+def pss_kb(pid):
+    """Proportional set size of a process: its private memory plus its share of the memory it shares."""
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def worker(args):
+    """Decodes ``--cameras`` cameras on threads, at the frame rate of a live camera, and serializes the frames."""
+    logger = logging.getLogger("benchmark_multi")
+    scheduler = ReconnectScheduler(spacing=0.0)
+    interval = (args.gap + 1) / args.fps
+    next_frame = {}
+
+    def on_frame(stream, image, capture_timestamp):
+        ImageData.from_ndarray(image, stream.sensor_name, capture_timestamp).serialize()
+        # a live camera only sends a frame every 1 / fps seconds
+        due = next_frame.get(stream.sensor_name, time.monotonic()) + interval
+        next_frame[stream.sensor_name] = due
+        time.sleep(max(0.0, due - time.monotonic()))
+
+    streams = [CameraStream(f"camera_{i}", args.url, scheduler, on_frame, logger, gap=args.gap,
+                            resize_ratio=args.resize_ratio, threads=1) for i in range(args.cameras)]
+    for stream in streams:
+        stream.start()
+    threading.Event().wait(args.seconds)
+    print(sum(stream.frames for stream in streams), flush=True)
+
+
+def run(args, processes, cameras_per_process):
+    """:return: total PSS in MB after ``--seconds``, frames published"""
+    command = [sys.executable, __file__, "--worker", "-u", args.url, "-g", str(args.gap), "-r", str(args.resize_ratio),
+               "--fps", str(args.fps), "--seconds", str(args.seconds), "--cameras", str(cameras_per_process)]
+    workers = [subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+               for _ in range(processes)]
+    time.sleep(args.seconds - 1)
+    pss = sum(pss_kb(w.pid) for w in workers) / 1024
+    frames = sum(int(w.communicate()[0]) for w in workers)
+    return pss, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory of one process per camera with one process for all the cameras.")
+    parser.add_argument("-u", "--url", default="sample.mp4", help="The stream every camera decodes. Default is the sample.mp4 file.")
+    parser.add_argument("-g", "--gap", type=int, default=9, help="Frames skipped between two published frames.")
+    parser.add_argument("-r", "--resize-ratio", type=float, default=0.5, help="The ratio to resize the images.")
+    parser.add_argument("--fps", type=float, default=24, help="Frame rate of the cameras.")
+    parser.add_argument("--cameras", type=int, default=8, help="Number of cameras.")
+    parser.add_argument("--seconds", type=float, default=20, help="Seconds each setup runs.")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+    print(f"  {args.cameras} cameras decoding {args.url}, gap {args.gap}, resize ratio {args.resize_ratio}")
+    print(f"  {'setup':<28s}{'memory (PSS)':>14s}{'frames':>10s}")
+    for name, processes, cameras_per_process in [("one process per camera", args.cameras, 1),
+                                                 ("one process, all cameras", 1, args.cameras)]:
+        pss, frames = run(args, processes, cameras_per_process)
+        print(f"  {name:<28s}{pss:11.0f} MB{frames:10d}")
+
+
+if __name__ == "__main__":
+    main()
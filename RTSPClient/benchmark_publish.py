@@ -0,0 +1,114 @@
+import argparse
+import time
+
+import av
+import numpy as np
+
+from fast_decode import FastDecoder
+from motion_gate import MotionGate
+
+
+class EndOfRun(Exception):
+    pass
+
+
+class StreamClock:
+    """
+    A gate which lets ``inner`` decide, and ends the run once ``seconds`` of the stream were decoded, or at the end of
+    a shorter file, which the decoder would reopen.
+    """
+
+    def __init__(self, seconds, inner=None):
+        self.seconds = seconds
+        self.inner = inner
+        self.opened = False
+
+    def reset(self):
+        if self.opened:
+            raise EndOfRun
+        self.opened = True
+        if hasattr(self.inner, "reset"):
+            self.inner.reset()
+
+    def __call__(self, frame):
+        if frame.time is not None and frame.time >= self.seconds:
+            raise EndOfRun
+        return self.inner is None or self.inner(frame)
+
+
+def make_quiet_clip(source, path, seconds, fps=24, gop=48):
+    """
+    Writes a clip of a quiet approach: the first frame of ``source`` with sensor noise, and a dark box crossing it for
+    3 seconds every 20 seconds.
+    """
+    with av.open(source) as container:
+        background = next(container.decode(video=0)).to_ndarray(format="bgr24", width=640, height=272)
+    rng = np.random.default_rng(0)
+    with av.open(path, "w") as output:
+        stream = output.add_stream("libx264", rate=fps)
+        stream.width, stream.height, stream.pix_fmt = 640, 272, "yuv420p"
+        stream.codec_context.gop_size = gop
+        for index in range(int(seconds * fps)):
+            image = background.astype(np.int16) + rng.normal(0, 2, background.shape).astype(np.int16)
+            crossing = index / fps % 20
+            if crossing < 3:
+                x = int(crossing / 3 * 600)
+                image[150:200, x:x + 80] = 30
+            frame = av.VideoFrame.from_ndarray(np.clip(image, 0, 255).astype(np.uint8), format="bgr24")
+            output.mux(stream.encode(frame))
+        output.mux(stream.encode(None))
+
+
+def run(decoder, seconds):
+    """:return: published frames, CPU seconds"""
+    decoder.gate = StreamClock(seconds, decoder.gate)
+    published = 0
+    cpu = time.process_time()
+    try:
+        while True:
+            decoder.read()
+            published += 1
+    except EndOfRun:
+        pass
+    cpu = time.process_time() - cpu
+    decoder.close()
+    return published, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the frames published and the CPU spent by each publishing policy.")
+    parser.add_argument("-u", "--url", default="sample.mp4", help="The stream to decode. Default is the sample.mp4 file.")
+    parser.add_argument("-g", "--gap", type=int, default=0, help="Frames skipped between two published frames.")
+    parser.add_argument("-r", "--resize-ratio", type=float, default=0.5, help="The ratio to resize the image, 0 to keep the size.")
+    parser.add_argument("--seconds", type=float, default=60, help="Seconds of the stream to decode for each policy.")
+    parser.add_argument("--rtsp-transport", default="tcp", choices=["tcp", "udp"], help="The RTSP transport protocol.")
+    parser.add_argument("--motion-threshold", type=float, default=25, help="Gray level difference for a pixel to count as changed.")
+    parser.add_argument("--motion-fraction", type=float, default=0.005, help="Fraction of changed pixels for a frame to count as motion.")
+    parser.add_argument("--heartbeat", type=float, default=5.0, help="Longest time in seconds without a published frame in motion mode.")
+    parser.add_argument("--make-quiet-clip", metavar="PATH", help="Write a clip of a quiet approach to PATH, and exit.")
+    args = parser.parse_args()
+
+    if args.make_quiet_clip:
+        make_quiet_clip(args.url, args.make_quiet_clip, args.seconds)
+        return
+
+    options = {"rtsp_transport": args.rtsp_transport, "max_delay": "0"} if args.url.startswith("rtsp://") else {}
+    resize_ratio = args.resize_ratio or None
+    gates = {}
+    policies = {
+        "all": lambda: FastDecoder(args.url, args.gap, resize_ratio, options),
+        "keyframes": lambda: FastDecoder(args.url, args.gap, resize_ratio, options, keyframes_only=True),
+        "motion": lambda: FastDecoder(args.url, args.gap, resize_ratio, options, gate=gates.setdefault(
+            "motion", MotionGate(args.motion_threshold, args.motion_fraction, args.heartbeat))),
+    }
+    print(f"  {args.url}, gap {args.gap}, resize ratio {resize_ratio}, {args.seconds:.0f} s of stream")
+    print(f"  {'policy':<12s}{'published':>10s}{'per minute':>12s}{'CPU per stream second':>24s}")
+    for name, create in policies.items():
+        published, cpu = run(create(), args.seconds)
+        print(f"  {name:<12s}{published:10d}{published * 60 / args.seconds:12.0f}{cpu * 1000 / args.seconds:21.0f} ms")
+    gate = gates["motion"]
+    print(f"  motion gate: {gate.seen} frames checked, {gate.motion} with motion, {gate.heartbeats} heartbeats")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import time
+from collections import deque
+
+import av
+
+
+class FastDecoder:
+    """
+    Decodes only what an RTSP source publishes: every ``gap + 1``-th frame, converted straight to BGR at the output
+    size.
+
+    Frames are counted in presentation order, from the pts of the packets, as ``RTSPSourceNode`` counts them, so the
+    published frames are evenly spaced also on streams with B-frames, whose decode order differs.
+
+    * Frames that will not be published are not converted. When ``skip_nonref`` is set, the decoder does not even
+      decode them if no other frame references them (``skip_frame = NONREF``, switched packet by packet).
+    * libav decodes on ``threads`` threads (0 lets libav choose). ``SLICE`` threading adds no latency. ``FRAME``
+      threading also speeds up streams without slices, but delays every frame by one frame per thread.
+    * The conversion to BGR and the resize happen in a single swscale call.
+
+    Two publishing policies reduce the published frames further:
+
+    * ``keyframes_only``: only keyframes are decoded and published (``skip_frame = NONKEY``), the gap then counts
+      keyframes. The other packets are still sent to the decoder, which needs them to output the keyframes in order.
+    * ``gate``: a callable, like ``MotionGate``, called with every ``av.VideoFrame`` the gap selects, before it is
+      converted. Frames it returns False for are dropped.
+    """
+
+    def __init__(self, url, gap=0, resize_ratio=None, options=None, threads=0, thread_type="SLICE", skip_nonref=True,
+                 interpolation="BILINEAR", keyframes_only=False, gate=None):
+        self.url = url
+        self.gap = gap
+        self.resize_ratio = resize_ratio
+        self.options = options or {}
+        self.threads = threads
+        self.thread_type = thread_type
+        self.skip_nonref = skip_nonref
+        self.interpolation = interpolation
+        self.keyframes_only = keyframes_only
+        self.gate = gate
+        self.container = None
+        self.decoded = 0
+        self.converted = 0
+
+    def open(self):
+        self.close()
+        self.container = av.open(self.url, options=self.options)
+        self.stream = self.container.streams.video[0]
+        self.codec_context = self.stream.codec_context
+        self.codec_context.thread_type = self.thread_type
+        self.codec_context.thread_count = self.threads
+        self._packets = self.container.demux(self.stream)
+        self._frames = deque()
+        self._wanted = set()  # pts of the frames to publish
+        self._match_pts = True
+        self._index = 0
+        self._output_index = 0
+        self._first_pts = None
+        self._frame_duration = None
+        if hasattr(self.gate, "reset"):
+            self.gate.reset()
+
+    def close(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+    def output_size(self, width, height):
+        if self.resize_ratio is None:
+            return width, height
+        return max(1, round(width * self.resize_ratio)), max(1, round(height * self.resize_ratio))
+
+    def _presentation_index(self, packet):
+        """Index of the frame of ``packet`` in presentation order, from its pts."""
+        if self._first_pts is None:
+            self._first_pts = packet.pts
+            duration = packet.duration
+            if not duration and self.stream.average_rate:
+                duration = 1 / (self.stream.average_rate * self.stream.time_base)
+            self._frame_duration = duration or 1
+        return round((packet.pts - self._first_pts) / self._frame_duration)
+
+    def _is_wanted(self, frame):
+        self._output_index += 1
+        if frame.pts is None or not self._match_pts or self.keyframes_only:
+            # no timestamps to match on, or only keyframes are decoded: count the output frames instead
+            return (self._output_index - 1) % (self.gap + 1) == 0
+        wanted = frame.pts in self._wanted
+        # frames come out in presentation order, earlier wanted pts will not come anymore
+        self._wanted = {pts for pts in self._wanted if pts > frame.pts}
+        return wanted
+
+    def read(self):
+        """
+        Decode up to the next frame to publish.
+        :return: (BGR frame as an ndarray, capture timestamp)
+        """
+        if self.container is None:
+            self.open()
+        while True:
+            while self._frames:
+                frame = self._frames.popleft()
+                self.decoded += 1
+                if self._is_wanted(frame) and (self.gate is None or self.gate(frame)):
+                    capture_timestamp = time.time()
+                    width, height = self.output_size(frame.width, frame.height)
+                    image = frame.to_ndarray(format="bgr24", width=width, height=height, interpolation=self.interpolation)
+                    self.converted += 1
+                    return image, capture_timestamp
+            try:
+                packet = next(self._packets)
+            except StopIteration:
+                # the stream ended, which a looping RTSP server should not do, reconnect
+                self.open()
+                continue
+            if packet.size == 0:
+                # flush packet at the end of a file
+                self._frames.extend(self.codec_context.decode(None))
+                continue
+            if self.keyframes_only:
+                # every decoded frame is a keyframe, the gap is applied by counting them
+                self.codec_context.skip_frame = "NONKEY"
+                self._frames.extend(self.codec_context.decode(packet))
+                continue
+            self._match_pts = packet.pts is not None
+            if self._match_pts:
+                wanted = self._presentation_index(packet) % (self.gap + 1) == 0
+                if wanted:
+                    self._wanted.add(packet.pts)
+                can_skip = True
+            else:
+                # no pts: the output frames are counted, the decode order only tells which ones without B-frames
+                wanted = self._index % (self.gap + 1) == 0
+                can_skip = not self.codec_context.has_b_frames
+            self._index += 1
+            if self.skip_nonref:
+                # frames that will be dropped are only decoded when later frames need them
+                self.codec_context.skip_frame = "DEFAULT" if wanted or not can_skip else "NONREF"
+            self._frames.extend(self.codec_context.decode(packet))
@@ -0,0 +1,95 @@
+import argparse
+import time
+
+from msight_core.data import ImageData
+from msight_core.nodes import NodeConfig, RTSPSourceNode
+
+from fast_decode import FastDecoder
+from motion_gate import MotionGate
+
+
+class FastRTSPSourceNode(RTSPSourceNode):
+    """
+    An RTSP source node which only decodes and converts what it publishes. The gap is applied by the decoder, before
+    the frames are converted, instead of after.
+
+    ``keyframes_only`` and ``gate`` set a publishing policy, see ``FastDecoder``. With a ``MotionGate``, the node
+    publishes frames of a quiet scene at the heartbeat rate only.
+    """
+
+    def __init__(self, configs, url, rtsp_transport="tcp", resize_ratio=None, threads=0, thread_type="SLICE",
+                 skip_nonref=True, keyframes_only=False, gate=None):
+        super().__init__(configs, url, rtsp_transport=rtsp_transport, resize_ratio=resize_ratio)
+        self.decoder = FastDecoder(
+            url,
+            gap=self.gap,
+            resize_ratio=resize_ratio,
+            options={"rtsp_transport": rtsp_transport, "max_delay": "0"},
+            threads=threads,
+            thread_type=thread_type,
+            skip_nonref=skip_nonref,
+            keyframes_only=keyframes_only,
+            gate=gate,
+        )
+
+    def on_before_spin(self):
+        self.decoder.open()
+        self.logger.info(f"Decoding {self.decoder.codec_context.name} with {self.decoder.thread_type} threads, "
+                         f"skipping unreferenced frames: {self.decoder.skip_nonref}, "
+                         f"keyframes only: {self.decoder.keyframes_only}, gate: {type(self.decoder.gate).__name__}")
+
+    def get_data(self):
+        img, capture_timestamp = self.decoder.read()
+        img_data = ImageData.from_ndarray(
+            image=img,
+            sensor_name=self.sensor_name,
+            capture_timestamp=capture_timestamp,
+            creation_timestamp=time.time(),
+        )
+        self.logger.info(f"Got image from {self.sensor_name}, the image shape is {img.shape}, time: {img_data.time}")
+        return img_data
+
+    def iterate(self):
+        # every frame the decoder returns is to be published
+        data = self.get_data()
+        data = self.post_process(data)
+        self.publish(data)
+
+    def on_unregister(self):
+        self.decoder.close()
+        super().on_unregister()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Launch an RTSP source node that only decodes the frames it publishes.")
+    parser.add_argument("-n", "--name", required=True, help="The name of the source node.")
+    parser.add_argument("-pt", "--publish-topic", required=True, help="The topic to publish the image data to.")
+    parser.add_argument("--sensor-name", required=True, help="The name of the sensor.")
+    parser.add_argument("-u", "--url", required=True, help="The url of the RTSP stream.")
+    parser.add_argument("-g", "--gap", type=int, default=0, help="Frames skipped between two published frames.")
+    parser.add_argument("-r", "--resize-ratio", type=float, default=None, help="The ratio to resize the image.")
+    parser.add_argument("--rtsp-transport", default="tcp", choices=["tcp", "udp"], help="The RTSP transport protocol.")
+    parser.add_argument("--threads", type=int, default=0, help="Decoder threads, 0 lets libav choose.")
+    parser.add_argument("--thread-type", default="SLICE", choices=["SLICE", "FRAME", "AUTO"],
+                        help="SLICE adds no latency, FRAME also works for streams without slices but delays every frame by one frame per thread.")
+    parser.add_argument("--no-skip", action="store_true", help="Decode every frame, even the unreferenced ones that will not be published.")
+    parser.add_argument("--publish", default="all", choices=["all", "keyframes", "motion"],
+                        help="Publish every gap-th frame, only keyframes, or only frames with motion plus heartbeats.")
+    parser.add_argument("--motion-threshold", type=float, default=25, help="Gray level difference for a pixel to count as changed.")
+    parser.add_argument("--motion-fraction", type=float, default=0.005, help="Fraction of changed pixels for a frame to count as motion.")
+    parser.add_argument("--heartbeat", type=float, default=5.0, help="Longest time in seconds without a published frame in motion mode, 0 to disable.")
+    args = parser.parse_args()
+
+    config = NodeConfig(
+        name=args.name,
+        publish_topic_name=args.publish_topic,
+        sensor_name=args.sensor_name,
+        gap=args.gap,
+    )
+    gate = None
+    if args.publish == "motion":
+        gate = MotionGate(threshold=args.motion_threshold, min_changed=args.motion_fraction, heartbeat=args.heartbeat)
+    node = FastRTSPSourceNode(config, args.url, rtsp_transport=args.rtsp_transport, resize_ratio=args.resize_ratio,
+                              threads=args.threads, thread_type=args.thread_type, skip_nonref=not args.no_skip,
+                              keyframes_only=args.publish == "keyframes", gate=gate)
+    node.spin()
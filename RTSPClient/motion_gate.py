@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+
+
+class MotionGate:
+    """
+    Decides whether a decoded frame is worth publishing, from a small grayscale thumbnail of it.
+
+    The thumbnail is compared with a background model, a running average of the previous thumbnails, so slow
+    lighting changes are absorbed while vehicles and pedestrians are not. A frame passes when at least
+    ``min_changed`` of the thumbnail pixels differ from the background by more than ``threshold`` gray levels, or
+    when nothing was published for ``heartbeat`` seconds, so subscribers still see the camera is alive.
+
+    The gate is called with the ``av.VideoFrame`` before it is converted, a frame it rejects is never converted to
+    BGR.
+    """
+
+    def __init__(self, threshold=25, min_changed=0.005, heartbeat=5.0, thumbnail_width=64, learning_rate=0.05):
+        """
+        :param threshold: gray level difference for a thumbnail pixel to count as changed
+        :param min_changed: fraction of changed thumbnail pixels for a frame to count as motion
+        :param heartbeat: longest time in seconds without a published frame, 0 to disable heartbeats
+        :param thumbnail_width: width of the thumbnail, the height keeps the aspect ratio
+        :param learning_rate: weight of every new thumbnail in the background model
+        """
+        self.threshold = threshold
+        self.min_changed = min_changed
+        self.heartbeat = heartbeat
+        self.thumbnail_width = thumbnail_width
+        self.learning_rate = learning_rate
+        self.background = None
+        self.last_published = None
+        self.last_changed = 0.0
+        self.seen = 0
+        self.motion = 0
+        self.heartbeats = 0
+
+    def reset(self):
+        self.background = None
+        self.last_published = None
+
+    def thumbnail(self, frame):
+        height = max(1, round(frame.height * self.thumbnail_width / frame.width))
+        return frame.to_ndarray(format="gray", width=self.thumbnail_width, height=height, interpolation="AREA")
+
+    def _now(self, frame):
+        # the stream time when there is one, so a file decoded faster than real time still gets heartbeats per stream second
+        now = frame.time if frame.time is not None else time.time()
+        if self.last_published is not None and now < self.last_published:
+            # the stream was reopened and its clock restarted
+            self.last_published = now
+        return now
+
+    def __call__(self, frame):
+        self.seen += 1
+        now = self._now(frame)
+        thumbnail = self.thumbnail(frame).astype(np.float32)
+        if self.background is None or self.background.shape != thumbnail.shape:
+            self.background = thumbnail
+            self.last_published = now
+            self.motion += 1
+            return True
+        difference = np.abs(thumbnail - self.background)
+        self.last_changed = float(np.count_nonzero(difference > self.threshold)) / difference.size
+        self.background += self.learning_rate * (thumbnail - self.background)
+        if self.last_changed >= self.min_changed:
+            self.motion += 1
+        elif self.heartbeat > 0 and now - self.last_published >= self.heartbeat:
+            self.heartbeats += 1
+        else:
+            return False
+        self.last_published = now
+        return True
@@ -0,0 +1,151 @@
+import argparse
+import queue
+import threading
+import time
+
+from msight_core.data import ImageData
+from msight_core.nodes import NodeConfig, SourceNode
+
+from multi_stream import CameraStream, ReconnectScheduler
+
+
+class SharedPublisher(threading.Thread):
+    """
+    Publishes the frames of every stream of a node on one thread, over the pub/sub connection of the node, instead
+    of one new thread per publish. When the broker falls behind, at most ``max_pending`` frames wait, and newer
+    frames are dropped and counted.
+    """
+
+    def __init__(self, node, max_pending=64):
+        super().__init__(name="publisher", daemon=True)
+        self.node = node
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.published = 0
+        self.dropped = 0
+
+    def put(self, data):
+        try:
+            self.pending.put_nowait(data)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        self.pending.put(None)
+
+    def run(self):
+        while True:
+            data = self.pending.get()
+            if data is None:
+                break
+            try:
+                self.node.pubsub.publish(self.node.publish_topic, data.serialize())
+                self.published += 1
+            except Exception as e:
+                self.dropped += 1
+                self.node.logger.error(f"Failed to publish a frame of {data.sensor_name}: {e}")
+
+
+class MultiRTSPSourceNode(SourceNode):
+    """
+    An RTSP source node for many cameras in one process. Every camera is decoded on its own thread, and all of them
+    share the node's pub/sub connection, one publisher thread and one reconnect scheduler. Frames of all cameras go
+    to the same topic, each tagged with the ``sensor_name`` of its camera.
+    """
+
+    default_configs = NodeConfig(
+        publish_topic_data_type=ImageData
+    )
+
+    def __init__(self, configs, cameras, rtsp_transport="tcp", resize_ratio=None, timeout=5.0, threads=1,
+                 max_pending=64, stats_interval=30.0):
+        """
+        :param cameras: dict of sensor name to RTSP url
+        :param timeout: seconds without data after which a camera is reconnected
+        :param threads: decoder threads per camera
+        :param max_pending: frames waiting to be published before new frames are dropped
+        :param stats_interval: seconds between two stats logs, 0 to disable them
+        """
+        super().__init__(configs)
+        self.scheduler = ReconnectScheduler()
+        self.publisher = SharedPublisher(self, max_pending=max_pending)
+        self.streams = [
+            CameraStream(sensor_name, url, self.scheduler, self.on_frame, self.logger, gap=self.gap,
+                         resize_ratio=resize_ratio, rtsp_transport=rtsp_transport, timeout=timeout, threads=threads)
+            for sensor_name, url in cameras.items()
+        ]
+        self.stats_interval = stats_interval
+        self._next_stats = 0.0
+
+    def on_before_spin(self):
+        self.publisher.start()
+        for stream in self.streams:
+            stream.start()
+        self.logger.info(f"Decoding {len(self.streams)} cameras: {', '.join(s.sensor_name for s in self.streams)}")
+        self._next_stats = time.time() + self.stats_interval
+
+    def on_frame(self, stream, image, capture_timestamp):
+        # runs on the thread of the camera, the JPEG encoding in from_ndarray runs in parallel with the other cameras
+        data = ImageData.from_ndarray(
+            image=image,
+            sensor_name=stream.sensor_name,
+            capture_timestamp=capture_timestamp,
+            creation_timestamp=time.time(),
+        )
+        data = self.post_process(data)
+        self.on_before_publish(data)
+        self.publisher.put(data)
+
+    def iterate(self):
+        # the cameras publish on their own threads, the main loop only keeps the heartbeat and the stats going
+        time.sleep(1.0)
+        if self.stats_interval > 0 and time.time() >= self._next_stats:
+            self.log_stats()
+            self._next_stats = time.time() + self.stats_interval
+
+    def stats(self):
+        """Per camera: frames published, reconnects and whether it is connected. Plus the publisher counters."""
+        return {
+            "cameras": {s.sensor_name: {"frames": s.frames, "reconnects": s.reconnects, "connected": s.connected}
+                        for s in self.streams},
+            "published": self.publisher.published,
+            "dropped": self.publisher.dropped,
+            "pending": self.publisher.pending.qsize(),
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        cameras = ", ".join(f"{name} {c['frames']} frames, {c['reconnects']} reconnects{'' if c['connected'] else ', down'}"
+                            for name, c in stats["cameras"].items())
+        self.logger.info(f"Published {stats['published']}, dropped {stats['dropped']}, pending {stats['pending']}. {cameras}")
+
+    def on_unregister(self):
+        for stream in self.streams:
+            stream.stop()
+        self.publisher.stop()
+        super().on_unregister()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Launch one RTSP source node for many cameras.")
+    parser.add_argument("-n", "--name", required=True, help="The name of the source node.")
+    parser.add_argument("-pt", "--publish-topic", required=True, help="The topic to publish the image data of all cameras to.")
+    parser.add_argument("-c", "--camera", nargs=2, action="append", required=True, metavar=("SENSOR_NAME", "URL"),
+                        help="A camera, its sensor name and the url of its RTSP stream. Repeat it for every camera.")
+    parser.add_argument("-g", "--gap", type=int, default=0, help="Frames skipped between two published frames of a camera.")
+    parser.add_argument("-r", "--resize-ratio", type=float, default=None, help="The ratio to resize the images.")
+    parser.add_argument("--rtsp-transport", default="tcp", choices=["tcp", "udp"], help="The RTSP transport protocol.")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Seconds without data after which a camera is reconnected.")
+    parser.add_argument("--threads", type=int, default=1, help="Decoder threads per camera, 0 lets libav choose.")
+    args = parser.parse_args()
+
+    cameras = dict(args.camera)
+    if len(cameras) != len(args.camera):
+        parser.error("every camera needs its own sensor name")
+    config = NodeConfig(
+        name=args.name,
+        publish_topic_name=args.publish_topic,
+        gap=args.gap,
+    )
+    node = MultiRTSPSourceNode(config, cameras, rtsp_transport=args.rtsp_transport, resize_ratio=args.resize_ratio,
+                               timeout=args.timeout, threads=args.threads)
+    node.spin()
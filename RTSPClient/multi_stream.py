@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+
+import av
+
+from fast_decode import FastDecoder
+
+
+class ReconnectScheduler:
+    """
+    Decides when the streams of a process (re)connect.
+
+    After each failure, a stream waits an exponential backoff with jitter, from ``initial`` up to ``maximum``
+    seconds, and a successful read resets it. On top of that, two connections of the process are always at least
+    ``spacing`` seconds apart: when a site switch reboots, its cameras are not all reconnected at the same instant.
+    """
+
+    def __init__(self, initial=1.0, maximum=60.0, spacing=0.5):
+        self.initial = initial
+        self.maximum = maximum
+        self.spacing = spacing
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._failures = {}
+
+    def backoff(self, name):
+        failures = self._failures.get(name, 0)
+        if failures == 0:
+            return 0.0
+        delay = min(self.maximum, self.initial * 2 ** (failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def wait(self, name, stop_event):
+        """
+        Blocks until stream ``name`` may connect.
+        :return: False when ``stop_event`` was set while waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now + self.backoff(name), self._next_slot)
+            self._next_slot = slot + self.spacing
+        return not stop_event.wait(slot - now)
+
+    def failed(self, name):
+        with self._lock:
+            self._failures[name] = self._failures.get(name, 0) + 1
+
+    def succeeded(self, name):
+        with self._lock:
+            self._failures.pop(name, None)
+
+
+class CameraStream(threading.Thread):
+    """
+    Decodes one RTSP stream on its own thread, with a ``FastDecoder``, and hands every frame to ``on_frame``.
+    Connection errors, timeouts and errors raised by ``on_frame`` are logged, and the stream reconnects when the
+    scheduler allows it.
+    """
+
+    def __init__(self, sensor_name, url, scheduler, on_frame, logger, gap=0, resize_ratio=None, rtsp_transport="tcp",
+                 timeout=5.0, threads=1):
+        """
+        :param on_frame: called on this thread with the stream, the BGR frame and its capture timestamp
+        :param timeout: seconds without data after which the connection counts as lost
+        :param threads: decoder threads of this stream, keep it low when a process decodes many streams
+        """
+        super().__init__(name=f"camera-{sensor_name}", daemon=True)
+        self.sensor_name = sensor_name
+        self.url = url
+        self.scheduler = scheduler
+        self.on_frame = on_frame
+        self.logger = logger
+        self.decoder = FastDecoder(
+            url,
+            gap=gap,
+            resize_ratio=resize_ratio,
+            # the RTSP timeout is in microseconds
+            options={"rtsp_transport": rtsp_transport, "max_delay": "0", "timeout": str(int(timeout * 1e6))},
+            threads=threads,
+        )
+        self.frames = 0
+        self.reconnects = 0
+        self.connected = False
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while self.scheduler.wait(self.sensor_name, self._stop_event):
+            try:
+                self.decoder.open()
+                while not self._stop_event.is_set():
+                    image, capture_timestamp = self.decoder.read()
+                    if not self.connected:
+                        self.connected = True
+                        self.scheduler.succeeded(self.sensor_name)
+                        self.logger.info(f"Receiving frames from {self.sensor_name}")
+                    self.frames += 1
+                    self.on_frame(self, image, capture_timestamp)
+                break
+            except Exception as e:
+                self.connected = False
+                self.reconnects += 1
+                self.scheduler.failed(self.sensor_name)
+                if isinstance(e, (av.FFmpegError, OSError)):
+                    self.logger.warning(f"Lost {self.sensor_name} ({self.url}): {e}")
+                else:
+                    # an error of on_frame or an unexpected decoder error must not end the thread of the camera
+                    self.logger.exception(f"Error on {self.sensor_name} ({self.url}), reconnecting")
+            finally:
+                self.decoder.close()
@@ -0,0 +1,116 @@
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import av
+import cv2
+import imageio.v3 as iio
+
+from segment_encoder import Segment, SegmentEncoder
+
+
+def frames(url, count):
+    """BGR frames of ``url``, as the aggregator gets them from ``ImageData.decoded_image``."""
+    with av.open(url) as container:
+        for index, frame in enumerate(container.decode(video=0)):
+            if index == count:
+                return
+            yield frame.to_ndarray(format="bgr24")
+
+
+def check_duration(video, frames, fps):
+    """Checks that a segment of ``frames`` frames plays for ``frames / fps`` seconds."""
+    with av.open(io.BytesIO(video)) as container:
+        stream = container.streams.video[0]
+        duration = float(stream.duration * stream.time_base)
+    assert abs(duration - frames / fps) < 0.5 / fps, f"segment of {frames} frames lasts {duration:.3f} s at {fps} fps"
+
+
+class BufferThenEncode:
+    """What ImageToVideoAggregatorNode does: buffer the raw frames, and encode them all once the buffer is full."""
+
+    def __init__(self, fps, codec, buffer_size, overlap_size):
+        self.fps = fps
+        self.codec = codec
+        self.buffer_size = buffer_size
+        self.overlap_size = overlap_size
+        self.frames = []
+
+    def add(self, image, capture_timestamp, frame_id=None):
+        self.frames.append(image)
+        if len(self.frames) < self.buffer_size:
+            return []
+        rgb = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in self.frames]
+        video = iio.imwrite("<bytes>", rgb, fps=self.fps, codec=self.codec, extension=".mp4")
+        self.frames = self.frames[-self.overlap_size:] if self.overlap_size > 0 else []
+        return [video]
+
+    def flush(self):
+        # the frames left in the buffer are never encoded
+        return []
+
+
+def worker(args):
+    if args.mode == "buffer":
+        aggregator = BufferThenEncode(args.fps, args.codec, args.buffer_size, args.overlap_size)
+    else:
+        aggregator = SegmentEncoder(args.fps, args.codec, segment_size=args.buffer_size, overlap_size=args.overlap_size)
+    steps = []
+    segments = []
+    cpu = time.process_time()
+    for index, image in enumerate(frames(args.url, args.frames)):
+        start = time.perf_counter()
+        segments += aggregator.add(image, time.time(), index)
+        steps.append(time.perf_counter() - start)
+    # the last segment of the streaming encoder waits for the frames after it, or for the flush at shutdown
+    segments += aggregator.flush()
+    # only count full segments, not the rest the flush finishes
+    segments = [s for s in segments if not isinstance(s, Segment) or len(s.frame_ids) == args.buffer_size]
+    for segment in segments:
+        check_duration(segment.video if isinstance(segment, Segment) else segment, args.buffer_size, args.fps)
+    # imageio runs ffmpeg in a child process
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = time.process_time() - cpu + children.ru_utime + children.ru_stime
+    steps.sort()
+    print(json.dumps({
+        "segments": len(segments),
+        "size": sum(len(s.video if isinstance(s, Segment) else s) for s in segments) / max(1, len(segments)),
+        "cpu": cpu,
+        "p50": steps[len(steps) // 2],
+        "max": steps[-1],
+        # maximum resident set sizes in KB on Linux, of this process and of the largest ffmpeg process
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + children.ru_maxrss,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare buffer then encode with the streaming segment encoder.")
+    parser.add_argument("-u", "--url", default="sample.mp4", help="The video the frames are taken from.")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to aggregate.")
+    parser.add_argument("--fps", type=int, default=10, help="Frame rate of the output videos.")
+    parser.add_argument("--buffer-size", type=int, default=100, help="Frames per video.")
+    parser.add_argument("--overlap-size", type=int, default=0, help="Frames shared by two consecutive videos.")
+    parser.add_argument("--codec", default="libx265", help="The codec of the output videos.")
+    parser.add_argument("--mode", choices=["buffer", "streaming"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        worker(args)
+        return
+    print(f"  {args.frames} frames of {args.url}, {args.codec}, buffer size {args.buffer_size}, overlap size {args.overlap_size}")
+    print(f"  {'aggregator':<20s}{'segments':>9s}{'CPU':>10s}{'median step':>14s}{'longest step':>15s}{'peak memory':>14s}{'segment size':>15s}")
+    for mode, name in [("buffer", "buffer then encode"), ("streaming", "streaming")]:
+        # every mode in its own process, for its own peak memory
+        output = subprocess.run([sys.executable, __file__, "--mode", mode] + sys.argv[1:],
+                                capture_output=True, text=True, check=True).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"  {name:<20s}{r['segments']:9d}{r['cpu']:8.1f} s{r['p50'] * 1000:11.1f} ms{r['max'] * 1000:12.0f} ms"
+              f"{r['peak_rss'] / 1024:11.0f} MB{r['size'] / 1024:12.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import os
+import time
+
+import av
+from msight_core.data import ImageData
+
+from encoder_pool import EncoderPool, encode_segment
+
+
+def load_images(url, count, resize_ratio):
+    """JPEG ``ImageData`` as the RTSP node publishes them."""
+    images = []
+    with av.open(url) as container:
+        for frame in container.decode(video=0):
+            if len(images) == count:
+                break
+            width, height = round(frame.width * resize_ratio), round(frame.height * resize_ratio)
+            images.append(ImageData.from_ndarray(frame.to_ndarray(format="bgr24", width=width, height=height), "camera"))
+    return images
+
+
+def run_serial(images, args):
+    """Every segment encoded one after the other, as on the thread of the node."""
+    start = time.perf_counter()
+    for _ in range(args.sensors * args.segments):
+        encode_segment(images, args.fps, codec=args.codec)
+    return time.perf_counter() - start, None
+
+
+def run_pool(images, args, processes):
+    delivered = {}
+
+    def on_result(sensor_name, index, video):
+        delivered.setdefault(sensor_name, []).append(index)
+
+    pool = EncoderPool(on_result, processes=processes)
+    # start the workers before the clock
+    pool.start()
+    start = time.perf_counter()
+    max_pending = 0
+    for index in range(args.segments):
+        for sensor in range(args.sensors):
+            pool.submit(f"camera_{sensor}", encode_segment, images, args.fps, codec=args.codec, context=index)
+            max_pending = max(max_pending, pool.stats()["pending"])
+    pool.shutdown()
+    elapsed = time.perf_counter() - start
+    assert all(indexes == list(range(args.segments)) for indexes in delivered.values()), "segments out of order"
+    return elapsed, dict(pool.stats(), max_pending=max_pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare encoding video segments on one thread and in an encoder pool.")
+    parser.add_argument("-u", "--url", default="sample.mp4", help="The video the frames are taken from.")
+    parser.add_argument("--sensors", type=int, default=4, help="Cameras feeding the aggregator.")
+    parser.add_argument("--segments", type=int, default=3, help="Segments per camera.")
+    parser.add_argument("--buffer-size", type=int, default=50, help="Frames per segment.")
+    parser.add_argument("-r", "--resize-ratio", type=float, default=0.5, help="The ratio to resize the frames.")
+    parser.add_argument("--fps", type=int, default=10, help="Frame rate of the output videos.")
+    parser.add_argument("--codec", default="libx264", help="The codec of the output videos.")
+    parser.add_argument("--processes", type=int, nargs="+", default=sorted({1, os.cpu_count()}),
+                        help="Pool sizes to measure, default is 1 and the number of cores.")
+    args = parser.parse_args()
+
+    images = load_images(args.url, args.buffer_size, args.resize_ratio)
+    total = args.sensors * args.segments
+    print(f"  {args.sensors} cameras, {args.segments} segments of {args.buffer_size} frames each, {args.codec}, {os.cpu_count()} cores")
+    print(f"  {'encoder':<22s}{'segments/s':>11s}{'mean wait':>12s}{'mean encode':>14s}{'max pending':>13s}")
+    elapsed, _ = run_serial(images, args)
+    print(f"  {'node thread':<22s}{total / elapsed:11.2f}")
+    for processes in args.processes:
+        elapsed, stats = run_pool(images, args, processes)
+        print(f"  {f'pool, {processes} processes':<22s}{total / elapsed:11.2f}{stats['mean_wait_seconds']:10.2f} s"
+              f"{stats['mean_encode_seconds']:12.2f} s{stats['max_pending']:13d}")
+
+
+if __name__ == "__main__":
+    main()
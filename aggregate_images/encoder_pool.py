@@ -0,0 +1,162 @@
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fractions import Fraction
+
+import av
+
+logger = logging.getLogger(__name__)
+
+
+def encode_segment(images, fps, codec="libx265", options=None):
+    """
+    Decodes a batch of ``ImageData`` and encodes it into an MP4 video. Runs in a worker process of the pool.
+    :return: the MP4 bytes
+    """
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format="mp4") as container:
+        stream = None
+        for data in images:
+            image = data.decoded_image
+            if stream is None:
+                height, width = image.shape[:2]
+                stream = container.add_stream(codec, rate=fps, options=options or {})
+                # yuv420p needs an even size
+                stream.width, stream.height, stream.pix_fmt = width - width % 2, height - height % 2, "yuv420p"
+                stream.time_base = Fraction(1, fps)
+            frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+            frame = frame.reformat(width=stream.width, height=stream.height, format="yuv420p")
+            container.mux(stream.encode(frame))
+        if stream is not None:
+            container.mux(stream.encode(None))
+    return buffer.getvalue()
+
+
+def _timed(submitted, fn, args, kwargs):
+    """Runs a job in a worker process. :return: (result of the job, seconds it waited for a worker, seconds it ran)"""
+    start = time.time()
+    result = fn(*args, **kwargs)
+    return result, start - submitted, time.time() - start
+
+
+class EncoderPool:
+    """
+    Runs jobs, like ``encode_segment``, in a bounded pool of processes, and hands their results to ``on_result`` in
+    submission order for each key, while jobs of the same key may run in parallel.
+
+    At most ``max_pending`` jobs are queued, running or waiting for their callback. ``submit`` blocks while the pool is
+    full, so a node that produces batches faster than the pool encodes and publishes them slows down, instead of
+    queuing frames without bound.
+    """
+
+    def __init__(self, on_result, processes=None, max_pending=None, on_error=None):
+        """
+        :param on_result: called with the key, the context given to ``submit`` and the result of each job. It runs on
+            a delivery thread of the pool, never for two jobs of the same key at once.
+        :param processes: worker processes, default is one per core
+        :param max_pending: jobs queued, running or waiting for their callback, default is twice the number of
+            processes
+        :param on_error: called with the key, the context and the exception of a failed job
+        """
+        # spawn, the node has threads running which fork would copy in an unknown state
+        self.processes = processes or os.cpu_count()
+        self.executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+        self.max_pending = max_pending or 2 * self.processes
+        self._delivery = ThreadPoolExecutor(max_workers=self.processes, thread_name_prefix="encoder-pool-delivery")
+        self.on_result = on_result
+        self.on_error = on_error
+        self._slots = threading.Semaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._next_sequence = {}  # key -> sequence number of the next job submitted
+        self._next_delivery = {}  # key -> sequence number of the next job to deliver
+        self._done = {}  # (key, sequence number) -> (context, result, exception), finished but not delivered
+        self._pending = {}  # key -> jobs submitted and not delivered
+        self._delivering = set()  # keys whose results a callback thread is delivering
+        self.completed = 0
+        self.failed = 0
+        self.blocked_seconds = 0.0
+        self.wait_seconds = []
+        self.encode_seconds = []
+
+    def start(self):
+        """Starts the worker processes, which otherwise start with the first job and add their start-up to its wait."""
+        self.executor.submit(time.sleep, 0).result()
+
+    def submit(self, key, fn, *args, context=None, **kwargs):
+        start = time.time()
+        self._slots.acquire()
+        self.blocked_seconds += time.time() - start
+        with self._lock:
+            sequence = self._next_sequence.get(key, 0)
+            self._next_sequence[key] = sequence + 1
+            self._next_delivery.setdefault(key, 0)
+            self._pending[key] = self._pending.get(key, 0) + 1
+        future = self.executor.submit(_timed, time.time(), fn, args, kwargs)
+        future.add_done_callback(lambda f: self._on_done(key, sequence, context, f))
+
+    def _on_done(self, key, sequence, context, future):
+        exception = future.exception()
+        with self._lock:
+            self._done[(key, sequence)] = (context, None if exception else future.result(), exception)
+            if key in self._delivering:
+                # the thread delivering this key picks the job up once the jobs before it are delivered
+                return
+            self._delivering.add(key)
+        # delivered on threads of their own: this runs on the thread which collects the results of every worker
+        self._delivery.submit(self._deliver, key)
+
+    def _deliver(self, key):
+        """Hands the finished jobs of ``key`` to the callbacks in submission order, until one is still running."""
+        while True:
+            with self._lock:
+                done = self._done.pop((key, self._next_delivery[key]), None)
+                if done is None:
+                    self._delivering.discard(key)
+                    return
+                self._next_delivery[key] += 1
+                self._pending[key] -= 1
+                context, result, exception = done
+                if exception is not None:
+                    self.failed += 1
+                else:
+                    result, waited, ran = result
+                    self.completed += 1
+                    self.wait_seconds.append(waited)
+                    self.encode_seconds.append(ran)
+                    del self.wait_seconds[:-1000], self.encode_seconds[:-1000]
+            # the callbacks run without the lock, a slow one only holds back its own key, and they may call stats()
+            try:
+                if exception is None:
+                    self.on_result(key, context, result)
+                elif self.on_error is not None:
+                    self.on_error(key, context, exception)
+            except Exception:
+                logger.exception(f"Exception in the result callback of {key}")
+            finally:
+                self._slots.release()
+
+    def stats(self):
+        """Queue depth in total and per key, and wait and encode times of the last 1000 jobs."""
+        with self._lock:
+            pending = {key: count for key, count in self._pending.items() if count}
+            encode_seconds, wait_seconds = list(self.encode_seconds), list(self.wait_seconds)
+        return {
+            "pending": sum(pending.values()),
+            "pending_per_key": pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "blocked_seconds": self.blocked_seconds,
+            "mean_wait_seconds": sum(wait_seconds) / len(wait_seconds) if wait_seconds else 0.0,
+            "mean_encode_seconds": sum(encode_seconds) / len(encode_seconds) if encode_seconds else 0.0,
+            "max_encode_seconds": max(encode_seconds, default=0.0),
+        }
+
+    def shutdown(self):
+        """Waits for the jobs submitted so far to be delivered."""
+        # every job is handed to the delivery threads before the worker processes are shut down
+        self.executor.shutdown(wait=True)
+        self._delivery.shutdown(wait=True)
@@ -0,0 +1,103 @@
+import argparse
+import time
+
+from msight_core.data import VideoData
+from msight_core.nodes import ImageToVideoAggregatorNode, NodeConfig
+
+from encoder_pool import EncoderPool, encode_segment
+
+
+class PooledImageToVideoAggregatorNode(ImageToVideoAggregatorNode):
+    """
+    The image to video aggregator, with segments encoded by a pool of processes instead of a thread of the node.
+    The node only buffers the received ``ImageData``, each full buffer is decoded and encoded by a worker process,
+    and the videos of each sensor are published in the order of their frames.
+    """
+
+    def __init__(self, configs, buffer_size, overlap_size, fps=30, codec="libx265", processes=None, max_pending=None,
+                 options=None, stats_interval=30.0):
+        """
+        :param processes: encoder processes, default is one per core
+        :param max_pending: segments queued or encoding before the node waits, default is twice the processes
+        :param options: encoder options, for example ``{"preset": "fast"}``
+        :param stats_interval: seconds between two stats logs, 0 to disable them
+        """
+        super().__init__(configs, buffer_size, overlap_size, fps=fps, codec=codec)
+        self.options = options
+        self.pool = EncoderPool(self.publish_segment, processes=processes, max_pending=max_pending,
+                                on_error=self.on_encode_error)
+        self.stats_interval = stats_interval
+        self._next_stats = time.time() + stats_interval
+
+    def on_before_spin(self):
+        self.pool.start()
+
+    def aggregate(self, data, sensor_name):
+        # the frames are decoded by the encoder processes, the buffer of the base node holds them until then
+        pass
+
+    def pack_aggregated_data(self, sensor_name):
+        images = list(self.buffer[sensor_name])
+        context = ([d.capture_timestamp for d in images], [d.frame_id for d in images])
+        self.pool.submit(sensor_name, encode_segment, images, self.fps, codec=self.codec, options=self.options,
+                         context=context)
+        # published by publish_segment once encoded
+        return None
+
+    def publish_segment(self, sensor_name, context, video_bytes):
+        timestamps, frame_ids = context
+        self.logger.info(f"Packed video data for sensor: {sensor_name}, size: {len(video_bytes)} bytes")
+        self.publish(VideoData(
+            video=video_bytes,
+            capture_timestamps=timestamps,
+            sensor_name=sensor_name,
+            frame_ids=frame_ids,
+        ))
+
+    def on_encode_error(self, sensor_name, context, exception):
+        self.logger.error(f"Failed to encode a video for sensor: {sensor_name}, {len(context[1])} frames lost: {exception}")
+
+    def process(self, data):
+        result = super().process(data)
+        if self.stats_interval > 0 and time.time() >= self._next_stats:
+            self.log_stats()
+            self._next_stats = time.time() + self.stats_interval
+        return result
+
+    def log_stats(self):
+        stats = self.pool.stats()
+        self.logger.info(
+            f"Encoder pool: {stats['pending']} segments pending {stats['pending_per_key']}, {stats['completed']} done, "
+            f"{stats['failed']} failed, wait {stats['mean_wait_seconds']:.2f} s, encode {stats['mean_encode_seconds']:.2f} s "
+            f"(max {stats['max_encode_seconds']:.2f} s), node blocked {stats['blocked_seconds']:.1f} s in total")
+
+    def on_unregister(self):
+        # publish the segments still in the pool
+        self.pool.shutdown()
+        super().on_unregister()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Launch an image to video aggregator which encodes in a pool of processes.")
+    parser.add_argument("-n", "--name", required=True, help="The name of the aggregator node.")
+    parser.add_argument("-st", "--subscribe-topic", required=True, help="The topic of the images.")
+    parser.add_argument("-pt", "--publish-topic", required=True, help="The topic to publish the videos to.")
+    parser.add_argument("--fps", type=int, default=10, help="Frame rate of the output videos.")
+    parser.add_argument("--buffer-size", type=int, default=100, help="Frames per video.")
+    parser.add_argument("--overlap-size", type=int, default=0, help="Frames shared by two consecutive videos.")
+    parser.add_argument("--codec", default="libx265", help="The codec of the output videos.")
+    parser.add_argument("--preset", default=None, help="The encoder preset, for example veryfast.")
+    parser.add_argument("--processes", type=int, default=None, help="Encoder processes, default is one per core.")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="Segments queued or encoding before the node waits, default is twice the processes.")
+    args = parser.parse_args()
+
+    config = NodeConfig(
+        name=args.name,
+        subscribe_topic_name=args.subscribe_topic,
+        publish_topic_name=args.publish_topic,
+    )
+    node = PooledImageToVideoAggregatorNode(config, args.buffer_size, args.overlap_size, fps=args.fps, codec=args.codec,
+                                            processes=args.processes, max_pending=args.max_pending,
+                                            options={"preset": args.preset} if args.preset else None)
+    node.spin()
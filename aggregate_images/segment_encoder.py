@@ -0,0 +1,160 @@
+import io
+from collections import deque
+from fractions import Fraction
+
+import av
+
+
+class Segment:
+    """A finished video segment: the MP4 bytes, and the capture timestamp and frame id of each of its frames."""
+
+    def __init__(self, video, capture_timestamps, frame_ids):
+        self.video = video
+        self.capture_timestamps = capture_timestamps
+        self.frame_ids = frame_ids
+
+
+class _OpenSegment:
+    def __init__(self, start, start_time):
+        self.start = start  # encoder index of the first frame, a keyframe
+        self.start_time = start_time
+        self.end = None  # encoder index after the last frame, once the segment has all its frames
+
+
+class SegmentEncoder:
+    """
+    Encodes the frames of one sensor into MP4 segments as they arrive, instead of buffering the raw frames of a
+    segment and encoding them all at once.
+
+    The frames go into a single live encoder. Each frame is encoded when it arrives, so the CPU load follows the
+    frame rate. Only compressed packets are kept, so memory does not depend on the segment length. Every segment
+    starts with a forced keyframe. A finished segment is made by copying its packets into an MP4 container, without
+    re-encoding anything. Overlapping segments share their packets, so overlapping frames are encoded only once:
+    a new segment, and a new keyframe, starts every ``segment_size - overlap_size`` frames.
+
+    B-frames are disabled, so packets come out of the encoder in frame order, and a segment can be cut at any
+    keyframe.
+    """
+
+    def __init__(self, fps, codec="libx265", segment_size=100, overlap_size=0, max_seconds=None, options=None):
+        """
+        :param segment_size: frames per segment
+        :param overlap_size: frames shared by two consecutive segments
+        :param max_seconds: longest capture time span of a segment. When it is reached, the open segments are closed
+            early and the next frame starts a new segment. None to only cut segments by frame count.
+        :param options: encoder options, for example ``{"preset": "fast"}``
+        """
+        if overlap_size >= segment_size:
+            raise ValueError("Overlap size must be less than segment size.")
+        self.fps = fps
+        self.codec = codec
+        self.segment_size = segment_size
+        self.stride = segment_size - overlap_size
+        self.max_seconds = max_seconds
+        self.options = options or {}
+        self.encoder = None
+        self.width = None
+        self.height = None
+        self._index = 0
+        self._frames = deque()  # (index, capture timestamp, frame id) of the frames of the open segments
+        self._packets = deque()  # (index, is keyframe, bytes) of the encoded frames of the open segments
+        self._segments = []
+
+    def _open_encoder(self, width, height):
+        self.encoder = av.CodecContext.create(self.codec, "w")
+        # yuv420p needs an even size
+        self.width, self.height = width - width % 2, height - height % 2
+        self.encoder.width, self.encoder.height, self.encoder.pix_fmt = self.width, self.height, "yuv420p"
+        self.encoder.time_base = Fraction(1, self.fps)
+        self.encoder.framerate = Fraction(self.fps)
+        # keyframes are only where a segment starts, forced as IDR frames
+        self.encoder.gop_size = 10 * self.segment_size
+        self.encoder.max_b_frames = 0
+        self.encoder.options = {"forced-idr": "1", **self.options}
+        self.encoder.open()
+        self._index = 0
+
+    def add(self, image, capture_timestamp, frame_id=None):
+        """
+        Encode one BGR frame.
+        :return: list of the segments finished by this frame, usually empty
+        """
+        finished = []
+        height, width = image.shape[:2]
+        if self.encoder is not None and (width - width % 2, height - height % 2) != (self.width, self.height):
+            # the camera changed resolution, the segments so far are finished
+            finished += self.flush()
+        if (self.max_seconds is not None and self._segments
+                and capture_timestamp - self._segments[0].start_time >= self.max_seconds):
+            finished += self.flush()
+        if self.encoder is None:
+            self._open_encoder(width, height)
+
+        frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+        frame = frame.reformat(width=self.width, height=self.height, format="yuv420p")
+        frame.pts = self._index
+        newest = self._segments[-1] if self._segments else None
+        if newest is None or self._index - newest.start == self.stride:
+            self._segments.append(_OpenSegment(self._index, capture_timestamp))
+            frame.pict_type = av.video.frame.PictureType.I
+        self._frames.append((self._index, capture_timestamp, frame_id))
+        for segment in self._segments:
+            if segment.end is None and self._index + 1 - segment.start == self.segment_size:
+                segment.end = self._index + 1
+        self._index += 1
+
+        self._receive(self.encoder.encode(frame))
+        return finished + self._finish_segments()
+
+    def flush(self):
+        """
+        Drain the encoder and finish the open segments with the frames they have. The next frame starts a new encoder.
+        :return: list of the finished segments
+        """
+        if self.encoder is None:
+            return []
+        self._receive(self.encoder.encode(None))
+        for segment in self._segments:
+            if segment.end is None:
+                segment.end = self._index
+        finished = self._finish_segments()
+        self.encoder = None
+        self._frames.clear()
+        self._packets.clear()
+        return finished
+
+    def _receive(self, packets):
+        for packet in packets:
+            self._packets.append((packet.pts, packet.is_keyframe, bytes(packet)))
+
+    def _finish_segments(self):
+        encoded = self._packets[-1][0] + 1 if self._packets else 0
+        finished = []
+        while self._segments and self._segments[0].end is not None and self._segments[0].end <= encoded:
+            finished.append(self._mux(self._segments.pop(0)))
+        # what no open segment needs anymore
+        keep_from = self._segments[0].start if self._segments else self._index
+        while self._packets and self._packets[0][0] < keep_from:
+            self._packets.popleft()
+        while self._frames and self._frames[0][0] < keep_from:
+            self._frames.popleft()
+        return finished
+
+    def _mux(self, segment):
+        buffer = io.BytesIO()
+        with av.open(buffer, "w", format="mp4") as container:
+            stream = container.add_mux_stream(self.codec, rate=self.fps, width=self.width, height=self.height)
+            # the muxer picks its own stream time base, the packets keep the time base of the encoder
+            time_base = Fraction(1, self.fps)
+            for index, is_keyframe, data in self._packets:
+                if segment.start <= index < segment.end:
+                    packet = av.Packet(data)
+                    packet.pts = packet.dts = index - segment.start
+                    packet.time_base = time_base
+                    packet.duration = 1
+                    packet.is_keyframe = is_keyframe
+                    packet.stream = stream
+                    container.mux(packet)
+        frames = [(timestamp, frame_id) for index, timestamp, frame_id in self._frames
+                  if segment.start <= index < segment.end]
+        return Segment(buffer.getvalue(), [t for t, _ in frames], [i for _, i in frames])
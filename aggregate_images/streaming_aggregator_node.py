@@ -0,0 +1,78 @@
+import argparse
+
+from msight_core.data import VideoData
+from msight_core.nodes import ImageToVideoAggregatorNode, NodeConfig
+
+from segment_encoder import SegmentEncoder
+
+
+class StreamingImageToVideoAggregatorNode(ImageToVideoAggregatorNode):
+    """
+    The image to video aggregator, with one live ``SegmentEncoder`` per sensor instead of a buffer of raw frames.
+    Every frame is encoded as it arrives, and a segment is published as soon as its last frame is encoded.
+    """
+
+    def __init__(self, configs, buffer_size, overlap_size, fps=30, codec="libx265", max_seconds=None, options=None):
+        """
+        :param max_seconds: longest capture time span of a segment, for sensors publishing few or irregular frames
+        :param options: encoder options, for example ``{"preset": "fast"}``
+        """
+        super().__init__(configs, buffer_size, overlap_size, fps=fps, codec=codec)
+        if overlap_size >= buffer_size:
+            raise ValueError("Overlap size must be less than buffer size.")
+        self.max_seconds = max_seconds
+        self.options = options
+        self.encoders = {}  # sensor_name -> SegmentEncoder
+
+    def initialize(self, sensor_name):
+        self.encoders[sensor_name] = SegmentEncoder(self.fps, self.codec, segment_size=self.buffer_size,
+                                                    overlap_size=self.overlap_size, max_seconds=self.max_seconds,
+                                                    options=self.options)
+
+    def to_video_data(self, segment, sensor_name):
+        self.logger.info(f"Packed video data for sensor: {sensor_name}, {len(segment.frame_ids)} frames, size: {len(segment.video)} bytes")
+        return VideoData(
+            video=segment.video,
+            capture_timestamps=segment.capture_timestamps,
+            sensor_name=sensor_name,
+            frame_ids=segment.frame_ids,
+        )
+
+    def process(self, data):
+        sensor_name = data.sensor_name
+        if sensor_name not in self.encoders:
+            self.initialize(sensor_name)
+        segments = self.encoders[sensor_name].add(data.decoded_image, data.capture_timestamp, data.frame_id)
+        return [self.to_video_data(segment, sensor_name) for segment in segments] or None
+
+    def on_unregister(self):
+        # publish what the open segments have so far
+        for sensor_name, encoder in self.encoders.items():
+            segments = encoder.flush()
+            if segments:
+                self.publish([self.to_video_data(segment, sensor_name) for segment in segments])
+        super().on_unregister()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Launch an image to video aggregator which encodes the frames as they arrive.")
+    parser.add_argument("-n", "--name", required=True, help="The name of the aggregator node.")
+    parser.add_argument("-st", "--subscribe-topic", required=True, help="The topic of the images.")
+    parser.add_argument("-pt", "--publish-topic", required=True, help="The topic to publish the videos to.")
+    parser.add_argument("--fps", type=int, default=10, help="Frame rate of the output videos.")
+    parser.add_argument("--buffer-size", type=int, default=100, help="Frames per video.")
+    parser.add_argument("--overlap-size", type=int, default=0, help="Frames shared by two consecutive videos.")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Longest capture time span of a video.")
+    parser.add_argument("--codec", default="libx265", help="The codec of the output videos.")
+    parser.add_argument("--preset", default=None, help="The encoder preset, for example veryfast.")
+    args = parser.parse_args()
+
+    config = NodeConfig(
+        name=args.name,
+        subscribe_topic_name=args.subscribe_topic,
+        publish_topic_name=args.publish_topic,
+    )
+    node = StreamingImageToVideoAggregatorNode(config, args.buffer_size, args.overlap_size, fps=args.fps,
+                                               codec=args.codec, max_seconds=args.max_seconds,
+                                               options={"preset": args.preset} if args.preset else None)
+    node.spin()
@@ -0,0 +1,78 @@
+import argparse
+import importlib.util
+import time
+from pathlib import Path
+
+import numpy as np
+from msight_core.data import ImageData, PointCloudData
+
+from codec import BinaryCodec
+from data import FrameData, PointsData
+
+
+def load_traffic_light_command_data():
+    """``TrafficLightCommandData`` of the custom data type tutorial, untouched, its module is also named ``data``."""
+    path = Path(__file__).resolve().parent.parent / "bring_your_own_node_custom_data" / "data.py"
+    spec = importlib.util.spec_from_file_location("custom_data", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.TrafficLightCommandData
+
+
+def per_call(fn, min_time):
+    """Mean µs per call of ``fn``, repeated for at least ``min_time`` seconds."""
+    calls = 0
+    t0 = time.perf_counter()
+    while True:
+        for _ in range(10):
+            fn()
+        calls += 10
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            return elapsed * 1e6 / calls
+
+
+def bench(message, encode, decode, min_time):
+    """:return: µs to encode, µs to decode, message size in bytes"""
+    payload = encode(message)
+    return per_call(lambda: encode(message), min_time), per_call(lambda: decode(payload), min_time), len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the binary codec against the msgpack serialization of MSight data types.")
+    parser.add_argument("--points", type=int, default=100000, help="Points of the lidar sweep.")
+    parser.add_argument("--width", type=int, default=1280, help="Frame width.")
+    parser.add_argument("--height", type=int, default=546, help="Frame height.")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds spent on each measurement.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    points = np.zeros(args.points, dtype=[("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("intensity", "<f4")])
+    for name in points.dtype.names:
+        points[name] = rng.normal(size=args.points)
+
+    TrafficLightCommandData = load_traffic_light_command_data()
+    command = TrafficLightCommandData(sensor_name="CommandServerSourceSensor", command="NEXT_PHASE", traffic_state="GREEN")
+    command_codec = BinaryCodec(TrafficLightCommandData)
+    # (message type, msgpack message, binary message, binary encode, binary decode)
+    cases = [
+        ("TrafficLightCommandData", command, command, command_codec.encode_bytes, command_codec.decode),
+        ("ImageData raw / FrameData", ImageData.from_ndarray(frame, "camera", is_encoded=False),
+         FrameData(sensor_name="camera", image=frame), FrameData.serialize, FrameData.deserialize),
+        ("PointCloudData / PointsData", PointCloudData.from_ndarray(points, "lidar"),
+         PointsData(sensor_name="lidar", points=points), PointsData.serialize, PointsData.deserialize),
+    ]
+
+    print(f"  {'message type':<28s}{'codec':<9s}{'encode':>12s}{'decode':>12s}{'size':>12s}")
+    for name, message, binary_message, encode, decode in cases:
+        results = {
+            "msgpack": bench(message, type(message).serialize, type(message).deserialize, args.min_time),
+            "binary": bench(binary_message, encode, decode, args.min_time),
+        }
+        for codec, (encode_us, decode_us, size) in results.items():
+            print(f"  {name:<28s}{codec:<9s}{encode_us:9.1f} µs{decode_us:9.1f} µs{size / 1024:9.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
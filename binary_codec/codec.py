@@ -0,0 +1,208 @@
+import struct
+import typing
+import zlib
+from dataclasses import fields, is_dataclass
+from types import NoneType, UnionType
+
+import msgpack
+import numpy as np
+from msight_core.data import Data
+
+# magic, schema fingerprint, bitmask of the fields set to None, length of the variable section
+_HEADER = struct.Struct("<4sIQI")
+_MAGIC = b"MSB1"
+_LENGTH = struct.Struct("<I")
+# out-of-band buffers start on this boundary of the message
+_ALIGNMENT = 64
+
+_SCALARS = {float: "d", int: "q", bool: "?"}
+
+
+def _field_kind(typ):
+    """Wire kind of a field annotation: a struct code for scalars, "str", "bytes", "array", or "msgpack" for the rest."""
+    if typing.get_origin(typ) in (typing.Union, UnionType):
+        args = [arg for arg in typing.get_args(typ) if arg is not NoneType]
+        if len(args) != 1:
+            return "msgpack"
+        typ = args[0]
+    if typ in _SCALARS:
+        return _SCALARS[typ]
+    if typ is str:
+        return "str"
+    if typ is bytes:
+        return "bytes"
+    if typ is np.ndarray:
+        return "array"
+    return "msgpack"
+
+
+def _dtype_descr(dtype):
+    descr = np.lib.format.dtype_to_descr(dtype)
+    return descr if isinstance(descr, str) else [list(item) for item in descr]
+
+
+def _descr_dtype(descr):
+    return np.lib.format.descr_to_dtype(descr if isinstance(descr, str) else [tuple(item) for item in descr])
+
+
+class BinaryCodec:
+    """
+    Schema driven binary encoding of a ``Data`` dataclass, derived once from its fields.
+
+    Scalar fields (float, int, bool) are packed into one fixed layout struct, strings and bytes are length prefixed,
+    and ``np.ndarray`` fields are carried out-of-band: the message only holds their dtype and shape, the raw buffers
+    are appended after it, aligned, and decoded with ``np.frombuffer`` without a copy. Fields of any other type
+    (nested ``Data``, lists, dicts, tuples) fall back to msgpack, field by field.
+    """
+
+    def __init__(self, cls):
+        if not is_dataclass(cls):
+            raise TypeError(f"{cls.__name__} must be a dataclass")
+        try:
+            hints = typing.get_type_hints(cls)
+        except Exception:
+            hints = {}
+        self.cls = cls
+        self.types = {f.name: hints.get(f.name, f.type) for f in fields(cls)}
+        self.scalars = []
+        self.variables = []
+        for f in fields(cls):
+            codec = cls.__field_codecs__.get(f.name)
+            if codec is not None and codec.context:
+                raise TypeError(f"{cls.__name__}.{f.name} has a context field codec, use an np.ndarray field instead")
+            kind = "msgpack" if codec is not None else _field_kind(self.types[f.name])
+            (self.scalars if kind in _SCALARS.values() else self.variables).append((f.name, kind))
+        self.names = [name for name, _ in self.scalars + self.variables]
+        if len(self.names) > 64:
+            raise TypeError(f"{cls.__name__} has more than 64 fields")
+        self.fixed = struct.Struct("<" + "".join(kind for _, kind in self.scalars))
+        schema = f"{cls.__data_type__}:" + ",".join(f"{name}={kind}" for name, kind in self.scalars + self.variables)
+        self.fingerprint = zlib.crc32(schema.encode())
+
+    def _encode_field(self, name, value):
+        codec = self.cls.__field_codecs__.get(name)
+        if codec is not None:
+            value = codec.encode(value)
+        return msgpack.packb(self.cls._encode_value(value), use_bin_type=True)
+
+    def _decode_field(self, name, buffer):
+        value = msgpack.unpackb(buffer, raw=False)
+        codec = self.cls.__field_codecs__.get(name)
+        if codec is not None:
+            value = codec.decode(value)
+        return self.cls._decode_value(value, self.types[name])
+
+    def encode(self, data):
+        """
+        Encode a message without copying its arrays.
+        :return: list of buffers, the message is their concatenation
+        """
+        nulls = 0
+        values = []
+        for i, name in enumerate(self.names):
+            value = getattr(data, name)
+            if value is None:
+                nulls |= 1 << i
+            values.append(value)
+
+        scalars = [0 if value is None else value for value in values[:len(self.scalars)]]
+        variable = bytearray()
+        arrays = []
+        for (name, kind), value in zip(self.variables, values[len(self.scalars):]):
+            if value is None:
+                continue
+            if kind == "str":
+                payload = value.encode()
+            elif kind == "bytes":
+                payload = value
+            elif kind == "array":
+                if value.dtype.hasobject:
+                    raise TypeError(f"{name} holds Python objects, which cannot be sent as a raw buffer")
+                value = np.ascontiguousarray(value)
+                arrays.append(value)
+                payload = msgpack.packb([_dtype_descr(value.dtype), value.shape])
+            else:
+                payload = self._encode_field(name, value)
+            variable += _LENGTH.pack(len(payload))
+            variable += payload
+
+        parts = [_HEADER.pack(_MAGIC, self.fingerprint, nulls, len(variable)), self.fixed.pack(*scalars), variable]
+        size = _HEADER.size + self.fixed.size + len(variable)
+        for array in arrays:
+            padding = -size % _ALIGNMENT
+            parts.append(b"\0" * padding)
+            parts.append(array.reshape(-1).view(np.uint8).data)
+            size += padding + array.nbytes
+        return parts
+
+    def encode_bytes(self, data):
+        return b"".join(self.encode(data))
+
+    def decode(self, buffer):
+        """
+        Decode a message. The arrays are views of ``buffer``, read-only when it is ``bytes``, and keep it alive.
+        """
+        view = memoryview(buffer)
+        magic, fingerprint, nulls, variable_size = _HEADER.unpack_from(view, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not a binary codec message")
+        if fingerprint != self.fingerprint:
+            raise ValueError(f"Message schema {fingerprint:08x} does not match {self.cls.__name__} ({self.fingerprint:08x})")
+
+        kwargs = {}
+        for i, ((name, _), value) in enumerate(zip(self.scalars, self.fixed.unpack_from(view, _HEADER.size))):
+            kwargs[name] = None if nulls >> i & 1 else value
+        offset = _HEADER.size + self.fixed.size
+        end = offset + variable_size
+        for i, (name, kind) in enumerate(self.variables, len(self.scalars)):
+            if nulls >> i & 1:
+                kwargs[name] = None
+                continue
+            (length,) = _LENGTH.unpack_from(view, offset)
+            payload = view[offset + _LENGTH.size:offset + _LENGTH.size + length]
+            offset += _LENGTH.size + length
+            if kind == "str":
+                kwargs[name] = str(payload, "utf-8")
+            elif kind == "bytes":
+                kwargs[name] = payload.tobytes()
+            elif kind == "array":
+                descr, shape = msgpack.unpackb(payload)
+                dtype = _descr_dtype(descr)
+                end += -end % _ALIGNMENT
+                count = int(np.prod(shape))
+                kwargs[name] = np.frombuffer(view, dtype, count, end).reshape(shape)
+                end += count * dtype.itemsize
+            else:
+                kwargs[name] = self._decode_field(name, payload)
+        return self.cls(**kwargs)
+
+
+def _codec(cls):
+    # built on first use, ``@dataclass`` has not added the fields yet when ``__init_subclass__`` runs
+    codec = cls.__dict__.get("_binary_codec")
+    if codec is None:
+        codec = BinaryCodec(cls)
+        setattr(cls, "_binary_codec", codec)
+    return codec
+
+
+class BinaryCodecMixin:
+    """
+    Put in front of ``SensorData`` in the bases of a custom data type to send it with ``BinaryCodec`` instead of
+    msgpack. Nodes call ``serialize`` and ``deserialize`` as usual, but every node on the topic must import the type,
+    and subscribers must declare it as their ``subscribe_topic_data_type``.
+    """
+
+    def serialize(self):
+        return _codec(type(self)).encode_bytes(self)
+
+    @classmethod
+    def deserialize(cls, data):
+        codec = _codec(cls)
+        fingerprint = _HEADER.unpack_from(data, 0)[1]
+        if fingerprint != codec.fingerprint:
+            # a subscriber declared with a base class receiving one of its subclasses
+            for subclass in Data.__registry__.values():
+                if issubclass(subclass, cls) and _codec(subclass).fingerprint == fingerprint:
+                    return _codec(subclass).decode(data)
+        return codec.decode(data)
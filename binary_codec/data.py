@@ -0,0 +1,20 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from msight_core.data import SensorData
+
+from codec import BinaryCodecMixin
+
+
+@dataclass
+class FrameData(BinaryCodecMixin, SensorData):
+    """A raw camera frame, sent as an out-of-band buffer."""
+    image: Optional[np.ndarray] = field(repr=False, default=None)  # (height, width, 3) uint8 BGR frame
+
+
+@dataclass
+class PointsData(BinaryCodecMixin, SensorData):
+    """A lidar sweep, sent as an out-of-band buffer."""
+    points: Optional[np.ndarray] = field(repr=False, default=None)  # structured array of x, y, z, intensity
+    lidar_model: str = field(default="")  # Model of the lidar that produced the sweep
@@ -0,0 +1,44 @@
+import argparse
+
+from msight_core.nodes import NodeConfig
+from msight_core.data import BytesData
+
+from batched_udp import BatchedUdpServerSourceNode
+
+
+class BatchedCommandServerSourceNode(BatchedUdpServerSourceNode):
+    """CommandServerSourceNode for high packet rates, receiving and publishing the commands in batches."""
+
+    default_configs = NodeConfig(
+        publish_topic_data_type=BytesData,
+        heartbeat_tolerance=-1, # Disable heartbeat for server nodes
+    )
+
+    def on_message(self, raw_bytes: bytes):
+        """Translate raw bytes into MSight data, the batch is published by the node."""
+        if not raw_bytes:
+            return None
+        # debug level, one log line per datagram would cost more than the datagram itself
+        self.logger.debug(f"Received command bytes: {raw_bytes}")
+        return BytesData(
+            data=raw_bytes,
+            sensor_name=self.sensor_name,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Launch the command server source node in batched mode.")
+    parser.add_argument("--host", default="localhost", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=9999, help="UDP port to listen on.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Most datagrams read and published at once.")
+    parser.add_argument("--receive-buffer", type=int, default=4 * 1024 * 1024, help="Kernel receive buffer of the socket in bytes.")
+    args = parser.parse_args()
+
+    config = NodeConfig(
+        publish_topic_name="command_topic",
+        name="BatchedCommandServerSourceNode",
+        sensor_name="CommandServerSourceSensor",
+    )
+    node = BatchedCommandServerSourceNode(config, args.host, args.port, batch_size=args.batch_size,
+                                          receive_buffer=args.receive_buffer)
+    node.spin()
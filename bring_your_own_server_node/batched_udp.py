@@ -0,0 +1,167 @@
+import os
+import select
+import socket
+import sys
+import time
+
+from msight_core.nodes import ServerSourceNode
+
+
+def kernel_drops(sock):
+    """
+    Datagrams the kernel dropped for this socket because its receive buffer was full, read from ``/proc/net/udp``.
+    None where the counter is not available (not Linux).
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    inode = str(os.fstat(sock.fileno()).st_ino)
+    table = "/proc/net/udp6" if sock.family == socket.AF_INET6 else "/proc/net/udp"
+    try:
+        with open(table, "r") as f:
+            next(f)
+            for line in f:
+                columns = line.split()
+                if columns[9] == inode:
+                    return int(columns[-1])
+    except OSError:
+        pass
+    return None
+
+
+class BatchedUdpReceiver:
+    """
+    Drains a UDP socket in batches into preallocated buffers, on the calling thread.
+
+    ``receive`` waits until the socket is readable, then reads without blocking until the socket is empty or
+    ``batch_size`` datagrams were read. A burst of datagrams costs one wake-up, instead of one thread per datagram.
+    """
+
+    def __init__(self, sock, batch_size=64, max_datagram=2048):
+        self.sock = sock
+        self.sock.setblocking(False)
+        self.batch_size = batch_size
+        self.max_datagram = max_datagram
+        self._buffer = bytearray(batch_size * max_datagram)
+        self._views = [memoryview(self._buffer)[i * max_datagram:(i + 1) * max_datagram] for i in range(batch_size)]
+        # recvmsg_into reports truncated datagrams, it is missing on Windows
+        self._recvmsg = hasattr(sock, "recvmsg_into")
+        self.received = 0
+        self.truncated = 0
+        self.batches = 0
+
+    def receive(self, timeout=0.2):
+        """
+        :return: list of memoryviews of the datagrams, empty when none came within ``timeout`` seconds. The views
+            point into the preallocated buffers, they are only valid until the next call.
+        """
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        if not readable:
+            return []
+        batch = []
+        for view in self._views:
+            try:
+                if self._recvmsg:
+                    size, _, flags, _ = self.sock.recvmsg_into([view])
+                    if flags & socket.MSG_TRUNC:
+                        self.truncated += 1
+                        continue
+                else:
+                    size, _ = self.sock.recvfrom_into(view)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                # Windows reports a datagram larger than the buffer as an error
+                self.truncated += 1
+                continue
+            batch.append(view[:size])
+        if batch:
+            self.received += len(batch)
+            self.batches += 1
+        return batch
+
+
+class BatchedUdpServerSourceNode(ServerSourceNode):
+    """
+    A UDP server source node for high packet rates. A single receive loop drains the socket in batches, and every
+    batch is published with one ``publish`` call, instead of one thread per datagram and one more per publish.
+    Subclasses implement ``on_message`` as for any server source node, it receives the datagram as ``bytes``.
+    """
+
+    def __init__(self, configs, host, port, batch_size=64, max_datagram=2048, receive_buffer=4 * 1024 * 1024,
+                 stats_interval=10.0):
+        """
+        :param batch_size: most datagrams read and published at once
+        :param max_datagram: size of each preallocated buffer, longer datagrams are dropped and counted as truncated
+        :param receive_buffer: kernel receive buffer of the socket in bytes, which absorbs bursts while a batch is
+            processed (capped by ``net.core.rmem_max`` on Linux)
+        :param stats_interval: seconds between two stats logs, 0 to disable them
+        """
+        super().__init__(configs)
+        self._host = host
+        self._port = port
+        self.batch_size = batch_size
+        self.max_datagram = max_datagram
+        self.receive_buffer = receive_buffer
+        self.stats_interval = stats_interval
+        self.sock = None
+        self.receiver = None
+        self.published = 0
+
+    def initialize(self):
+        family = socket.AF_INET6 if ":" in self._host else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+        self.sock.bind((self._host, self._port))
+        self.receiver = BatchedUdpReceiver(self.sock, self.batch_size, self.max_datagram)
+        receive_buffer = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        self.logger.info(f"UDP server initialized on {self._host}:{self._port}, batches of {self.batch_size}, "
+                         f"receive buffer {receive_buffer} bytes")
+
+    def serve(self):
+        if self.receiver is None:
+            raise RuntimeError("Server is not initialized. Call initialize() first.")
+        self.logger.info("UDP server is now serving...")
+        next_stats = time.time() + self.stats_interval
+        try:
+            while True:
+                batch = self.receiver.receive()
+                if batch:
+                    self.handle_batch(batch)
+                if self.stats_interval > 0 and time.time() >= next_stats:
+                    self.log_stats()
+                    next_stats = time.time() + self.stats_interval
+        finally:
+            self.sock.close()
+
+    def handle_batch(self, batch):
+        """The batched ``handle_incoming``: the gap applies to every datagram, the publish to the whole batch."""
+        self.on_before_iteration()
+        messages = []
+        for datagram in batch:
+            if self.gap_counter.countdown():
+                data = self.on_message(bytes(datagram))
+                if data is not None:
+                    messages.append(data)
+        if messages:
+            self.publish(messages)
+            self.published += len(messages)
+        self.on_after_iteration()
+        if self.heartbeat_counter.countdown():
+            self.heartbeat()
+
+    def stats(self):
+        """Counters since the start: received, published, truncated and kernel dropped datagrams, and batches."""
+        return {
+            "received": self.receiver.received,
+            "published": self.published,
+            "truncated": self.receiver.truncated,
+            "kernel_drops": kernel_drops(self.sock),
+            "batches": self.receiver.batches,
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        mean_batch = stats["received"] / stats["batches"] if stats["batches"] else 0.0
+        self.logger.info(f"Received {stats['received']} datagrams in {stats['batches']} batches ({mean_batch:.1f} per batch), "
+                         f"published {stats['published']}, truncated {stats['truncated']}, kernel drops {stats['kernel_drops']}")
@@ -0,0 +1,138 @@
+import argparse
+import multiprocessing
+import socket
+import socketserver
+import threading
+import time
+
+from msight_core.data import BytesData
+
+from batched_udp import BatchedUdpReceiver, kernel_drops
+
+
+def load_generator(host, port, count, size, rate, done):
+    """Send ``count`` datagrams of ``size`` bytes, as fast as possible or at ``rate`` datagrams per second."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    payload = b"NEXT_PHASE".ljust(size, b".")
+    t0 = time.perf_counter()
+    for i in range(count):
+        if rate:
+            delay = t0 + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sock.sendto(payload, (host, port))
+    done.put(count / (time.perf_counter() - t0))
+    sock.close()
+
+
+def to_message(datagram):
+    """What CommandServerSourceNode.on_message does with a datagram."""
+    return BytesData(data=bytes(datagram), sensor_name="CommandServerSourceSensor")
+
+
+def publish(messages):
+    """What Node.publish does without the broker: serialize the messages on a new thread."""
+    def _publish():
+        for message in messages:
+            message.serialize()
+    threading.Thread(target=_publish, daemon=True).start()
+
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.received = 0
+        self.first = None
+        self.last = None
+
+    def add(self, count):
+        with self.lock:
+            now = time.perf_counter()
+            self.first = self.first or now
+            self.last = now
+            self.received += count
+
+
+def run_threading(sock_address, counter, stop):
+    """The CommandServerSourceNode design: a ThreadingUDPServer, one thread per datagram, one publish per datagram."""
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            publish([to_message(self.request[0])])
+            counter.add(1)
+
+    class Server(socketserver.ThreadingUDPServer):
+        allow_reuse_address = True
+
+    server = Server(sock_address, Handler)
+    threading.Thread(target=lambda: (stop.wait(), server.shutdown()), daemon=True).start()
+    return server.socket, lambda: (server.serve_forever(poll_interval=0.2), server.server_close())
+
+
+def run_batched(sock_address, counter, stop, batch_size):
+    """The BatchedUdpServerSourceNode design: one receive loop, one publish per batch."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(sock_address)
+    receiver = BatchedUdpReceiver(sock, batch_size)
+
+    def serve():
+        while not stop.is_set():
+            batch = receiver.receive(timeout=0.05)
+            if batch:
+                publish([to_message(datagram) for datagram in batch])
+                counter.add(len(batch))
+        sock.close()
+    return sock, serve
+
+
+def bench(mode, args):
+    address = ("127.0.0.1", args.port)
+    counter = Counter()
+    stop = threading.Event()
+    if mode == "threading":
+        sock, serve = run_threading(address, counter, stop)
+    else:
+        sock, serve = run_batched(address, counter, stop, args.batch_size)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, args.receive_buffer)
+    drops_before = kernel_drops(sock)
+    server_thread = threading.Thread(target=serve, daemon=True)
+    server_thread.start()
+
+    done = multiprocessing.Queue()
+    generator = multiprocessing.Process(target=load_generator, args=(address[0], address[1], args.datagrams, args.size, args.rate, done))
+    generator.start()
+    send_rate = done.get()
+    generator.join()
+    # let the server catch up with what is still queued
+    while True:
+        received = counter.received
+        time.sleep(0.5)
+        if counter.received == received:
+            break
+    drops = kernel_drops(sock)
+    drops = None if drops is None else drops - (drops_before or 0)
+    stop.set()
+    server_thread.join(timeout=5)
+    elapsed = (counter.last - counter.first) if counter.received > 1 else float("nan")
+    return send_rate, counter.received, counter.received / elapsed, drops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the thread per datagram UDP server with the batched receive loop under a local load generator.")
+    parser.add_argument("--datagrams", type=int, default=100000, help="Datagrams sent per run.")
+    parser.add_argument("--size", type=int, default=200, help="Datagram size in bytes.")
+    parser.add_argument("--rate", type=float, default=0, help="Datagrams per second sent, 0 for as fast as possible.")
+    parser.add_argument("--batch-size", type=int, default=64, help="Batch size of the batched receive loop.")
+    parser.add_argument("--receive-buffer", type=int, default=4 * 1024 * 1024, help="Kernel receive buffer of the server socket in bytes.")
+    parser.add_argument("--port", type=int, default=9998, help="Local UDP port used for the benchmark.")
+    args = parser.parse_args()
+
+    print(f"  {args.datagrams} datagrams of {args.size} bytes, {'as fast as possible' if not args.rate else f'{args.rate:.0f} per second'}")
+    for mode in ("threading", "batched"):
+        send_rate, received, receive_rate, drops = bench(mode, args)
+        print(f"  {mode:<10s} sent {send_rate:9.0f}/s  received {received:7d} ({received / args.datagrams:6.1%})  "
+              f"at {receive_rate:9.0f}/s  kernel drops {drops}")
+
+
+if __name__ == "__main__":
+    main()
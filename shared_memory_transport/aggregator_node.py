@@ -0,0 +1,34 @@
+import argparse
+
+from msight_core.nodes import ImageToVideoAggregatorNode, NodeConfig
+
+from data import ShmImageData  # registers the descriptor type, otherwise the messages cannot be deserialized
+from subscriber import ShmSubscriberMixin
+
+
+class ShmImageToVideoAggregatorNode(ShmSubscriberMixin, ImageToVideoAggregatorNode):
+    """The image to video aggregator, reading the frames from the shared memory ring of the publisher."""
+
+    default_configs = NodeConfig(
+        subscribe_topic_data_type=ShmImageData,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Launch an image to video aggregator subscribing to a shared memory topic.")
+    parser.add_argument("-n", "--name", default="shm_image_aggregator", help="The name of the aggregator node.")
+    parser.add_argument("-st", "--subscribe-topic", default="shm_images", help="The topic of the frame descriptors.")
+    parser.add_argument("-pt", "--publish-topic", default="aggregated_video", help="The topic to publish the videos to.")
+    parser.add_argument("--fps", type=int, default=10, help="Frame rate of the output videos.")
+    parser.add_argument("--buffer-size", type=int, default=100, help="Frames per video.")
+    parser.add_argument("--overlap-size", type=int, default=0, help="Frames shared by two consecutive videos.")
+    parser.add_argument("--codec", default="libx265", help="The codec of the output videos.")
+    args = parser.parse_args()
+
+    config = NodeConfig(
+        name=args.name,
+        subscribe_topic_name=args.subscribe_topic,
+        publish_topic_name=args.publish_topic,
+    )
+    node = ShmImageToVideoAggregatorNode(config, args.buffer_size, args.overlap_size, fps=args.fps, codec=args.codec)
+    node.spin()
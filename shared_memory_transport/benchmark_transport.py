@@ -0,0 +1,72 @@
+import argparse
+import time
+
+import numpy as np
+from msight_core.data import ImageData, SensorData
+
+from data import ShmImageData
+from shm_ring import ShmRingBuffer
+
+
+def bench(publish, subscribe, frames):
+    """
+    :param publish: frame -> message bytes, what the publisher does before handing a frame to the broker
+    :param subscribe: message bytes -> frame, what a subscriber does with a message from the broker
+    :return: ms per frame to publish, ms per frame to subscribe, bytes per message
+    """
+    publish_time = subscribe_time = size = 0
+    for frame in frames:
+        t0 = time.perf_counter()
+        message = publish(frame)
+        t1 = time.perf_counter()
+        subscribe(message)
+        t2 = time.perf_counter()
+        publish_time += t1 - t0
+        subscribe_time += t2 - t1
+        size += len(message)
+    return publish_time * 1000 / len(frames), subscribe_time * 1000 / len(frames), size / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the per frame cost of publishing images through the broker and through shared memory.")
+    parser.add_argument("--width", type=int, default=1280, help="Frame width.")
+    parser.add_argument("--height", type=int, default=546, help="Frame height.")
+    parser.add_argument("--frames", type=int, default=100, help="Frames per transport.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # a few distinct frames, so JPEG does not get to compress the same one over and over
+    sources = [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(4)]
+    frames = [sources[i % len(sources)] for i in range(args.frames)]
+
+    ring = ShmRingBuffer.create("msight_benchmark_transport", frames[0].nbytes)
+    reader = ShmRingBuffer.attach(ring.name)
+    try:
+        def shm_publish(frame):
+            slot, sequence = ring.write(frame)
+            return ShmImageData(sensor_name="camera", ring=ring.name, slot=slot, sequence=sequence,
+                                shape=frame.shape, dtype=frame.dtype.str).serialize()
+
+        def shm_subscribe(message):
+            data = SensorData.deserialize(message)
+            return reader.read(data.slot, data.sequence, data.shape, data.dtype)
+
+        transports = {
+            "jpeg (default)": (lambda frame: ImageData.from_ndarray(frame, "camera").serialize(),
+                               lambda message: SensorData.deserialize(message).to_ndarray()),
+            "raw": (lambda frame: ImageData.from_ndarray(frame, "camera", is_encoded=False).serialize(),
+                    lambda message: SensorData.deserialize(message).to_ndarray()),
+            "shared memory": (shm_publish, shm_subscribe),
+        }
+        print(f"  {args.width}x{args.height} frames, broker time not included, each subscriber adds its own subscribe cost")
+        for name, (publish, subscribe) in transports.items():
+            publish_ms, subscribe_ms, size = bench(publish, subscribe, frames)
+            print(f"  {name:<16s} publish {publish_ms:7.3f} ms  subscribe {subscribe_ms:7.3f} ms  message {size / 1024:9.1f} KB")
+        print(f"  shared memory frames lost: {reader.lost_frames}")
+    finally:
+        reader.close()
+        ring.close()
+
+
+if __name__ == "__main__":
+    main()
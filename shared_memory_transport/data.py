@@ -0,0 +1,14 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from msight_core.data import SensorData
+
+
+@dataclass
+class ShmImageData(SensorData):
+    """Descriptor of a frame left in the shared memory ring of its publisher, the pixels never go through the broker."""
+    ring: str = field(default="")  # Name of the shared memory block holding the frame
+    slot: int = field(default=0)  # Slot of the ring the frame was written to
+    sequence: int = field(default=0)  # Sequence number of the frame, the slot is stale once it changes
+    shape: Optional[tuple] = field(default=None)  # Shape of the frame, e.g. (546, 1280, 3)
+    dtype: str = field(default="|u1")  # NumPy dtype string of the frame
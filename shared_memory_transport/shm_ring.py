@@ -0,0 +1,137 @@
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# ring header: magic, number of slots, slot size in bytes, last written sequence
+_HEADER = struct.Struct("<8sQQQ")
+_MAGIC = b"MSRING01"
+# every slot starts with the sequence number of the frame it holds, 0 while it is being written
+_SLOT_HEADER = 64
+# blocks created by this process, already tracked for the unlink of their owner
+_created = set()
+
+
+def _attach(name):
+    """Attach to an existing block without letting this process unlink it when it exits."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # before Python 3.13 every attach is tracked, and the tracker would remove the block of the publisher
+        block = shared_memory.SharedMemory(name=name)
+        if name not in _created:
+            resource_tracker.unregister(block._name, "shared_memory")
+        return block
+
+
+class ShmRingBuffer:
+    """
+    A ring of fixed size frame slots in a POSIX shared memory block, written by one publisher and read by any number of
+    subscribers on the same host.
+
+    Each slot is guarded by its sequence number (a seqlock): the writer clears it before copying a frame in and sets it
+    to the new sequence once the copy is done. A reader copies the slot out and checks the sequence again afterwards,
+    so a frame overwritten while it was read is reported as lost instead of returned torn. The publisher never waits
+    for the subscribers, a subscriber falling more than ``num_slots`` frames behind loses the frames in between.
+    """
+
+    def __init__(self, block, owner):
+        self.block = block
+        self.owner = owner
+        magic, self.num_slots, self.slot_size, _ = _HEADER.unpack_from(block.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"Shared memory block {block.name} is not a frame ring")
+        self._stride = _SLOT_HEADER + self.slot_size
+        self._sequences = np.ndarray((self.num_slots,), np.uint64, buffer=block.buf, offset=_HEADER.size,
+                                     strides=(self._stride,))
+        self._last = np.ndarray((), np.uint64, buffer=block.buf, offset=_HEADER.size - 8)
+        self.written = 0
+        self.read_frames = 0
+        self.lost_frames = 0
+
+    @classmethod
+    def create(cls, name, slot_size, num_slots=8):
+        """
+        Create the ring of a publisher, replacing a stale block left with the same name by a crashed one.
+        :param name: name of the shared memory block, the subscribers attach to it by this name
+        :param slot_size: largest frame in bytes
+        :param num_slots: frames kept before the oldest one is overwritten
+        """
+        # keep every slot header 8 bytes aligned
+        slot_size = -(-slot_size // _SLOT_HEADER) * _SLOT_HEADER
+        size = _HEADER.size + num_slots * (_SLOT_HEADER + slot_size)
+        try:
+            block = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            block = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _HEADER.pack_into(block.buf, 0, _MAGIC, num_slots, slot_size, 0)
+        _created.add(name)
+        return cls(block, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach a subscriber to the ring of a publisher."""
+        return cls(_attach(name), owner=False)
+
+    @property
+    def name(self):
+        return self.block.name
+
+    def _payload(self, slot, nbytes):
+        offset = _HEADER.size + slot * self._stride + _SLOT_HEADER
+        return np.ndarray((nbytes,), np.uint8, buffer=self.block.buf, offset=offset)
+
+    def write(self, frame):
+        """
+        Copy a frame into the next slot.
+        :param frame: numpy array of at most ``slot_size`` bytes
+        :return: (slot, sequence), which a subscriber needs to read the frame back
+        """
+        if frame.nbytes > self.slot_size:
+            raise ValueError(f"Frame of {frame.nbytes} bytes does not fit the {self.slot_size} bytes slots of {self.name}")
+        sequence = int(self._last) + 1
+        slot = sequence % self.num_slots
+        self._sequences[slot] = 0
+        self._payload(slot, frame.nbytes)[...] = np.ascontiguousarray(frame).reshape(-1).view(np.uint8)
+        self._sequences[slot] = sequence
+        self._last[...] = sequence
+        self.written += 1
+        return slot, sequence
+
+    def read(self, slot, sequence, shape, dtype="|u1", copy=True):
+        """
+        Read a frame back.
+        :param copy: when False return a read-only view of the slot, only valid until the publisher wraps around to it
+        :return: the frame, or None when it has already been overwritten
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if self._sequences[slot] != sequence:
+            self.lost_frames += 1
+            return None
+        frame = self._payload(slot, nbytes).view(dtype).reshape(shape)
+        if not copy:
+            frame.flags.writeable = False
+            self.read_frames += 1
+            return frame
+        frame = frame.copy()
+        if self._sequences[slot] != sequence:
+            self.lost_frames += 1
+            return None
+        self.read_frames += 1
+        return frame
+
+    def close(self):
+        # the arrays viewing the block must go before it can be closed
+        self._sequences = self._last = None
+        try:
+            self.block.close()
+        except BufferError:
+            # a frame read with copy=False is still alive, the mapping goes with the process
+            pass
+        if self.owner:
+            self.block.unlink()
+            _created.discard(self.name)
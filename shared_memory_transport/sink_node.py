@@ -0,0 +1,29 @@
+import argparse
+
+from msight_core.nodes import ImageViewerSinkNode, NodeConfig
+
+from data import ShmImageData  # registers the descriptor type, otherwise the messages cannot be deserialized
+from subscriber import ShmSubscriberMixin
+
+
+class ShmImageViewerSinkNode(ShmSubscriberMixin, ImageViewerSinkNode):
+    """The image viewer, reading the frames from the shared memory ring of the publisher."""
+
+    default_configs = NodeConfig(
+        subscribe_topic_data_type=ShmImageData,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Launch an image viewer subscribing to a shared memory topic.")
+    parser.add_argument("-n", "--name", default="shm_image_viewer", help="The name of the sink node.")
+    parser.add_argument("-st", "--subscribe-topic", default="shm_images", help="The topic of the frame descriptors.")
+    parser.add_argument("--filter-sensor-name", default=None, help="Only show the frames of this sensor.")
+    args = parser.parse_args()
+
+    config = NodeConfig(
+        name=args.name,
+        subscribe_topic_name=args.subscribe_topic,
+    )
+    node = ShmImageViewerSinkNode(config, filter_sensor_name=args.filter_sensor_name)
+    node.spin()
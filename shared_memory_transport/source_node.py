@@ -0,0 +1,72 @@
+import argparse
+import time
+
+import cv2
+from msight_core.nodes import NodeConfig, RTSPSourceNode
+
+from data import ShmImageData
+from shm_ring import ShmRingBuffer
+
+
+class ShmRTSPSourceNode(RTSPSourceNode):
+    """An RTSP source node that leaves the decoded frames in a shared memory ring and only publishes their descriptors."""
+
+    default_configs = NodeConfig(
+        publish_topic_data_type=ShmImageData,
+    )
+
+    def __init__(self, configs, url, rtsp_transport="tcp", resize_ratio=None, num_slots=8):
+        super().__init__(configs, url, rtsp_transport=rtsp_transport, resize_ratio=resize_ratio)
+        self.num_slots = num_slots
+        self.ring = None
+
+    def get_data(self):
+        capture_timestamp = time.time()
+        img = self._get_raw_frame()
+        if self.resize_ratio is not None:
+            img = cv2.resize(img, (0, 0), fx=self.resize_ratio, fy=self.resize_ratio)
+
+        if self.ring is None:
+            # sized after the first frame, the stream keeps its resolution
+            self.ring = ShmRingBuffer.create(f"msight_{self.name}", img.nbytes, self.num_slots)
+            self.logger.info(f"Created shared memory ring {self.ring.name}, {self.num_slots} slots of {self.ring.slot_size} bytes")
+        slot, sequence = self.ring.write(img)
+        return ShmImageData(
+            sensor_name=self.sensor_name,
+            capture_timestamp=capture_timestamp,
+            creation_timestamp=time.time(),
+            ring=self.ring.name,
+            slot=slot,
+            sequence=sequence,
+            shape=img.shape,
+            dtype=img.dtype.str,
+        )
+
+    def on_unregister(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        super().on_unregister()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Launch an RTSP source node publishing frames through shared memory.")
+    parser.add_argument("-n", "--name", default="shm_rtsp_node", help="The name of the source node.")
+    parser.add_argument("-pt", "--publish-topic", default="shm_images", help="The topic to publish the frame descriptors to.")
+    parser.add_argument("--sensor-name", default="test_camera", help="The name of the sensor.")
+    parser.add_argument("-u", "--url", required=True, help="The url of the RTSP stream.")
+    parser.add_argument("-g", "--gap", type=int, default=0, help="Frames skipped between two published frames.")
+    parser.add_argument("-r", "--resize-ratio", type=float, default=None, help="The ratio to resize the image.")
+    parser.add_argument("--rtsp-transport", default="tcp", choices=["tcp", "udp"], help="The RTSP transport protocol.")
+    parser.add_argument("--num-slots", type=int, default=8, help="Frames kept in the ring before the oldest one is overwritten.")
+    args = parser.parse_args()
+
+    config = NodeConfig(
+        name=args.name,
+        publish_topic_name=args.publish_topic,
+        sensor_name=args.sensor_name,
+        gap=args.gap,
+    )
+    node = ShmRTSPSourceNode(config, args.url, rtsp_transport=args.rtsp_transport, resize_ratio=args.resize_ratio,
+                             num_slots=args.num_slots)
+    node.spin()
@@ -0,0 +1,51 @@
+from msight_core.data import ImageData
+
+from data import ShmImageData  # registers the descriptor type for deserialization
+from shm_ring import ShmRingBuffer
+
+
+class ShmSubscriberMixin:
+    """
+    Put in front of a node consuming ``ImageData`` to let it subscribe to a shared memory topic instead. Every
+    ``ShmImageData`` descriptor is turned back into a raw ``ImageData`` before the ``process`` of the node sees it, so
+    the node itself stays unchanged. Frames overwritten before they could be read are dropped and counted.
+    """
+
+    def _resolve(self, data):
+        rings = self.__dict__.setdefault("_shm_rings", {})
+        ring = rings.get(data.ring)
+        if ring is None:
+            try:
+                ring = rings[data.ring] = ShmRingBuffer.attach(data.ring)
+            except FileNotFoundError:
+                self.logger.warning(f"Shared memory ring {data.ring} of {data.sensor_name} is gone, is the publisher on another host?")
+                return None
+            self.logger.info(f"Attached to shared memory ring {data.ring}, {ring.num_slots} slots of {ring.slot_size} bytes")
+        frame = ring.read(data.slot, data.sequence, data.shape, data.dtype)
+        if frame is None:
+            self.logger.warning(f"Frame {data.sequence} of {data.sensor_name} was overwritten before it was read, "
+                                f"{ring.lost_frames} lost so far")
+            return None
+        # raw ImageData viewing the private copy, to_ndarray() hands it out without another copy
+        return ImageData(
+            sensor_name=data.sensor_name,
+            capture_timestamp=data.capture_timestamp,
+            creation_timestamp=data.creation_timestamp,
+            frame_id=data.frame_id,
+            device_name=data.device_name,
+            image=frame,
+            is_encoded=False,
+            size=frame.shape,
+        )
+
+    def process(self, data):
+        if isinstance(data, ShmImageData):
+            data = self._resolve(data)
+            if data is None:
+                return None
+        return super().process(data)
+
+    def on_unregister(self):
+        for ring in self.__dict__.pop("_shm_rings", {}).values():
+            ring.close()
+        super().on_unregister()
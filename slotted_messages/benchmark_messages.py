@@ -0,0 +1,111 @@
+import argparse
+import copy
+import dataclasses
+import pickle
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# the node and data type of the custom data type tutorial, unchanged
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "bring_your_own_node_custom_data"))
+# after it, the binary codec tutorial has its own data module
+sys.path.append(str(Path(__file__).resolve().parent.parent / "binary_codec"))
+
+from msight_core.nodes import NodeConfig  # noqa: E402
+from codec import BinaryCodecMixin  # noqa: E402
+from data import TrafficLightCommandData  # noqa: E402
+from process_node import CommandProcessNode  # noqa: E402
+from message import message  # noqa: E402
+
+
+@message
+class SlottedTrafficLightCommandData(TrafficLightCommandData):
+    pass
+
+
+@message(frozen=True)
+class FrozenTrafficLightCommandData(TrafficLightCommandData):
+    pass
+
+
+@message
+class BinarySlottedTrafficLightCommandData(BinaryCodecMixin, TrafficLightCommandData):
+    pass
+
+
+class ReplacingCommandProcessNode(CommandProcessNode):
+    """``CommandProcessNode`` for frozen messages, which derives a new message instead of updating the received one."""
+
+    def process(self, data):
+        if data.command != "NEXT_PHASE":
+            return None
+        self.current_state = (self.current_state + 1) % len(self.traffic_light_states)
+        return dataclasses.replace(data, traffic_state=self.traffic_light_states[self.current_state])
+
+
+def bytes_per_message(cls, count):
+    """Memory held by ``count`` messages built as ``CommandServerSourceNode.on_message`` builds them, per message."""
+    tracemalloc.start()
+    messages = [cls(command="NEXT_PHASE") for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del messages
+    return size / count
+
+
+def check_copies(cls):
+    """Checks that a message survives ``copy.copy``, ``copy.deepcopy`` and a pickle round trip unchanged."""
+    data = cls(command="NEXT_PHASE")
+    for name, clone in [("copy", copy.copy), ("deepcopy", copy.deepcopy),
+                        ("pickle", lambda d: pickle.loads(pickle.dumps(d)))]:
+        assert clone(data) == data, f"{cls.__name__} changed through {name}"
+
+
+def rate(fn, count):
+    t0 = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare regular, slotted, frozen and binary message types on a high rate command topic.")
+    parser.add_argument("--messages", type=int, default=100000, help="Messages per measurement.")
+    args = parser.parse_args()
+
+    variants = [
+        ("dataclass", TrafficLightCommandData, CommandProcessNode),
+        ("slotted", SlottedTrafficLightCommandData, CommandProcessNode),
+        ("slotted, frozen", FrozenTrafficLightCommandData, ReplacingCommandProcessNode),
+        ("slotted, binary", BinarySlottedTrafficLightCommandData, CommandProcessNode),
+    ]
+    print(f"  {'message type':<18s}{'memory':>14s}{'build':>16s}{'deserialize, process, serialize':>36s}")
+    for name, cls, node_class in variants:
+        check_copies(cls)
+        config = NodeConfig(
+            name=f"benchmark_messages_{cls.__name__}",
+            subscribe_topic_name=f"benchmark_messages_{cls.__name__}_in",
+            subscribe_topic_data_type=cls,
+            publish_topic_name=f"benchmark_messages_{cls.__name__}_out",
+            publish_topic_data_type=cls,
+            logging_level="WARNING",  # the node logs every command at INFO, which would be all we measure
+        )
+        node = node_class(config)
+        try:
+            payload = cls(command="NEXT_PHASE").serialize()
+
+            # the loop body of DataProcessingNode._spin, without the broker
+            def step():
+                data = node.subscribe_topic_data_type.deserialize(payload)
+                node.process(data).serialize()
+
+            build_rate = rate(lambda: cls(command="NEXT_PHASE"), args.messages)
+            process_rate = rate(step, args.messages)
+        finally:
+            node.unregister()
+        print(f"  {name:<18s}{bytes_per_message(cls, args.messages):8.0f} bytes{build_rate:11.0f} msg/s{process_rate:30.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
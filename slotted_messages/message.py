@@ -0,0 +1,88 @@
+import dataclasses
+import itertools
+import os
+import threading
+
+from snowflake import SnowflakeGenerator
+
+_generator = None
+_generator_pid = None
+_generator_lock = threading.Lock()
+
+
+def next_frame_id():
+    """
+    Same ids as ``generate_frame_id``, from one generator per process instead of a new one per message. The ids stay
+    unique within a millisecond, and the generator is only built once.
+    """
+    global _generator, _generator_pid
+    with _generator_lock:
+        if _generator_pid != os.getpid():
+            # rebuilt after a fork, the worker id comes from the pid
+            _generator = SnowflakeGenerator(os.getpid() % 1024)
+            _generator_pid = os.getpid()
+        for _ in itertools.count():
+            frame_id = next(_generator)
+            # None once the 4096 ids of the current millisecond are used up
+            if frame_id is not None:
+                return frame_id
+
+
+def _frozen_setattr(self, name, value):
+    raise dataclasses.FrozenInstanceError(f"cannot assign to field {name!r}")
+
+
+def _frozen_delattr(self, name):
+    raise dataclasses.FrozenInstanceError(f"cannot delete field {name!r}")
+
+
+def _frozen_getstate(self):
+    return [getattr(self, f.name) for f in dataclasses.fields(self)]
+
+
+def _frozen_setstate(self, state):
+    # copy and pickle restore the slots, which the frozen __setattr__ refuses
+    for f, value in zip(dataclasses.fields(self), state):
+        object.__setattr__(self, f.name, value)
+
+
+def _frozen_init(cls):
+    """
+    The ``__init__`` of a frozen twin of ``cls``, which sets the fields with ``object.__setattr__``. The twin has no
+    dataclass bases, so it may be frozen.
+    """
+    specs = []
+    for f in dataclasses.fields(cls):
+        field = dataclasses.field(default=f.default, default_factory=f.default_factory, init=f.init, repr=f.repr,
+                                  compare=f.compare, kw_only=f.kw_only)
+        specs.append((f.name, f.type, field))
+    namespace = {"__post_init__": cls.__post_init__} if hasattr(cls, "__post_init__") else {}
+    return dataclasses.make_dataclass(cls.__name__, specs, namespace=namespace, frozen=True).__init__
+
+
+def message(cls=None, *, frozen=False):
+    """
+    Class decorator turning a ``Data`` subclass into a slotted dataclass, used in place of ``@dataclass``.
+
+    Every field, those inherited from ``SensorData`` included, is stored in a slot. Frame ids come from
+    ``next_frame_id``. With ``frozen=True`` the fields cannot be assigned once the message is built, use
+    ``dataclasses.replace`` to derive a new message. Frozen messages still copy and pickle, as
+    ``@dataclass(frozen=True, slots=True)`` ones do. ``@dataclass(frozen=True)`` itself cannot be used, since
+    ``SensorData`` is not frozen.
+    """
+    def wrap(cls):
+        annotations = cls.__dict__.get("__annotations__", {})
+        if "frame_id" in getattr(cls, "__dataclass_fields__", {}) and "frame_id" not in annotations:
+            # redeclare the inherited field, it keeps its place in the __init__ arguments
+            cls.__annotations__ = {**annotations, "frame_id": int}
+            cls.frame_id = dataclasses.field(default_factory=next_frame_id)
+        cls = dataclasses.dataclass(cls, slots=True)
+        if frozen:
+            cls.__init__ = _frozen_init(cls)
+            cls.__setattr__ = _frozen_setattr
+            cls.__delattr__ = _frozen_delattr
+            cls.__getstate__ = _frozen_getstate
+            cls.__setstate__ = _frozen_setstate
+        return cls
+
+    return wrap if cls is None else wrap(cls)